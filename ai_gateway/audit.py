@@ -1,40 +1,170 @@
 """
 Audit log endpoints for admin dashboard.
 Returns audit log entries from Supabase for display in the web dashboard.
+
+Pages are keyset-paginated on (timestamp, id), newest first: each page returns an opaque
+next_cursor holding the last row's key, and the next page asks for rows strictly before it,
+so every page costs the same however deep it is (migrations/005_audit_log_indexes.sql adds
+the matching indexes). Filters: user_id, action prefix, IP and a [since, until) time range.
+Only the requested columns are selected.
 """
 
-from typing import Any, Dict
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+from ai_gateway.policy import policy
+from ai_gateway.settings import settings
 from ai_gateway.supabase_client import supabase
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from config_engine.access import get_user_id_and_role
-import asyncio
 
 router = APIRouter()
 
 AUDIT_LOG_TABLE = "audit_log"
+AUDIT_COLUMNS = ("id", "timestamp", "user_id", "username", "action", "ip", "user_agent")
+#: Columns the cursor needs; always selected.
+KEY_COLUMNS = ("id", "timestamp")
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """
+    Opaque cursor for the rows after `row`.
+    """
+    raw = json.dumps([row["timestamp"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, Any]:
+    """
+    (timestamp, id) of a cursor from encode_cursor; raises ValueError if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(timestamp, str):
+        raise ValueError("Invalid cursor")
+    return timestamp, row_id
+
+
+def _quoted(value: Any) -> str:
+    # PostgREST filter values with reserved characters (the timestamp's ':' '+' '.') are quoted.
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _like_prefix(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+async def query_audit_log(
+    limit: int,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action_prefix: Optional[str] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    columns: Sequence[str] = AUDIT_COLUMNS,
+) -> Dict[str, Any]:
+    """
+    One page of audit_log rows, newest first, and the cursor of the next page (None at the end).
+    Raises ValueError for a malformed cursor or unknown columns.
+    """
+    unknown = set(columns) - set(AUDIT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown audit columns: {', '.join(sorted(unknown))}")
+    selected = list(KEY_COLUMNS) + [c for c in columns if c not in KEY_COLUMNS]
+    after = decode_cursor(cursor) if cursor else None
+
+    def run():
+        query = supabase.table(AUDIT_LOG_TABLE).select(", ".join(selected))
+        if user_id:
+            query = query.eq("user_id", user_id)
+        if action_prefix:
+            query = query.like("action", _like_prefix(action_prefix))
+        if ip:
+            query = query.eq("ip", ip)
+        if since:
+            query = query.gte("timestamp", since.isoformat())
+        if until:
+            query = query.lt("timestamp", until.isoformat())
+        if after:
+            timestamp, row_id = _quoted(after[0]), _quoted(after[1])
+            query = query.or_(
+                f"timestamp.lt.{timestamp},and(timestamp.eq.{timestamp},id.lt.{row_id})"
+            )
+        # One extra row tells whether there is a next page.
+        return (
+            query.order("timestamp", desc=True)
+            .order("id", desc=True)
+            .limit(limit + 1)
+            .execute()
+        )
+
+    result = await asyncio.to_thread(run)
+    rows = result.data or []
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    hidden = set(KEY_COLUMNS) - set(columns)
+    if hidden:
+        rows = [{k: v for k, v in row.items() if k not in hidden} for row in rows]
+    return {"logs": rows, "next_cursor": next_cursor}
+
+
+async def audit_log_page(**kwargs: Any) -> Dict[str, Any]:
+    """
+    query_audit_log for an endpoint: bad cursors or columns become 400 responses.
+    """
+    try:
+        return await query_audit_log(**kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def parse_columns(fields: Optional[str]) -> Sequence[str]:
+    """
+    Columns from a comma-separated ?fields= value; all of AUDIT_COLUMNS if empty.
+    """
+    if not fields:
+        return AUDIT_COLUMNS
+    return [field.strip() for field in fields.split(",") if field.strip()]
 
 
 @router.get("/audit/logs")
 async def get_audit_logs(
     request: Request,
     user: tuple = Depends(get_user_id_and_role),
-    limit: int = 100,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=settings.AUDIT_PAGE_MAX_ROWS),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Retrieve audit log entries for the admin dashboard from Supabase.
+    Retrieve audit log entries for the admin dashboard from Supabase, newest first.
     Only accessible to admin and superadmin roles.
-    """
-    user_id, role = user
-    if role not in ("admin", "superadmin"):
-        raise HTTPException(status_code=403, detail="Admin access required")
 
-    result = await asyncio.to_thread(
-        lambda: supabase.table(AUDIT_LOG_TABLE)
-        .select("timestamp, user_id, username, action, ip, user_agent")
-        .order("timestamp", desc=True)
-        .range(offset, offset + limit - 1)
-        .execute()
+    Pass the returned next_cursor as ?cursor= for the following page. Optional filters:
+    user_id, action (prefix), ip, since and until (ISO timestamps, until exclusive);
+    fields selects columns (comma-separated, default all).
+    """
+    _, role = user
+    policy.require("dashboard", role)
+    return await audit_log_page(
+        limit=limit,
+        cursor=cursor,
+        user_id=user_id,
+        action_prefix=action,
+        ip=ip,
+        since=since,
+        until=until,
+        columns=parse_columns(fields),
     )
-    logs = getattr(result, "data", result.get("data", []))
-    return {"logs": logs}
@@ -1,14 +1,204 @@
 """
-Helper for writing audit log events to Supabase audit_log table.
+Buffered writer for the Supabase audit_log table.
+
+log_audit_event only queues the event and returns, so handlers never wait on the database.
+A background task writes queued events as multi-row inserts as soon as AUDIT_BATCH_SIZE are
+waiting, and at least every AUDIT_FLUSH_INTERVAL_SECONDS otherwise. The queue holds at most
+AUDIT_QUEUE_MAX_EVENTS; once it is full, AUDIT_OVERFLOW drops the oldest or the newest event
+or makes the caller wait for room. A batch whose insert fails goes to the local spool
+(ai_gateway.spool) and is replayed once Supabase recovers; while the spool holds rows, new
+batches are spooled behind them to keep the order. Without a usable spool, a failed batch
+goes back to the head of the queue and is retried on the next flush.
+
+The writer starts with the first event (or the app lifespan) and stop() drains the queue,
+for up to AUDIT_DRAIN_TIMEOUT_SECONDS, on shutdown. Events logged after that are written
+directly.
 """
 
-from datetime import datetime
-from typing import Optional
 import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Optional
 
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+from ai_gateway.spool import Spool, spool
 from ai_gateway.supabase_client import supabase
 
 AUDIT_LOG_TABLE = "audit_log"
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class AuditWriter:
+    """
+    Bounded queue of audit rows flushed by a background task in batches.
+
+    Methods:
+        put(row): Queue a row, applying the overflow policy when the queue is full.
+        flush(): Write everything queued now; returns whether every batch was written.
+        start(): Start the flush task on the running loop (done lazily by put()).
+        stop(timeout): Flush what is queued (for up to `timeout` seconds) and stop the task.
+        stats(): Queue depth and queued, written, spooled, dropped and failure counts.
+    """
+
+    def __init__(
+        self,
+        max_events: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: str,
+        spool: Optional[Spool] = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            logging.warning(f"[Audit] Unknown AUDIT_OVERFLOW '{overflow}'; using drop_oldest")
+            overflow = "drop_oldest"
+        self.max_events = max(1, max_events)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spool = spool
+        self._queue: deque[dict[str, Any]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._room: Optional[asyncio.Event] = None
+        self._halt: Optional[asyncio.Event] = None
+        self._stopped = False
+        self.counts = {
+            "queued": 0, "written": 0, "batches": 0, "spooled": 0, "dropped": 0, "write_errors": 0,
+            "blocked": 0,
+        }
+
+    def start(self) -> None:
+        # Events bind to the loop they are first awaited on, so each loop gets its own.
+        self._loop = asyncio.get_running_loop()
+        self._wake, self._room, self._halt = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        self._stopped = False
+        self._task = asyncio.create_task(self._run())
+
+    def _running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._loop is asyncio.get_running_loop()
+        )
+
+    async def put(self, row: dict[str, Any]) -> None:
+        if self._stopped:
+            await self._write([row])
+            return
+        if not self._running():
+            self.start()
+        while len(self._queue) >= self.max_events:
+            if self.overflow == "block" and not self._halt.is_set():
+                self.counts["blocked"] += 1
+                self._room.clear()
+                self._wake.set()
+                await self._room.wait()
+                continue
+            self.counts["dropped"] += 1
+            metrics.incr("audit_events", result="dropped")
+            if self.overflow == "drop_newest":
+                return
+            self._queue.popleft()
+        self._queue.append(row)
+        self.counts["queued"] += 1
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while not self._halt.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not await self.flush():
+                # Let the database recover instead of retrying on every new event.
+                try:
+                    await asyncio.wait_for(self._halt.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+        await self.flush()
+
+    async def flush(self) -> bool:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if self._room is not None:
+                self._room.set()
+            if self.spool is not None and self.spool.depth and await self._spill(batch):
+                continue
+            if await self._write(batch) or await self._spill(batch):
+                continue
+            self._requeue(batch)
+            return False
+        return True
+
+    async def _spill(self, batch: list[dict[str, Any]]) -> bool:
+        if self.spool is None or not await asyncio.to_thread(self.spool.append, AUDIT_LOG_TABLE, batch):
+            return False
+        self.counts["spooled"] += len(batch)
+        metrics.incr("audit_events", len(batch), result="spooled")
+        return True
+
+    async def _write(self, batch: list[dict[str, Any]]) -> bool:
+        try:
+            await asyncio.to_thread(
+                lambda: supabase.table(AUDIT_LOG_TABLE).insert(batch).execute()
+            )
+        except Exception as e:
+            self.counts["write_errors"] += 1
+            metrics.incr("audit_events", result="write_error")
+            logging.warning(f"[Audit] Could not write {len(batch)} audit event(s): {e}")
+            return False
+        self.counts["written"] += len(batch)
+        self.counts["batches"] += 1
+        metrics.incr("audit_events", len(batch), result="written")
+        return True
+
+    def _requeue(self, batch: list[dict[str, Any]]) -> None:
+        # Back at the head in their original order; what no longer fits is dropped.
+        for row in reversed(batch):
+            if len(self._queue) >= self.max_events:
+                self.counts["dropped"] += 1
+                metrics.incr("audit_events", result="dropped")
+                continue
+            self._queue.appendleft(row)
+
+    async def stop(self, timeout: float) -> None:
+        task, self._task = self._task, None
+        self._stopped = True
+        if task is None or task.done():
+            return
+        self._halt.set()
+        self._wake.set()
+        self._room.set()
+        try:
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"[Audit] Gave up draining after {timeout}s; {len(self._queue)} audit event(s) lost"
+            )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counts,
+            "pending": len(self._queue),
+            "running": self._task is not None and not self._task.done(),
+            "overflow": self.overflow,
+        }
+
+
+#: Process-wide audit log writer.
+audit_writer = AuditWriter(
+    settings.AUDIT_QUEUE_MAX_EVENTS,
+    settings.AUDIT_BATCH_SIZE,
+    settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    settings.AUDIT_OVERFLOW,
+    spool,
+)
 
 
 async def log_audit_event(
@@ -19,19 +209,16 @@ async def log_audit_event(
     user_agent: Optional[str] = None,
 ) -> None:
     """
-    Asynchronously write an audit event to the Supabase audit_log table.
+    Queue an audit event for the Supabase audit_log table; returns without waiting for the write.
     """
-    await asyncio.to_thread(
-        lambda: supabase.table(AUDIT_LOG_TABLE)
-        .insert(
-            {
-                "timestamp": datetime.utcnow().isoformat(),
-                "user_id": user_id,
-                "username": username,
-                "action": action,
-                "ip": ip,
-                "user_agent": user_agent,
-            }
-        )
-        .execute()
+    await audit_writer.put(
+        {
+            "event_id": uuid.uuid4().hex,
+            "timestamp": datetime.utcnow().isoformat(),
+            "user_id": user_id,
+            "username": username,
+            "action": action,
+            "ip": ip,
+            "user_agent": user_agent,
+        }
     )
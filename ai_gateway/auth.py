@@ -15,6 +15,11 @@ from fastapi import (APIRouter, Cookie, Form, HTTPException, Request, Response,
 from fastapi.responses import JSONResponse, RedirectResponse
 from jose import jwt
 
+from ai_gateway.policy import policy
+from ai_gateway.supabase_config import config_bus
+from ai_gateway.supabase_roles import ROLE_CHANGE_PREFIX
+from ai_gateway.token_auth import (JWT_ALGORITHM, JWT_COOKIE_NAME, JWT_ISSUER,
+                                   JWT_SECRET, request_claims)
 from config_engine.access import get_user_role
 
 router = APIRouter()
@@ -24,9 +29,6 @@ DISCORD_CLIENT_SECRET = os.getenv("DISCORD_CLIENT_SECRET")
 DISCORD_REDIRECT_URI = os.getenv(
     "DISCORD_REDIRECT_URI", "http://localhost:3000/auth/callback"
 )
-JWT_SECRET = os.getenv("JWT_SECRET", "changeme")
-JWT_ISSUER = "ai-discord-bot"
-JWT_COOKIE_NAME = "ai_dash_token"
 JWT_REFRESH_COOKIE_NAME = "ai_dash_refresh"
 JWT_COOKIE_MAX_AGE = 60 * 60 * 1  # 1 hour access token
 JWT_REFRESH_MAX_AGE = 60 * 60 * 24 * 14  # 14 days refresh token
@@ -70,14 +72,16 @@ from ai_gateway.refresh_token_store import (get_valid_refresh_token,
                                             store_refresh_token)
 from ai_gateway.settings import settings
 
-# JWT Configuration
-JWT_ALGORITHM = "HS256"
-
 
 def create_access_token(data: dict) -> str:
+    """
+    Mint a short-lived access token. Its `role` claim authorizes dashboard requests without
+    a role lookup until it expires or the user's tokens are revoked (see ai_gateway.token_auth).
+    """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "iss": JWT_ISSUER})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "iss": JWT_ISSUER, "type": "access"})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
@@ -139,7 +143,7 @@ async def auth_callback(code: str, request: Request, response: Response):
     if not role:
         await log_audit_event(discord_id, "login_failed_no_role", username=username, ip=ip, user_agent=user_agent)
         raise HTTPException(status_code=403, detail="No role assigned to user")
-    if role not in ("admin", "superadmin"):
+    if not policy.allows("dashboard", role):
         await log_audit_event(
             discord_id,
             "login_denied_role",
@@ -214,7 +218,10 @@ async def auth_refresh(
     ai_dash_csrf: str = Cookie(None),
     x_csrf_token: str = Form(None),
 ):
-    """Refresh access token using refresh token and CSRF token; rotate refresh token in Supabase."""
+    """
+    Refresh access token using refresh token and CSRF token; rotate refresh token in Supabase.
+    The role is read again, so a refreshed token reflects role changes.
+    """
     ip = request.client.host if request.client else None
     user_agent = request.headers.get("user-agent")
     try:
@@ -237,6 +244,12 @@ async def auth_refresh(
             raise HTTPException(
                 status_code=401, detail="Invalid or expired refresh token (db)"
             )
+        role = await get_user_role(user_id)
+        if not policy.allows("dashboard", role):
+            await log_audit_event(
+                user_id, "refresh_denied_role", ip=ip, user_agent=user_agent
+            )
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
         # Rotate refresh token
         now = datetime.utcnow()
         exp = now + timedelta(seconds=JWT_COOKIE_MAX_AGE)
@@ -244,8 +257,9 @@ async def auth_refresh(
         jwt_payload = {
             "sub": user_id,
             "username": payload.get("username", ""),
-            "role": payload.get("role", "admin"),
+            "role": role,
             "iss": JWT_ISSUER,
+            "iat": now,
             "exp": exp,
             "type": "access",
         }
@@ -308,6 +322,8 @@ async def auth_logout(request: Request, response: Response):
     user_agent = request.headers.get("user-agent")
     if user_id:
         await revoke_all_tokens_for_user(user_id)
+        # Also refuses the user's outstanding access tokens on every replica.
+        await config_bus.announce(f"{ROLE_CHANGE_PREFIX}{user_id}")
         await log_audit_event(user_id, "logout", ip=ip, user_agent=user_agent)
     else:
         await log_audit_event(None, "logout_no_user", ip=ip, user_agent=user_agent)
@@ -320,21 +336,12 @@ async def auth_logout(request: Request, response: Response):
 
 @router.get("/auth/me")
 async def auth_me(request: Request):
-    """Return info about the current user from JWT (from cookie or header), for dashboard frontend."""
-    token = None
-    # Prefer cookie
-    if JWT_COOKIE_NAME in request.cookies:
-        token = request.cookies[JWT_COOKIE_NAME]
-    # Fallback to Authorization header
-    if not token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ", 1)[1]
-    if not token:
-        return {"id": None, "username": None, "avatar": None, "role": None}
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], issuer=JWT_ISSUER)
-    except Exception:
+    """
+    Return info about the current user from JWT (from cookie or header), for dashboard frontend.
+    Verified tokens are cached, so repeated calls do not decode the JWT again.
+    """
+    payload = request_claims(request)
+    if payload is None:
         return {"id": None, "username": None, "avatar": None, "role": None}
     return {
         "id": payload["sub"],
@@ -1,13 +1,32 @@
 """
 Helpers for bot/global and user context memory access via MCP server endpoints.
+Calls made while serving a request are bounded by its deadline, which is also passed on
+to the MCP server as X-Request-Timeout-Ms.
 """
 
 import os
 from typing import Any, Dict
 import httpx
 
+from ai_gateway.deadline import remaining, timeout_within
+
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://mcp_server:8000")
 
+#: Timeout for memory-store calls made without a request deadline (httpx's default).
+MEMORY_TIMEOUT_SECONDS = 5.0
+
+
+def _request_options(user_id: str) -> Dict[str, Any]:
+    """
+    Headers and timeout for one memory-store call on behalf of user_id.
+    Raises DeadlineExceeded if the request deadline has already passed.
+    """
+    timeout = timeout_within(MEMORY_TIMEOUT_SECONDS)
+    headers = {"X-User-ID": user_id}
+    if remaining() is not None:
+        headers["X-Request-Timeout-Ms"] = str(int(timeout * 1000))
+    return {"headers": headers, "timeout": timeout}
+
 
 async def get_bot_context(key: str) -> Dict[str, Any]:
     """
@@ -15,7 +34,7 @@ async def get_bot_context(key: str) -> Dict[str, Any]:
     """
     async with httpx.AsyncClient() as client:
         resp = await client.get(
-            f"{MCP_SERVER_URL}/memory/{key}", headers={"X-User-ID": "bot"}
+            f"{MCP_SERVER_URL}/memory/{key}", **_request_options("bot")
         )
         resp.raise_for_status()
         return resp.json()
@@ -29,7 +48,7 @@ async def set_bot_context(key: str, value: str) -> Dict[str, Any]:
         resp = await client.post(
             f"{MCP_SERVER_URL}/memory",
             json={"key": key, "value": value},
-            headers={"X-User-ID": "bot"},
+            **_request_options("bot"),
         )
         resp.raise_for_status()
         return resp.json()
@@ -41,7 +60,7 @@ async def get_user_context(user_id: str, key: str) -> Dict[str, Any]:
     """
     async with httpx.AsyncClient() as client:
         resp = await client.get(
-            f"{MCP_SERVER_URL}/memory/{key}", headers={"X-User-ID": user_id}
+            f"{MCP_SERVER_URL}/memory/{key}", **_request_options(user_id)
         )
         resp.raise_for_status()
         return resp.json()
@@ -55,7 +74,7 @@ async def set_user_context(user_id: str, key: str, value: str) -> Dict[str, Any]
         resp = await client.post(
             f"{MCP_SERVER_URL}/memory",
             json={"key": key, "value": value},
-            headers={"X-User-ID": user_id},
+            **_request_options(user_id),
         )
         resp.raise_for_status()
         return resp.json()
@@ -0,0 +1,175 @@
+"""
+Health-scored circuit breakers for LLM providers.
+
+Each provider gets a breaker that tracks the outcome and latency of its recent calls:
+- closed: calls flow normally; the breaker opens when the error rate or the slow-call rate
+  over the window crosses its threshold.
+- open: calls are rejected until BREAKER_OPEN_SECONDS have passed.
+- half_open: a limited number of probe calls are let through; a success closes the
+  breaker, a failure opens it again.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider.
+
+    Methods:
+        available(): True if a call would currently be admitted (no side effects).
+        acquire(): Admit a call, reserving a probe slot when half-open. Returns False if rejected.
+        record(ok, latency): Record the outcome of an admitted call.
+        release(): Give back an admitted call that was cancelled before it finished.
+        health(): Score in [0, 1]; 1 means no recent errors or slow calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 15.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.trips = 0
+        self._outcomes: deque[tuple[bool, float]] = deque(maxlen=window)
+
+    @classmethod
+    def from_settings(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=settings.BREAKER_WINDOW_SIZE,
+            min_calls=settings.BREAKER_MIN_CALLS,
+            error_rate=settings.BREAKER_ERROR_RATE,
+            slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=settings.BREAKER_SLOW_CALL_RATE,
+            open_seconds=settings.BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.BREAKER_HALF_OPEN_PROBES,
+        )
+
+    def _refresh_state(self) -> None:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def available(self) -> bool:
+        self._refresh_state()
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            return self.probes_in_flight < self.half_open_probes
+        return False
+
+    def acquire(self) -> bool:
+        if not self.available():
+            metrics.incr("breaker_rejected", provider=self.name)
+            return False
+        if self.state == HALF_OPEN:
+            self.probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        if self.state == HALF_OPEN and self.probes_in_flight:
+            self.probes_in_flight -= 1
+
+    def record(self, ok: bool, latency: float) -> None:
+        if self.state == HALF_OPEN:
+            self.release()
+            if ok and latency < self.slow_call_seconds:
+                self._outcomes.clear()
+                self._transition(CLOSED)
+            else:
+                self._open()
+            return
+        self._outcomes.append((ok, latency))
+        if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+            error_rate, slow_rate = self._rates()
+            if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _rates(self) -> tuple[float, float]:
+        if not self._outcomes:
+            return 0.0, 0.0
+        total = len(self._outcomes)
+        errors = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, latency in self._outcomes if latency >= self.slow_call_seconds)
+        return errors / total, slow / total
+
+    def health(self) -> float:
+        error_rate, slow_rate = self._rates()
+        return round(1.0 - max(error_rate, slow_rate), 4)
+
+    def _open(self) -> None:
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logging.warning(f"[CircuitBreaker] {self.name}: {self.state} -> {state}")
+        metrics.incr("breaker_transitions", provider=self.name, to=state)
+        self.state = state
+        if state != HALF_OPEN:
+            self.probes_in_flight = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        self._refresh_state()
+        error_rate, slow_rate = self._rates()
+        retry_in: Optional[float] = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.opened_at + self.open_seconds - time.monotonic()), 3)
+        return {
+            "state": self.state,
+            "health": self.health(),
+            "error_rate": round(error_rate, 4),
+            "slow_call_rate": round(slow_rate, 4),
+            "calls_in_window": len(self._outcomes),
+            "trips": self.trips,
+            "retry_in_seconds": retry_in,
+        }
+
+
+class BreakerRegistry:
+    """
+    Lazily creates one CircuitBreaker per provider name.
+    """
+
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker.from_settings(provider)
+        return breaker
+
+    def states(self) -> dict[str, dict[str, Any]]:
+        return {name: breaker.to_dict() for name, breaker in sorted(self._breakers.items())}
+
+
+#: Process-wide provider breakers.
+breakers = BreakerRegistry()
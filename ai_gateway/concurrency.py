@@ -0,0 +1,193 @@
+"""
+Adaptive per-provider concurrency limits for LLM calls.
+
+Each provider gets an AIMD limiter: the limit grows by about one per window of healthy calls
+and shrinks multiplicatively when the provider answers 429/overloaded or when a call's
+latency rises well above the smoothed baseline. Calls over the limit wait in a bounded FIFO
+queue with a deadline; when the queue is full, or the deadline passes, the call is rejected
+immediately with a Retry-After hint instead of piling more load on the provider.
+"""
+
+import asyncio
+import collections
+import logging
+import math
+import time
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+
+
+class LimiterRejected(Exception):
+    """
+    Raised when a call cannot be admitted: the wait queue is full or the queue deadline passed.
+    """
+
+    def __init__(self, name: str, reason: str, retry_after: int):
+        super().__init__(f"{name} concurrency limit reached ({reason})")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter with a bounded wait queue for one provider.
+
+    Methods:
+        acquire(): Wait for a slot. Raises LimiterRejected if the queue is full or times out.
+        release(latency, overloaded): Free a slot and adapt the limit. Pass latency=None for
+            calls that did not produce a usable signal (cancelled, non-overload errors).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        queue_size: int = 50,
+        queue_timeout: float = 10.0,
+        backoff: float = 0.9,
+        latency_tolerance: float = 2.0,
+        enabled: bool = True,
+    ) -> None:
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.enabled = enabled
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+        self.counts = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @classmethod
+    def from_settings(cls, name: str) -> "AdaptiveLimiter":
+        return cls(
+            name,
+            initial_limit=settings.LIMITER_INITIAL_LIMIT,
+            min_limit=settings.LIMITER_MIN_LIMIT,
+            max_limit=settings.LIMITER_MAX_LIMIT,
+            queue_size=settings.LIMITER_QUEUE_SIZE,
+            queue_timeout=settings.LIMITER_QUEUE_TIMEOUT_SECONDS,
+            backoff=settings.LIMITER_BACKOFF,
+            latency_tolerance=settings.LIMITER_LATENCY_TOLERANCE,
+            enabled=settings.LIMITER_ENABLED,
+        )
+
+    def _has_capacity(self) -> bool:
+        return not self.enabled or self.in_flight < int(self.limit)
+
+    async def acquire(self) -> None:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.counts["admitted"] += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.counts["queued"] += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counts["timed_out"] += 1
+            self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as the caller went away; pass it on.
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.counts["admitted"] += 1
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        if overloaded:
+            self._decrease("overloaded")
+        elif latency is not None:
+            self._on_success(latency)
+        self._wake()
+
+    def _on_success(self, latency: float) -> None:
+        baseline = self.baseline_latency
+        self.baseline_latency = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+        if baseline is not None and latency > baseline * self.latency_tolerance:
+            self._decrease("latency")
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grow a limit that is actually being used.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        # Concurrent failures usually share one cause; back off once per latency window.
+        if now - self._last_decrease < (self.baseline_latency or 1.0):
+            return
+        self._last_decrease = now
+        previous = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        if int(self.limit) != previous:
+            logging.warning(f"[Limiter] {self.name}: limit {previous} -> {int(self.limit)} ({reason})")
+        metrics.incr("limiter_decreases", provider=self.name, reason=reason)
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def retry_after(self) -> int:
+        """
+        Seconds a rejected caller should wait: roughly the time to drain the current queue.
+        """
+        latency = self.baseline_latency or 1.0
+        backlog = (len(self._waiters) + 1) / max(self.limit, 1)
+        return min(60, max(1, math.ceil(latency * backlog)))
+
+    def _reject(self, reason: str) -> None:
+        self.counts["rejected"] += 1
+        metrics.incr("limiter_rejected", provider=self.name, reason=reason)
+        raise LimiterRejected(self.name, reason, self.retry_after())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "baseline_latency": round(self.baseline_latency, 4) if self.baseline_latency else None,
+            **self.counts,
+        }
+
+
+class LimiterRegistry:
+    """
+    Lazily creates one AdaptiveLimiter per provider name.
+    """
+
+    def __init__(self) -> None:
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    def get(self, provider: str) -> AdaptiveLimiter:
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = self._limiters[provider] = AdaptiveLimiter.from_settings(provider)
+        return limiter
+
+    def states(self) -> dict[str, dict[str, Any]]:
+        return {name: limiter.to_dict() for name, limiter in sorted(self._limiters.items())}
+
+
+#: Process-wide provider concurrency limiters.
+limiters = LimiterRegistry()
@@ -0,0 +1,417 @@
+"""
+Config change feed shared by every gateway replica and the MCP server.
+
+set_config publishes a versioned ConfigChange after writing bot_config. Every process
+subscribes at startup and, for each change newer than the version it last applied for that
+key, drops its config snapshot and runs the config listeners (response cache, ...). Versions
+come from bot_config.version (migrations/001_bot_config_change_feed.sql), so the highest
+version a process has applied shows how far it has converged; see /config/status. Changes
+that arrive while a subscription is down are covered by the snapshot TTL, and a reconnect
+invalidates everything.
+
+Transports (CONFIG_BUS):
+    local — in-process fan-out; single-process deployments and tests (default).
+    postgres — LISTEN/NOTIFY on CONFIG_BUS_CHANNEL at CONFIG_BUS_URL (requires asyncpg).
+        The migration's trigger also notifies for writes made outside the gateway.
+    supabase — Supabase Realtime broadcast on CONFIG_BUS_CHANNEL at SUPABASE_URL.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+
+#: Key delivered to listeners when changes may have been missed (e.g. after a reconnect).
+ALL_KEYS = "*"
+
+#: Delay between attempts to re-establish a lost subscription.
+RECONNECT_DELAY_SECONDS = 5.0
+
+
+def replica_id() -> str:
+    """
+    Identifier of this process in change events: host name plus PID.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """
+    One bot_config write: the key, its new version and the process that made it.
+    """
+
+    key: str
+    version: int
+    origin: str = ""
+    at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ConfigChange":
+        return cls(
+            key=str(data["key"]),
+            version=int(data.get("version") or 0),
+            origin=str(data.get("origin") or ""),
+            at=float(data.get("at") or time.time()),
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ConfigChange":
+        return cls.from_dict(json.loads(payload))
+
+
+Deliver = Callable[[ConfigChange], Awaitable[None]]
+Resync = Callable[[], Awaitable[None]]
+
+
+class BaseConfigTransport(abc.ABC):
+    """
+    Carries ConfigChange events between processes.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def start(self, deliver: Deliver, resync: Resync) -> None:
+        """
+        Subscribe: call `deliver` for each change received and `resync` after a lost
+        subscription is re-established.
+        """
+
+    @abc.abstractmethod
+    async def publish(self, change: ConfigChange) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalConfigTransport(BaseConfigTransport):
+    """
+    In-process fan-out. Buses sharing one instance behave like replicas sharing a feed.
+    """
+
+    name = "local"
+
+    def __init__(self) -> None:
+        self._subscribers: list[Deliver] = []
+
+    async def start(self, deliver: Deliver, resync: Resync) -> None:
+        self._subscribers.append(deliver)
+
+    async def publish(self, change: ConfigChange) -> None:
+        for deliver in list(self._subscribers):
+            await deliver(change)
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+
+
+class PostgresConfigTransport(BaseConfigTransport):
+    """
+    Postgres LISTEN/NOTIFY over a dedicated asyncpg connection, reconnecting when it drops.
+    """
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, channel: str) -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._deliver: Optional[Deliver] = None
+        self._resync: Optional[Resync] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._closed = False
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._conn = conn
+
+    async def start(self, deliver: Deliver, resync: Resync) -> None:
+        self._deliver, self._resync = deliver, resync
+        await self._connect()
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            change = ConfigChange.from_json(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"[ConfigBus] Ignoring malformed notification {payload!r}: {e}")
+            return
+        self._spawn(self._deliver(change))
+
+    def _on_terminate(self, conn) -> None:
+        if not self._closed:
+            logging.warning("[ConfigBus] Postgres connection lost; reconnecting")
+            self._spawn(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            try:
+                await self._connect()
+            except Exception as e:
+                logging.warning(f"[ConfigBus] Reconnect failed: {e}")
+                continue
+            await self._resync()
+            return
+
+    async def publish(self, change: ConfigChange) -> None:
+        await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, change.to_json())
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._tasks):
+            task.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+
+
+class SupabaseRealtimeConfigTransport(BaseConfigTransport):
+    """
+    Supabase Realtime broadcast channel; the realtime client reconnects on its own.
+    """
+
+    name = "supabase"
+
+    def __init__(self, url: str, key: str, channel: str) -> None:
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/realtime/v1"
+        self.key = key
+        self.topic = channel
+        self._client = None
+        self._channel = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self, deliver: Deliver, resync: Resync) -> None:
+        from realtime import AsyncRealtimeClient
+
+        def on_broadcast(message: dict) -> None:
+            try:
+                change = ConfigChange.from_dict(message["payload"])
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"[ConfigBus] Ignoring malformed broadcast {message!r}: {e}")
+                return
+            task = asyncio.ensure_future(deliver(change))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        self._client = AsyncRealtimeClient(self.url, self.key)
+        await self._client.connect()
+        self._channel = self._client.channel(self.topic)
+        self._channel.on_broadcast("change", on_broadcast)
+        await self._channel.subscribe()
+
+    async def publish(self, change: ConfigChange) -> None:
+        await self._channel.send_broadcast("change", asdict(change))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+
+def transport_from_settings() -> BaseConfigTransport:
+    """
+    Build the transport selected by CONFIG_BUS.
+    """
+    kind = settings.CONFIG_BUS
+    if kind == "postgres":
+        return PostgresConfigTransport(settings.CONFIG_BUS_URL, settings.CONFIG_BUS_CHANNEL)
+    if kind == "supabase":
+        return SupabaseRealtimeConfigTransport(
+            settings.SUPABASE_URL, settings.SUPABASE_KEY, settings.CONFIG_BUS_CHANNEL
+        )
+    if kind != "local":
+        logging.warning(f"[ConfigBus] Unknown CONFIG_BUS {kind!r}; using local")
+    return LocalConfigTransport()
+
+
+class ConfigBus:
+    """
+    Publishes this process's config changes and applies everyone else's.
+
+    Methods:
+        start(): Subscribe to the transport and read the current config version.
+        publish(key, version): Apply a change locally, then announce it to other processes.
+        announce(key): Same for unversioned changes routed to a handler (e.g. "role:<id>").
+        add_handler(prefix, handler): Route changes to keys with `prefix` to `handler`.
+        wait_for_version(after, timeout): Wait for a version newer than `after`.
+        stats(): Transport, applied version and event counts, for convergence checks.
+    """
+
+    def __init__(
+        self,
+        transport: BaseConfigTransport,
+        apply: Callable[[str], Awaitable[None]],
+        load_version: Optional[Callable[[], Awaitable[int]]] = None,
+        origin: Optional[str] = None,
+    ) -> None:
+        self.transport = transport
+        self.apply = apply
+        self.load_version = load_version
+        self.origin = origin or f"{replica_id()}:{uuid.uuid4().hex[:6]}"
+        self.version = 0
+        self.last_change_at: Optional[float] = None
+        self.subscribed = False
+        self._applied: dict[str, int] = {}
+        self._handlers: dict[str, list[Callable[[str], Awaitable[None]]]] = {}
+        self._changed = asyncio.Event()
+        self.counts = {
+            "published": 0, "publish_errors": 0, "received": 0,
+            "applied": 0, "duplicates": 0, "resyncs": 0,
+        }
+
+    def add_handler(self, prefix: str, handler: Callable[[str], Awaitable[None]]) -> None:
+        """
+        Send changes to keys starting with `prefix` to `handler` (with the prefix stripped)
+        instead of the config listeners. Handlers also receive ALL_KEYS on resync.
+        """
+        self._handlers.setdefault(prefix, []).append(handler)
+
+    async def _dispatch(self, key: str) -> None:
+        for prefix, handlers in self._handlers.items():
+            if key == ALL_KEYS:
+                for handler in handlers:
+                    await handler(ALL_KEYS)
+            elif key.startswith(prefix):
+                for handler in handlers:
+                    await handler(key[len(prefix):])
+                return
+        await self.apply(key)
+
+    def observe_version(self, version: int) -> None:
+        """
+        Record a config version seen elsewhere (e.g. in a snapshot load), waking long-polls
+        if it is newer.
+        """
+        if version > self.version:
+            self.version = version
+            changed, self._changed = self._changed, asyncio.Event()
+            changed.set()
+
+    async def wait_for_version(self, after: int, timeout: float) -> int:
+        """
+        Wait up to `timeout` seconds for a version newer than `after`; return the current one.
+        """
+        try:
+            async with asyncio.timeout(timeout):
+                while self.version <= after:
+                    await self._changed.wait()
+        except TimeoutError:
+            pass
+        return self.version
+
+    async def _refresh_version(self) -> None:
+        if self.load_version is None:
+            return
+        try:
+            self.observe_version(await self.load_version())
+        except Exception as e:
+            logging.warning(f"[ConfigBus] Could not read the config version: {e}")
+
+    async def start(self) -> None:
+        """
+        Subscribe to the transport. A failure is logged and leaves this process relying on
+        the snapshot TTL.
+        """
+        await self._refresh_version()
+        try:
+            await self.transport.start(self._receive, self.resync)
+            self.subscribed = True
+            logging.info(f"[ConfigBus] Subscribed via {self.transport.name} at version {self.version}")
+        except Exception as e:
+            logging.error(f"[ConfigBus] Could not subscribe via {self.transport.name}: {e}")
+
+    async def stop(self) -> None:
+        self.subscribed = False
+        await self.transport.close()
+
+    async def _apply(self, change: ConfigChange) -> bool:
+        if change.version and change.version <= self._applied.get(change.key, 0):
+            self.counts["duplicates"] += 1
+            return False
+        self._applied[change.key] = change.version
+        self.last_change_at = time.time()
+        self.counts["applied"] += 1
+        await self._dispatch(change.key)
+        # Only after the caches are invalidated, so woken long-polls read the new config.
+        self.observe_version(change.version)
+        return True
+
+    async def _receive(self, change: ConfigChange) -> None:
+        self.counts["received"] += 1
+        if change.origin == self.origin:
+            # Our own change, already applied when it was published.
+            self.counts["duplicates"] += 1
+            return
+        try:
+            if await self._apply(change):
+                metrics.observe("config_change_lag_seconds", max(0.0, time.time() - change.at))
+        except Exception as e:
+            logging.warning(f"[ConfigBus] Failed to apply change to '{change.key}': {e}")
+
+    async def resync(self) -> None:
+        """
+        Invalidate every key after changes may have been missed.
+        """
+        self.counts["resyncs"] += 1
+        await self._dispatch(ALL_KEYS)
+        await self._refresh_version()
+
+    async def publish(self, key: str, version: Optional[int] = None) -> ConfigChange:
+        """
+        Apply a change to `key` here, then announce it. `version` is the row's
+        bot_config.version; without one the next local version is used. Publish failures
+        are logged; other processes then catch up when their snapshot expires.
+        """
+        return await self._send(
+            ConfigChange(key=key, version=version or self.version + 1, origin=self.origin)
+        )
+
+    async def announce(self, key: str) -> ConfigChange:
+        """
+        Apply and announce an unversioned change, such as "role:<user_id>"; it does not
+        advance the config version.
+        """
+        return await self._send(ConfigChange(key=key, version=0, origin=self.origin))
+
+    async def _send(self, change: ConfigChange) -> ConfigChange:
+        await self._apply(change)
+        try:
+            await self.transport.publish(change)
+            self.counts["published"] += 1
+        except Exception as e:
+            self.counts["publish_errors"] += 1
+            logging.warning(f"[ConfigBus] Could not publish change to '{change.key}': {e}")
+        return change
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "transport": self.transport.name,
+            "origin": self.origin,
+            "subscribed": self.subscribed,
+            "version": self.version,
+            "last_change_age_seconds": (
+                round(time.time() - self.last_change_at, 3) if self.last_change_at else None
+            ),
+            **self.counts,
+        }
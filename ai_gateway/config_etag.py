@@ -0,0 +1,79 @@
+"""
+Conditional and long-poll reads of config endpoints.
+
+Config responses carry a weak ETag built from the config version (see ai_gateway.config_bus),
+a digest of the cached config snapshot and whatever else shapes the response (caller role,
+key). A request whose If-None-Match still matches gets 304 from the in-process snapshot, so
+unchanged polls never reach bot_config.
+
+Clients that want changes promptly add ?wait=<seconds> (capped at CONFIG_LONG_POLL_MAX_SECONDS
+and the request deadline): if the config version is not newer than the one they hold — from
+?version=N or their If-None-Match — the request is held until a change arrives or the wait
+ends, then answered as usual (304 if still unchanged).
+"""
+
+import hashlib
+import json
+import re
+from typing import Optional
+
+from ai_gateway.deadline import timeout_within
+from ai_gateway.settings import settings
+from ai_gateway.supabase_config import config_bus, get_config_snapshot
+from fastapi import Request, Response
+
+_ETAG_VERSION = re.compile(r'^(?:W/)?"(\d+)-')
+
+
+def config_etag(version: int, raw: dict[str, str], *vary: str) -> str:
+    """
+    Weak ETag for a config response at `version` over snapshot rows `raw`.
+    """
+    payload = json.dumps([raw, vary], sort_keys=True)
+    return f'W/"{version}-{hashlib.sha256(payload.encode()).hexdigest()[:16]}"'
+
+
+def etag_version(etag: str) -> Optional[int]:
+    """
+    Config version embedded in one of our ETags, or None.
+    """
+    match = _ETAG_VERSION.match(etag.strip())
+    return int(match.group(1)) if match else None
+
+
+def _known_version(request: Request) -> Optional[int]:
+    version = request.query_params.get("version")
+    if version and version.isdigit():
+        return int(version)
+    versions = [
+        etag_version(tag) for tag in request.headers.get("if-none-match", "").split(",")
+    ]
+    versions = [v for v in versions if v is not None]
+    return max(versions) if versions else None
+
+
+async def config_not_modified(request: Request, response: Response, *vary: str) -> Optional[Response]:
+    """
+    Long-poll if the request asks to, then set the ETag and X-Config-Version headers on
+    `response`. Returns a 304 response if the caller's copy is still current, else None.
+    """
+    wait = request.query_params.get("wait")
+    known = _known_version(request)
+    if wait and known is not None:
+        try:
+            seconds = min(float(wait), settings.CONFIG_LONG_POLL_MAX_SECONDS)
+        except ValueError:
+            seconds = 0.0
+        if seconds > 0:
+            await config_bus.wait_for_version(known, timeout_within(seconds))
+    snapshot = await get_config_snapshot()
+    etag = config_etag(config_bus.version, snapshot.raw, *vary)
+    headers = {
+        "ETag": etag,
+        "X-Config-Version": str(config_bus.version),
+        "Cache-Control": "no-cache",
+    }
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
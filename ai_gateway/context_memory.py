@@ -6,6 +6,7 @@ from typing import Any, Dict
 
 from ai_gateway.bot_context import (get_bot_context, get_user_context,
                                     set_bot_context, set_user_context)
+from ai_gateway.policy import policy
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 router = APIRouter()
@@ -55,8 +56,7 @@ async def api_get_bot_context(key: str, request: Request) -> Dict[str, Any]:
     """
     user_id = request.headers.get("X-User-ID")
     role = request.headers.get("X-User-Role", "guest")
-    if role not in ("admin", "superadmin"):
-        raise HTTPException(status_code=403, detail="Unauthorized")
+    policy.require("get_bot_context", role)
     context = await get_bot_context(key)
     if not context:
         raise HTTPException(status_code=404, detail="Bot context not found")
@@ -72,8 +72,7 @@ async def api_set_bot_context(
     """
     user_id = request.headers.get("X-User-ID")
     role = request.headers.get("X-User-Role", "guest")
-    if role not in ("admin", "superadmin"):
-        raise HTTPException(status_code=403, detail="Unauthorized")
+    policy.require("set_bot_context", role)
     value = payload.get("value")
     if value is None:
         raise HTTPException(status_code=400, detail="Missing value")
@@ -0,0 +1,271 @@
+"""
+Conversation memory for /ask.
+
+Each conversation (per user, or per channel when CONVERSATION_SCOPE=channel) is stored in the
+MCP memory store as one JSON document: a rolling summary plus the turns not yet folded into it.
+load_history() returns the summary and as many of the newest turns as fit in
+CONVERSATION_RECENT_TOKENS, so the history sent with each prompt stays bounded however long
+the conversation runs. record_turn() appends the latest exchange and, once the stored turns
+outgrow that budget, schedules a background task that folds the oldest of them into the summary.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from ai_gateway.bot_context import get_user_context, set_user_context
+from ai_gateway.deadline import DeadlineExceeded, request_deadline
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+from ai_gateway.tokens import current_usage, estimate_tokens
+
+#: Memory store key holding a conversation document.
+MEMORY_KEY = "conversation"
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a user and an assistant.\n"
+    "Keep facts, names, decisions and open questions; drop small talk. "
+    "Answer with the new summary only, in at most {max_tokens} tokens.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}"
+)
+
+
+@dataclass(frozen=True)
+class History:
+    """
+    Conversation context sent with a prompt: a summary of older turns plus recent messages
+    as {"role": "user"|"assistant", "content": ...} dicts, oldest first.
+    """
+
+    summary: str = ""
+    messages: tuple[dict, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.summary or self.messages)
+
+    def system_prompt(self, personality: Optional[str]) -> str:
+        """
+        Personality followed by the conversation summary, for the provider's system prompt.
+        """
+        parts = [personality] if personality else []
+        if self.summary:
+            parts.append(f"Summary of the conversation so far:\n{self.summary}")
+        return "\n\n".join(parts)
+
+
+@dataclass
+class ConversationDoc:
+    summary: str = ""
+    summary_updated_at: Optional[float] = None
+    summarized_turns: int = 0
+    turns: list[dict] = field(default_factory=list)
+
+    @classmethod
+    def from_value(cls, value: Any) -> "ConversationDoc":
+        if isinstance(value, dict) and "value" in value:
+            value = value["value"]
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, dict):
+            return cls()
+        return cls(
+            summary=value.get("summary", ""),
+            summary_updated_at=value.get("summary_updated_at"),
+            summarized_turns=value.get("summarized_turns", 0),
+            turns=list(value.get("turns", [])),
+        )
+
+    def to_value(self) -> str:
+        return json.dumps(
+            {
+                "summary": self.summary,
+                "summary_updated_at": self.summary_updated_at,
+                "summarized_turns": self.summarized_turns,
+                "turns": self.turns,
+            }
+        )
+
+
+def conversation_owner(user_id: str, channel_id: Optional[str]) -> str:
+    """
+    Memory-store owner of the conversation a request belongs to.
+    """
+    if settings.CONVERSATION_SCOPE == "channel" and channel_id:
+        return f"channel:{channel_id}"
+    return user_id
+
+
+def _turn_tokens(turn: dict) -> int:
+    return estimate_tokens(turn.get("user", "")) + estimate_tokens(turn.get("bot", ""))
+
+
+async def _load(owner: str) -> ConversationDoc:
+    try:
+        return ConversationDoc.from_value(await get_user_context(owner, MEMORY_KEY))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        # A missing document is a 404 from the memory store; anything else is logged.
+        if getattr(getattr(e, "response", None), "status_code", None) != 404:
+            logging.warning(f"[Conversation] Could not load conversation for {owner}: {e}")
+        return ConversationDoc()
+
+
+async def _save(owner: str, doc: ConversationDoc) -> None:
+    await set_user_context(owner, MEMORY_KEY, doc.to_value())
+
+
+async def load_history(owner: str) -> History:
+    """
+    Load the conversation summary and the newest turns that fit in CONVERSATION_RECENT_TOKENS.
+    Records history size and summary age.
+    """
+    doc = await _load(owner)
+    budget = settings.CONVERSATION_RECENT_TOKENS
+    used = 0
+    recent: list[dict] = []
+    for turn in reversed(doc.turns):
+        cost = _turn_tokens(turn)
+        if used + cost > budget:
+            break
+        used += cost
+        recent.insert(0, turn)
+    messages = []
+    for turn in recent:
+        messages.append({"role": "user", "content": turn["user"]})
+        messages.append({"role": "assistant", "content": turn["bot"]})
+    metrics.observe("conversation_history_tokens", used + estimate_tokens(doc.summary))
+    metrics.observe("conversation_unsummarized_turns", len(doc.turns) - len(recent))
+    if doc.summary_updated_at:
+        metrics.observe("conversation_summary_age_seconds", time.time() - doc.summary_updated_at)
+    return History(summary=doc.summary, messages=tuple(messages))
+
+
+class ConversationStore:
+    """
+    Appends turns and runs at most one background summarization per conversation.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+        self._summarizing: dict[str, asyncio.Task] = {}
+        self._pending: set[asyncio.Task] = set()
+        self.counts = {"turns": 0, "turn_errors": 0, "summaries": 0, "summary_errors": 0}
+
+    @contextlib.asynccontextmanager
+    async def _lock(self, owner: str) -> AsyncIterator[None]:
+        # A conversation's lock lives only while someone holds or waits for it.
+        lock = self._locks.get(owner)
+        if lock is None:
+            lock = self._locks[owner] = asyncio.Lock()
+        self._lock_users[owner] = self._lock_users.get(owner, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[owner] -= 1
+            if not self._lock_users[owner]:
+                del self._lock_users[owner]
+                del self._locks[owner]
+
+    def remember(self, owner: str, prompt: str, reply: str) -> None:
+        """
+        Record an exchange in the background so the reply is not held up by the memory store.
+        """
+        task = asyncio.create_task(self._record_safely(owner, prompt, reply))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record_safely(self, owner: str, prompt: str, reply: str) -> None:
+        # Runs after the reply is sent, so the request deadline no longer applies.
+        request_deadline.set(None)
+        try:
+            await self.record_turn(owner, prompt, reply)
+        except Exception as e:
+            self.counts["turn_errors"] += 1
+            logging.warning(f"[Conversation] Could not record turn for {owner}: {e}")
+
+    async def record_turn(self, owner: str, prompt: str, reply: str) -> None:
+        """
+        Append an exchange; schedule summarization once the turns outgrow the recent budget.
+        """
+        async with self._lock(owner):
+            doc = await _load(owner)
+            doc.turns.append({"user": prompt, "bot": reply, "ts": time.time()})
+            # Hard cap in case summarization keeps failing.
+            del doc.turns[: -settings.CONVERSATION_MAX_TURNS]
+            await _save(owner, doc)
+        self.counts["turns"] += 1
+        if sum(map(_turn_tokens, doc.turns)) > settings.CONVERSATION_RECENT_TOKENS:
+            self._schedule_summary(owner)
+
+    def _schedule_summary(self, owner: str) -> None:
+        task = self._summarizing.get(owner)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._summarize(owner))
+        self._summarizing[owner] = task
+        task.add_done_callback(lambda _: self._summarizing.pop(owner, None))
+
+    async def _summarize(self, owner: str) -> None:
+        # Summaries are the gateway's own cost, not the requesting user's, and are not
+        # bound by the request's deadline.
+        current_usage.set(None)
+        request_deadline.set(None)
+        try:
+            doc = await _load(owner)
+            keep_tokens = settings.CONVERSATION_RECENT_TOKENS // 2
+            kept = 0
+            split = len(doc.turns)
+            while split > 0 and kept + _turn_tokens(doc.turns[split - 1]) <= keep_tokens:
+                split -= 1
+                kept += _turn_tokens(doc.turns[split])
+            folded = doc.turns[:split]
+            if not folded:
+                return
+            summary = await summarize(doc.summary, folded)
+            async with self._lock(owner):
+                # Turns may have been appended meanwhile; drop only the ones summarized.
+                latest = await _load(owner)
+                folded_ts = {turn.get("ts") for turn in folded}
+                latest.turns = [t for t in latest.turns if t.get("ts") not in folded_ts]
+                latest.summary = summary
+                latest.summary_updated_at = time.time()
+                latest.summarized_turns += len(folded)
+                await _save(owner, latest)
+            self.counts["summaries"] += 1
+            metrics.incr("conversation_summaries", result="ok")
+        except Exception as e:
+            self.counts["summary_errors"] += 1
+            metrics.incr("conversation_summaries", result="error")
+            logging.warning(f"[Conversation] Summarization for {owner} failed: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counts, "summarizing": len(self._summarizing), "locks": len(self._locks)}
+
+
+async def summarize(summary: str, turns: list[dict]) -> str:
+    """
+    Ask the configured provider to fold `turns` into `summary`.
+    """
+    from ai_gateway.providers import call_provider, select_provider
+    from ai_gateway.supabase_config import get_config_snapshot
+
+    rendered = "\n".join(f"User: {t['user']}\nAssistant: {t['bot']}" for t in turns)
+    prompt = SUMMARY_PROMPT.format(
+        max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+        summary=summary or "(none)",
+        turns=rendered,
+    )
+    config = await get_config_snapshot()
+    reply = await call_provider(select_provider(config), prompt, config)
+    return reply.strip()
+
+
+#: Process-wide conversation store.
+conversations = ConversationStore()
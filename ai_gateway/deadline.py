@@ -0,0 +1,145 @@
+"""
+Per-request deadlines and client-disconnect cancellation.
+
+Callers send the time they are willing to wait as X-Request-Timeout-Ms (relative, so client
+and gateway clocks need not agree). with_permission turns it into a context-local monotonic
+deadline that every await on the request path inherits: config and role lookups, memory-store
+calls, retries and provider calls all stop at the deadline instead of their own fixed
+timeouts. The endpoint is also cancelled if the client disconnects first, so no upstream
+tokens or DB connections are spent on replies nobody will read.
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Awaitable, Mapping, Optional, TypeVar
+
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+
+T = TypeVar("T")
+
+#: Request header carrying the caller's remaining budget in milliseconds.
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+#: How often a running endpoint checks whether its client has gone away.
+DISCONNECT_POLL_SECONDS = 0.5
+
+#: Monotonic deadline of the request being served, if any.
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the current request's deadline passes before the work finishes.
+    """
+
+    def __init__(self) -> None:
+        super().__init__("The request deadline was exceeded.")
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised in an endpoint whose client closed the connection.
+    """
+
+
+def timeout_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds the caller allows, from X-Request-Timeout-Ms or REQUEST_TIMEOUT_SECONDS,
+    capped at REQUEST_TIMEOUT_MAX_SECONDS. None means no deadline.
+    """
+    timeout = settings.REQUEST_TIMEOUT_SECONDS or None
+    value = headers.get(DEADLINE_HEADER)
+    if value:
+        try:
+            timeout = max(0.0, float(value) / 1000)
+        except ValueError:
+            logging.warning(f"[Deadline] Ignoring malformed {DEADLINE_HEADER}: {value!r}")
+    if timeout is not None and settings.REQUEST_TIMEOUT_MAX_SECONDS:
+        timeout = min(timeout, settings.REQUEST_TIMEOUT_MAX_SECONDS)
+    return timeout
+
+
+def set_deadline(timeout: Optional[float]) -> Token:
+    """
+    Bind a deadline `timeout` seconds from now to the current context (None clears it).
+    """
+    return request_deadline.set(None if timeout is None else time.monotonic() + timeout)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the current deadline, or None if there is none.
+    """
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_within(seconds: float) -> float:
+    """
+    Monotonic deadline `seconds` from now, or the request deadline if that is sooner.
+    """
+    deadline = time.monotonic() + seconds
+    current = request_deadline.get()
+    return deadline if current is None else min(deadline, current)
+
+
+def timeout_within(seconds: float) -> float:
+    """
+    Timeout for one outbound call: `seconds`, shortened to the time left on the request.
+    Raises DeadlineExceeded if no time is left.
+    """
+    left = remaining()
+    if left is None:
+        return seconds
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(seconds, left)
+
+
+async def with_deadline(awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable`, cancelling it and raising DeadlineExceeded at the request deadline.
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded()
+    try:
+        async with asyncio.timeout(left):
+            return await awaitable
+    except TimeoutError:
+        metrics.incr("request_deadline_exceeded")
+        raise DeadlineExceeded() from None
+
+
+async def cancel_on_disconnect(request, awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable` in the current task, cancelling it and raising ClientDisconnected
+    if the client closes the connection first.
+    """
+    task = asyncio.current_task()
+    disconnected = False
+
+    async def watch() -> None:
+        nonlocal disconnected
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        disconnected = True
+        task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        if disconnected and task.uncancel() == 0:
+            metrics.incr("request_client_disconnected")
+            raise ClientDisconnected() from None
+        raise
+    finally:
+        watcher.cancel()
@@ -1,6 +1,12 @@
 from functools import wraps
-from typing import Any, Callable, Awaitable, Tuple, List
+from typing import Any, Callable, Awaitable, Tuple
+from ai_gateway.deadline import (ClientDisconnected, DeadlineExceeded,
+                                 cancel_on_disconnect, set_deadline,
+                                 timeout_from_headers, with_deadline)
+from ai_gateway.policy import policy
+from ai_gateway.rate_limit import rate_limiter
 from ai_gateway.supabase_roles import get_user_role
+from ai_gateway.token_auth import request_claims
 from fastapi import HTTPException, Request, status
 from common.custom_logging import logger
 
@@ -32,20 +38,24 @@ def with_discord_headers(endpoint: Callable) -> Callable:
     return wrapper
 
 
-async def require_role(request: Request, allowed_roles: List[str]) -> Tuple[bool, str]:
+async def require_role(request: Request, action: str) -> Tuple[bool, str]:
     """
-    Check if the user has one of the allowed roles. Returns (allowed, role).
+    Check if the user's role may perform `action` under the policy. Returns (allowed, role).
     """
     user_id = request.headers.get("x-discord-user-id", "unknown")
-    username = request.headers.get("x-discord-username", "unknown")
     role = await get_user_role(user_id)
-    allowed = role in allowed_roles
-    return allowed, role
+    return policy.allows(action, role), role
 
 
-def with_permission(allowed_roles: List[str]) -> Callable:
+def with_permission(action: str) -> Callable:
     """
-    Decorator to enforce allowed roles for an endpoint. Injects user_id_ctx, username, and role.
+    Decorator to enforce the policy for `action` (see ai_gateway.policy) on an endpoint.
+    Injects user_id_ctx, username, and role.
+    Admitted requests are rate limited per user (and guild); over-limit requests get a 429
+    with a Retry-After header.
+    The X-Request-Timeout-Ms header becomes the request deadline for everything the endpoint
+    awaits (504 once it passes), and the endpoint is cancelled if the client disconnects.
+    Dashboard requests with a valid access token are authorized from its role claim.
     """
     def decorator(endpoint: Callable[..., Awaitable[Any]]) -> Callable:
         @wraps(endpoint)
@@ -57,17 +67,57 @@ def with_permission(allowed_roles: List[str]) -> Callable:
                     detail="Request object missing",
                 )
             user_id, username = extract_discord_headers(request)
-            role = await get_user_role(user_id)
-            if role not in allowed_roles:
+            # Bound for the rest of the request, including any streamed response body.
+            set_deadline(timeout_from_headers(request.headers))
+            claims = request_claims(request)
+            if claims is not None:
+                # Signed, short-lived and not revoked: no role lookup needed.
+                user_id, role = claims["sub"], claims["role"]
+                username = claims.get("username") or username
+            else:
+                try:
+                    role = await with_deadline(get_user_role(user_id))
+                except DeadlineExceeded:
+                    raise _deadline_exceeded()
+            if not policy.allows(action, role):
                 logger.warning(
-                    f"Permission denied for user {user_id} ({username}) with role {role}"
+                    f"Permission denied for user {user_id} ({username}) with role {role} on {action}"
                 )
                 return {
-                    "text": f"Permission denied: requires one of {', '.join(allowed_roles)}."
+                    "text": f"Permission denied: requires one of {', '.join(policy.roles_for(action))}."
                 }
+            limit = await rate_limiter.check(
+                user_id, role, request.headers.get("x-discord-guild-id")
+            )
+            if limit is not None and not limit.allowed:
+                logger.warning(
+                    f"Rate limit ({limit.scope}) exceeded for user {user_id} ({username})"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded. Try again in {limit.retry_after} seconds.",
+                    headers={
+                        "Retry-After": str(limit.retry_after),
+                        "X-RateLimit-Limit": str(limit.limit),
+                        "X-RateLimit-Scope": limit.scope,
+                    },
+                )
             kwargs["user_id_ctx"] = user_id  # acting user for audit log
             kwargs["username"] = username
             kwargs["role"] = role
-            return await endpoint(*args, **kwargs)
+            try:
+                return await cancel_on_disconnect(request, with_deadline(endpoint(*args, **kwargs)))
+            except DeadlineExceeded:
+                logger.warning(f"Request deadline exceeded for user {user_id} ({username})")
+                raise _deadline_exceeded()
+            except ClientDisconnected:
+                logger.info(f"Client disconnected; cancelled request for user {user_id}")
+                raise HTTPException(status_code=499, detail="Client closed request.")
         return wrapper
     return decorator
+
+
+def _deadline_exceeded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request deadline exceeded."
+    )
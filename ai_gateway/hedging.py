@@ -0,0 +1,85 @@
+"""
+Hedged requests for tail-latency reduction.
+
+If the primary call has not finished after a delay (a percentile of the provider's recent
+latency), a backup call is started. The first successful result wins and the other call is
+cancelled. A token-bucket budget caps hedges to a fraction of requests so cost stays bounded.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from ai_gateway.metrics import metrics
+
+T = TypeVar("T")
+
+
+class HedgeBudget:
+    """
+    Token bucket allowing at most `max_rate` hedges per primary request on average,
+    with bursts of up to `burst` hedges.
+    """
+
+    def __init__(self, max_rate: float, burst: float = 10.0) -> None:
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = burst
+        self.counts = {"requests": 0, "hedged": 0, "denied": 0, "primary_won": 0, "backup_won": 0}
+
+    def on_request(self) -> None:
+        self.counts["requests"] += 1
+        self.tokens = min(self.burst, self.tokens + self.max_rate)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.counts["hedged"] += 1
+            return True
+        self.counts["denied"] += 1
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        requests = self.counts["requests"]
+        return {
+            **self.counts,
+            "hedge_rate": round(self.counts["hedged"] / requests, 4) if requests else None,
+        }
+
+
+async def hedged_call(
+    primary: Callable[[], Awaitable[T]],
+    backup: Optional[Callable[[], Awaitable[T]]],
+    delay: float,
+    budget: HedgeBudget,
+) -> T:
+    """
+    Run primary(); if it is still pending after `delay` seconds and the budget allows,
+    also run backup() and return whichever succeeds first. The loser is cancelled.
+    If both fail, the primary's exception is raised.
+    """
+    budget.on_request()
+    primary_task = asyncio.ensure_future(primary())
+    tasks = {primary_task}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or backup is None or not budget.try_spend():
+            return await primary_task
+        metrics.incr("hedge_requests", outcome="sent")
+        logging.info(f"[Hedge] Primary still pending after {delay:.2f}s; sending backup request")
+        backup_task = asyncio.ensure_future(backup())
+        tasks.add(backup_task)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = "primary_won" if task is primary_task else "backup_won"
+                    budget.counts[winner] += 1
+                    metrics.incr("hedge_requests", outcome=winner)
+                    return task.result()
+        return primary_task.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
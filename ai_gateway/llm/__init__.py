@@ -0,0 +1,8 @@
+"""
+LLM provider implementations behind a common async interface.
+"""
+
+from ai_gateway.llm.base import BaseProvider, ProviderError
+from ai_gateway.llm.registry import ProviderRegistry, registry
+
+__all__ = ["BaseProvider", "ProviderError", "ProviderRegistry", "registry"]
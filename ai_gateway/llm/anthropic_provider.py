@@ -0,0 +1,146 @@
+"""
+Anthropic's Messages API over a pooled aiohttp session.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from ai_gateway.conversation import History
+from ai_gateway.llm.base import (BaseProvider, ProviderError, chat_messages,
+                                 iter_sse_data, retry_after_header,
+                                 system_prompt)
+from ai_gateway.provider_clients import provider_clients
+from ai_gateway.supabase_config import ConfigSnapshot
+
+
+class AnthropicProvider(BaseProvider):
+    """
+    Anthropic's Claude models, configured by the ANTHROPIC_* bot_config keys.
+    """
+
+    name = "anthropic"
+    config_keys = (
+        "ANTHROPIC_MODEL", "ANTHROPIC_TEMPERATURE", "ANTHROPIC_MAX_TOKENS", "ANTHROPIC_BASE_URL",
+    )
+    model_field = "anthropic_model"
+
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        return {
+            "model": config.anthropic_model,
+            "temperature": config.anthropic_temperature,
+            "max_tokens": config.anthropic_max_tokens,
+        }
+
+    def _request(
+        self,
+        prompt: str,
+        config: ConfigSnapshot,
+        history: Optional[History] = None,
+        stream: bool = False,
+    ) -> tuple[dict, dict]:
+        """
+        Build headers and body for a Messages API call.
+        The personality (and conversation summary) is sent as the system prompt.
+        """
+        headers = {
+            "x-api-key": config.anthropic_api_key,
+            "content-type": "application/json",
+            "anthropic-version": "2023-06-01",
+        }
+        body = {**self.sampling_params(config), "messages": chat_messages(prompt, history)}
+        system = system_prompt(config, history)
+        if system:
+            body["system"] = system
+        if stream:
+            body["stream"] = True
+        return headers, body
+
+    async def _session(self, config: ConfigSnapshot):
+        if not config.anthropic_api_key:
+            logging.error("[Anthropic] Missing ANTHROPIC_API_KEY")
+            raise ProviderError(self.name, "Anthropic API key is not configured.")
+        return await provider_clients.http_session(
+            self.name, config.anthropic_api_key, config.anthropic_base_url
+        )
+
+    async def complete(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> str:
+        """
+        Ask Claude for a completion, optionally continuing a conversation.
+        Raises ProviderError (with a user-facing message) on misconfiguration or API errors.
+        """
+        session = await self._session(config)
+        headers, body = self._request(prompt, config, history)
+        timeout = provider_clients.http_timeout(self.call_timeout())
+        try:
+            async with session.post(
+                f"{config.anthropic_base_url}/v1/messages",
+                json=body,
+                headers=headers,
+                timeout=timeout,
+            ) as res:
+                res.raise_for_status()
+                data = await res.json()
+                usage = data.get("usage") or {}
+                self.report_usage(usage.get("input_tokens"), usage.get("output_tokens"))
+                return "".join(
+                    block.get("text", "")
+                    for block in data.get("content", [])
+                    if block.get("type") == "text"
+                )
+        except Exception as e:
+            logging.error(f"[Anthropic API Error] {e}")
+            raise ProviderError(
+                self.name,
+                "There was an error while processing your request with Anthropic.",
+                getattr(e, "status", None),
+                retry_after_header(e),
+            ) from e
+
+    async def stream(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion text from the streaming Messages API.
+        Raises ProviderError if the key is missing or the call fails.
+        """
+        session = await self._session(config)
+        headers, body = self._request(prompt, config, history, stream=True)
+        timeout = self.call_timeout()
+        try:
+            # Only the wait for the response is held to the deadline; the reply then streams
+            # for as long as it takes.
+            res = await asyncio.wait_for(
+                session.post(
+                    f"{config.anthropic_base_url}/v1/messages",
+                    json=body,
+                    headers=headers,
+                    timeout=provider_clients.http_stream_timeout(),
+                ),
+                timeout,
+            )
+            async with res:
+                res.raise_for_status()
+                input_tokens = 0
+                async for data in iter_sse_data(res):
+                    event = json.loads(data)
+                    if event.get("type") == "content_block_delta":
+                        text = event.get("delta", {}).get("text")
+                        if text:
+                            yield text
+                    elif event.get("type") == "message_start":
+                        input_tokens = event.get("message", {}).get("usage", {}).get("input_tokens", 0)
+                    elif event.get("type") == "message_delta":
+                        self.report_usage(input_tokens, event.get("usage", {}).get("output_tokens"))
+                    elif event.get("type") == "error":
+                        raise ProviderError(self.name, event.get("error", {}).get("message", "stream error"))
+        except ProviderError:
+            raise
+        except Exception as e:
+            logging.error(f"[Anthropic Stream Error] {e}")
+            raise ProviderError(
+                self.name, f"Anthropic API error: {e}", getattr(e, "status", None), retry_after_header(e)
+            ) from e
@@ -0,0 +1,172 @@
+"""
+Common interface for LLM providers.
+
+Every provider is a BaseProvider subclass with the same async surface:
+complete() for a whole reply, stream() for incremental text, and report_usage() for the
+token usage the upstream API returned. Provider SDKs and HTTP clients are only touched
+inside these methods, so importing a provider module stays cheap.
+"""
+
+import abc
+import dataclasses
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Optional
+
+from ai_gateway.conversation import History
+from ai_gateway.deadline import timeout_within
+from ai_gateway.settings import settings
+from ai_gateway.supabase_config import ConfigSnapshot
+from ai_gateway.tokens import record_usage
+
+
+class ProviderError(Exception):
+    """
+    Raised when an LLM provider call fails or the provider is misconfigured.
+    `retry_after` carries the upstream Retry-After hint in seconds, if any; `local` marks
+    errors raised by the gateway itself rather than the upstream API.
+    """
+
+    local = False
+
+    def __init__(
+        self,
+        provider: str,
+        message: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+
+
+class BaseProvider(abc.ABC):
+    """
+    An LLM provider.
+
+    Attributes:
+        name: Registry name, also used as the label for breakers, limiters and metrics.
+        config_keys: bot_config keys that shape this provider's replies (response cache tags).
+        model_field: ConfigSnapshot field holding the model, used for `provider:model` hedges.
+
+    Methods:
+        complete(prompt, config, history): Whole reply; raises ProviderError on failure.
+        stream(prompt, config, history): Async iterator of reply text; raises ProviderError.
+        sampling_params(config): Model and sampling parameters (part of the cache key).
+        with_model(config, model): Config snapshot that selects another model.
+        config_value(config, key, default, cast): Parsed bot_config/env value for a provider key.
+        call_timeout(): Timeout for one upstream call under the request deadline.
+        report_usage(prompt_tokens, completion_tokens): Record upstream token usage.
+    """
+
+    name: str = ""
+    config_keys: tuple[str, ...] = ()
+    model_field: str = ""
+
+    @abc.abstractmethod
+    async def complete(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> str:
+        pass
+
+    @abc.abstractmethod
+    def stream(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> AsyncIterator[str]:
+        pass
+
+    @abc.abstractmethod
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        pass
+
+    def with_model(self, config: ConfigSnapshot, model: str) -> ConfigSnapshot:
+        """
+        Return a copy of `config` that makes this provider use `model`.
+        """
+        return dataclasses.replace(config, **{self.model_field: model})
+
+    def config_value(self, config: ConfigSnapshot, key: str, default: Any, cast: Callable = str) -> Any:
+        """
+        The bot_config (or environment) value of `key` parsed with `cast`; `default` when
+        unset or malformed.
+        """
+        value = config.get(key)
+        if value is None:
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            logging.warning(f"[{self.name}] Invalid {key}={value!r}; using {default!r}")
+            return default
+
+    def call_timeout(self) -> float:
+        """
+        Timeout for one upstream call: PROVIDER_TIMEOUT_SECONDS, shortened to the time left
+        before the request deadline. Raises DeadlineExceeded if none is left.
+        """
+        return timeout_within(settings.PROVIDER_TIMEOUT_SECONDS)
+
+    def report_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        record_usage(self.name, prompt_tokens, completion_tokens)
+
+
+def mask_api_key(key: Optional[str]) -> str:
+    """
+    Mask an API key for logging purposes.
+    """
+    if not key or len(key) < 8:
+        return "****"
+    return f"{key[:8]}...{'*' * (len(key) - 12)}"
+
+
+def retry_after_header(error: Exception) -> Optional[float]:
+    """
+    Seconds from the Retry-After (or OpenAI's retry-after-ms) header of a failed HTTP call.
+    Accepts the header on the error (aiohttp) or on its response (openai/httpx).
+    """
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def system_prompt(config: ConfigSnapshot, history: Optional[History]) -> str:
+    """
+    Personality plus, for conversations, the summary of earlier turns.
+    """
+    if history:
+        return history.system_prompt(config.ai_personality)
+    return config.ai_personality or ""
+
+
+def chat_messages(prompt: str, history: Optional[History]) -> list[dict]:
+    """
+    Recent conversation turns followed by the new user prompt.
+    """
+    messages = list(history.messages) if history else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+async def iter_sse_data(res) -> AsyncIterator[str]:
+    """
+    Yield the payload of each `data:` line from a Server-Sent Events HTTP response.
+    """
+    async for raw_line in res.content:
+        line = raw_line.decode("utf-8").strip()
+        if line.startswith("data:"):
+            yield line[5:].strip()
@@ -0,0 +1,130 @@
+"""
+Mistral's chat completions endpoint over a pooled aiohttp session.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from ai_gateway.conversation import History
+from ai_gateway.llm.base import (BaseProvider, ProviderError, chat_messages,
+                                 iter_sse_data, retry_after_header,
+                                 system_prompt)
+from ai_gateway.provider_clients import provider_clients
+from ai_gateway.supabase_config import ConfigSnapshot
+
+
+class MistralProvider(BaseProvider):
+    """
+    Mistral's chat models, configured by the MISTRAL_* bot_config keys.
+    The personality is prepended to the prompt rather than sent as a system message.
+    """
+
+    name = "mistral"
+    config_keys = (
+        "MISTRAL_MODEL", "MISTRAL_TEMPERATURE", "MISTRAL_MAX_TOKENS", "MISTRAL_BASE_URL",
+    )
+    model_field = "mistral_model"
+
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        return {
+            "model": config.mistral_model,
+            "temperature": config.mistral_temperature,
+            "max_tokens": config.mistral_max_tokens,
+        }
+
+    def _request(
+        self,
+        prompt: str,
+        config: ConfigSnapshot,
+        history: Optional[History] = None,
+        stream: bool = False,
+    ) -> tuple[dict, dict]:
+        system = system_prompt(config, history)
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        headers = {"Authorization": f"Bearer {config.mistral_api_key}", "Content-Type": "application/json"}
+        body = {**self.sampling_params(config), "messages": chat_messages(full_prompt, history)}
+        if stream:
+            body["stream"] = True
+        return headers, body
+
+    async def _session(self, config: ConfigSnapshot):
+        if not config.mistral_api_key:
+            logging.error("[Mistral] Missing MISTRAL_API_KEY")
+            raise ProviderError(self.name, "Mistral API key is not configured.")
+        return await provider_clients.http_session(
+            self.name, config.mistral_api_key, config.mistral_base_url
+        )
+
+    async def complete(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> str:
+        """
+        Ask Mistral for a completion, optionally continuing a conversation.
+        Raises ProviderError (with a user-facing message) on misconfiguration or API errors.
+        """
+        session = await self._session(config)
+        headers, body = self._request(prompt, config, history)
+        timeout = provider_clients.http_timeout(self.call_timeout())
+        try:
+            async with session.post(
+                f"{config.mistral_base_url}/v1/chat/completions",
+                json=body,
+                headers=headers,
+                timeout=timeout,
+            ) as res:
+                res.raise_for_status()
+                data = await res.json()
+                usage = data.get("usage") or {}
+                self.report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+                return data["choices"][0]["message"]["content"]
+        except Exception as e:
+            logging.error(f"[Mistral API Error] {e}")
+            raise ProviderError(
+                self.name,
+                "There was an error while processing your request with Mistral.",
+                getattr(e, "status", None),
+                retry_after_header(e),
+            ) from e
+
+    async def stream(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion text from the chat completions endpoint.
+        Raises ProviderError if the key is missing or the call fails.
+        """
+        session = await self._session(config)
+        headers, body = self._request(prompt, config, history, stream=True)
+        timeout = self.call_timeout()
+        try:
+            # Only the wait for the response is held to the deadline; the reply then streams
+            # for as long as it takes.
+            res = await asyncio.wait_for(
+                session.post(
+                    f"{config.mistral_base_url}/v1/chat/completions",
+                    json=body,
+                    headers=headers,
+                    timeout=provider_clients.http_stream_timeout(),
+                ),
+                timeout,
+            )
+            async with res:
+                res.raise_for_status()
+                async for data in iter_sse_data(res):
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    choices = event.get("choices") or []
+                    text = choices[0].get("delta", {}).get("content") if choices else None
+                    if text:
+                        yield text
+                    if event.get("usage"):
+                        usage = event["usage"]
+                        self.report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        except Exception as e:
+            logging.error(f"[Mistral Stream Error] {e}")
+            raise ProviderError(
+                self.name, f"Mistral API error: {e}", getattr(e, "status", None), retry_after_header(e)
+            ) from e
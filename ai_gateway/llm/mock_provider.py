@@ -0,0 +1,158 @@
+"""
+Offline provider for load tests and CI.
+
+Selecting AI_PROVIDER=mock sends /ask, /ask/stream and /ask/batch through the real gateway
+path (response cache, singleflight, limiters, breakers, budgets) without any network call.
+The simulated upstream is tuned with MOCK_* bot_config keys, which fall back to the
+environment like every other config key, so a running benchmark can be reshaped with
+/config/set:
+
+    MOCK_LATENCY_MS            Mean time to first token (default 200).
+    MOCK_LATENCY_DISTRIBUTION  fixed, uniform, normal, lognormal or exponential (default lognormal).
+    MOCK_LATENCY_SPREAD        Relative spread: uniform half-width, normal stddev or
+                               lognormal sigma, as a fraction of the mean (default 0.5).
+    MOCK_TOKENS_PER_SECOND     Generation rate once the first token arrives (default 50; 0 = instant).
+    MOCK_RESPONSE_TOKENS       Reply length as "N" or "MIN-MAX" tokens (default 50-150).
+    MOCK_ERROR_RATE_429        Probability of a rate-limit error (default 0).
+    MOCK_ERROR_RATE_5XX        Probability of a 500/502/503 error after the first-token delay (default 0).
+    MOCK_MODEL                 Reported model name (default mock).
+    MOCK_TEMPERATURE           Reported temperature; replies are cacheable at 0 (default 0).
+    MOCK_SEED                  Seed for reproducible runs (default unseeded).
+"""
+
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+
+from ai_gateway.conversation import History
+from ai_gateway.llm.base import BaseProvider, ProviderError, system_prompt
+from ai_gateway.supabase_config import ConfigSnapshot
+from ai_gateway.tokens import estimate_tokens
+
+#: Statuses used for injected server errors.
+SERVER_ERROR_STATUSES = (500, 502, 503)
+
+_WORDS = (
+    "the gateway answered this prompt with simulated text so that caching limiting "
+    "streaming and budgets can be measured without calling a real model"
+).split()
+
+
+def parse_token_range(spec: str) -> tuple[int, int]:
+    """
+    Parse "N" or "MIN-MAX" into an inclusive (min, max) token range.
+    """
+    low, _, high = spec.partition("-")
+    low_tokens = int(low)
+    high_tokens = int(high) if high else low_tokens
+    if low_tokens < 1 or high_tokens < low_tokens:
+        raise ValueError(f"Invalid token range: {spec!r}")
+    return low_tokens, high_tokens
+
+
+class MockProvider(BaseProvider):
+    """
+    Simulated upstream with configurable latency, streaming rate, reply size and errors.
+    """
+
+    name = "mock"
+    config_keys = (
+        "MOCK_MODEL", "MOCK_LATENCY_MS", "MOCK_LATENCY_DISTRIBUTION", "MOCK_LATENCY_SPREAD",
+        "MOCK_TOKENS_PER_SECOND", "MOCK_RESPONSE_TOKENS", "MOCK_TEMPERATURE",
+    )
+
+    def __init__(self) -> None:
+        self._seed: Optional[str] = None
+        self.random = random.Random()
+
+    def _rng(self, config: ConfigSnapshot) -> random.Random:
+        seed = config.get("MOCK_SEED")
+        if seed != self._seed:
+            self._seed = seed
+            self.random = random.Random(seed)
+        return self.random
+
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        return {
+            "model": self.config_value(config, "MOCK_MODEL", "mock"),
+            "temperature": self.config_value(config, "MOCK_TEMPERATURE", 0.0, float),
+            "max_tokens": self.config_value(config, "MOCK_RESPONSE_TOKENS", "50-150"),
+        }
+
+    def with_model(self, config: ConfigSnapshot, model: str) -> ConfigSnapshot:
+        return config
+
+    def first_token_delay(self, config: ConfigSnapshot) -> float:
+        """
+        Sample the seconds before the first token from the configured distribution.
+        """
+        rng = self._rng(config)
+        mean = self.config_value(config, "MOCK_LATENCY_MS", 200.0, float) / 1000
+        spread = self.config_value(config, "MOCK_LATENCY_SPREAD", 0.5, float)
+        distribution = self.config_value(config, "MOCK_LATENCY_DISTRIBUTION", "lognormal")
+        if distribution == "uniform":
+            delay = rng.uniform(mean * (1 - spread), mean * (1 + spread))
+        elif distribution == "normal":
+            delay = rng.gauss(mean, mean * spread)
+        elif distribution == "exponential":
+            delay = rng.expovariate(1 / mean) if mean > 0 else 0.0
+        elif distribution == "fixed":
+            delay = mean
+        else:
+            # Median equals the configured mean; sigma controls the tail.
+            delay = rng.lognormvariate(0, spread) * mean
+        return max(0.0, delay)
+
+    def _maybe_fail(self, config: ConfigSnapshot, after_delay: bool) -> None:
+        rng = self._rng(config)
+        if not after_delay:
+            if rng.random() < self.config_value(config, "MOCK_ERROR_RATE_429", 0.0, float):
+                raise ProviderError(self.name, "Mock provider rate limited the request.", 429)
+        elif rng.random() < self.config_value(config, "MOCK_ERROR_RATE_5XX", 0.0, float):
+            status = rng.choice(SERVER_ERROR_STATUSES)
+            raise ProviderError(self.name, f"Mock provider returned HTTP {status}.", status)
+
+    def _reply_tokens(self, prompt: str, config: ConfigSnapshot) -> list[str]:
+        spec = self.config_value(config, "MOCK_RESPONSE_TOKENS", "50-150")
+        try:
+            low, high = parse_token_range(spec)
+        except ValueError:
+            low, high = 50, 150
+        count = self._rng(config).randint(low, high)
+        # Derived from the prompt so repeated prompts get the same text.
+        offset = sum(map(ord, prompt)) % len(_WORDS)
+        return [_WORDS[(offset + i) % len(_WORDS)] + " " for i in range(count)]
+
+    async def _generate(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History]
+    ) -> AsyncIterator[str]:
+        self._maybe_fail(config, after_delay=False)
+        await asyncio.sleep(self.first_token_delay(config))
+        self._maybe_fail(config, after_delay=True)
+        tokens = self._reply_tokens(prompt, config)
+        rate = self.config_value(config, "MOCK_TOKENS_PER_SECOND", 50.0, float)
+        for i, token in enumerate(tokens):
+            if i and rate > 0:
+                await asyncio.sleep(1 / rate)
+            yield token
+        context = system_prompt(config, history) + "".join(
+            m["content"] for m in (history.messages if history else ())
+        )
+        self.report_usage(estimate_tokens(context + prompt), len(tokens))
+
+    async def complete(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> str:
+        """
+        Wait out the simulated generation and return the whole reply.
+        """
+        return "".join([token async for token in self._generate(prompt, config, history)]).strip()
+
+    async def stream(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the simulated reply one token at a time at MOCK_TOKENS_PER_SECOND.
+        """
+        async for token in self._generate(prompt, config, history):
+            yield token
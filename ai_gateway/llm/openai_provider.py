@@ -0,0 +1,202 @@
+"""
+OpenAI chat completions, plus any server that speaks the same API (vLLM, Ollama,
+LM Studio, llama.cpp, ...). The `openai` SDK is imported by the client pool on first use.
+"""
+
+import dataclasses
+import logging
+import os
+import traceback
+from typing import AsyncIterator, Optional
+
+from ai_gateway.conversation import History
+from ai_gateway.llm.base import (BaseProvider, ProviderError, chat_messages,
+                                 mask_api_key, retry_after_header,
+                                 system_prompt)
+from ai_gateway.provider_clients import provider_clients
+from ai_gateway.supabase_config import ConfigSnapshot
+
+
+class OpenAIProvider(BaseProvider):
+    """
+    OpenAI's chat models, configured by the OPENAI_* bot_config keys.
+    """
+
+    name = "openai"
+    label = "OpenAI"
+    config_keys = (
+        "OPENAI_MODEL", "OPENAI_TEMPERATURE", "OPENAI_MAX_TOKENS", "OPENAI_TOP_P",
+        "OPENAI_PRESENCE_PENALTY", "OPENAI_FREQUENCY_PENALTY", "OPENAI_BASE_URL",
+    )
+    model_field = "openai_model"
+
+    def api_key(self, config: ConfigSnapshot) -> Optional[str]:
+        return config.openai_api_key
+
+    def base_url(self, config: ConfigSnapshot) -> Optional[str]:
+        return config.openai_base_url
+
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        return {
+            "model": config.openai_model,
+            "temperature": config.openai_temperature,
+            "max_tokens": config.openai_max_tokens,
+            "top_p": config.openai_top_p,
+            "presence_penalty": config.openai_presence_penalty,
+            "frequency_penalty": config.openai_frequency_penalty,
+        }
+
+    def _messages(self, prompt: str, config: ConfigSnapshot, history: Optional[History]) -> list[dict]:
+        messages = []
+        system = system_prompt(config, history)
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.extend(chat_messages(prompt, history))
+        return messages
+
+    async def _client(self, config: ConfigSnapshot):
+        api_key = self.api_key(config)
+        if not api_key:
+            logging.error(f"[{self.label}] Missing API key")
+            raise ProviderError(self.name, f"{self.label} API key is not configured.")
+        return await provider_clients.openai_client(api_key, self.base_url(config), self.name)
+
+    async def complete(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> str:
+        """
+        Ask the chat model for a completion, optionally continuing a conversation.
+        Raises ProviderError (with a user-facing message) on misconfiguration, API errors or empty replies.
+        """
+        params = self.sampling_params(config)
+        api_key = self.api_key(config)
+        if self.name == "openai":
+            env_key = os.getenv("OPENAI_API_KEY")
+            logging.error(f"[DEBUG] os.getenv('OPENAI_API_KEY') = {mask_api_key(env_key)}; config snapshot OPENAI_API_KEY = {mask_api_key(api_key)}")
+        client = await self._client(config)
+        timeout = self.call_timeout()
+
+        try:
+            logging.info(
+                f"[{self.label}] Sending prompt: {prompt!r} | Model: {params['model']} | Key: {mask_api_key(api_key)}"
+            )
+            response = await client.chat.completions.create(
+                messages=self._messages(prompt, config, history), timeout=timeout, **params
+            )
+        except Exception as e:
+            # Try to extract response body from OpenAI error if available
+            error_message = str(e)
+            error_body = None
+            if hasattr(e, 'response') and hasattr(e.response, 'text'):
+                try:
+                    error_body = await e.response.text()
+                except Exception:
+                    error_body = None
+            logging.error(
+                f"[{self.label} API Error] {error_message}\nPrompt: {prompt!r}\nModel: {params['model']}\nKey: {mask_api_key(api_key)}\nTraceback: {traceback.format_exc()}\nOpenAI Response: {error_body}"
+            )
+            # Return detailed error to user for debugging
+            raise ProviderError(
+                self.name,
+                f"{self.label} API error: {error_message}\n{error_body if error_body else ''}",
+                getattr(e, "status_code", None),
+                retry_after_header(e),
+            ) from e
+        if response.usage:
+            self.report_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        result = response.choices[0].message.content
+        if not result or not str(result).strip():
+            logging.warning(
+                f"[{self.label}] Empty response for prompt: {prompt!r} | Raw: {response}"
+            )
+            raise ProviderError(self.name, "Sorry, I couldn't generate a response.")
+        return result
+
+    async def stream(
+        self, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion text as it is generated.
+        Raises ProviderError if the key is missing or the call fails.
+        """
+        client = await self._client(config)
+        timeout = self.call_timeout()
+        try:
+            stream = await client.chat.completions.create(
+                messages=self._messages(prompt, config, history),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+                **self.sampling_params(config),
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None):
+                    self.report_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+        except Exception as e:
+            logging.error(f"[{self.label} Stream Error] {e}")
+            raise ProviderError(
+                self.name, f"{self.label} API error: {e}", getattr(e, "status_code", None), retry_after_header(e)
+            ) from e
+
+
+class OpenAICompatibleProvider(OpenAIProvider):
+    """
+    A server exposing the OpenAI chat completions API, declared in CUSTOM_PROVIDERS.
+
+    Model and sampling parameters default to the constructor arguments and can be changed
+    at runtime through bot_config keys prefixed with the upper-cased provider name
+    (e.g. LOCAL_MODEL, LOCAL_TEMPERATURE for a provider named "local"). The API key is read
+    from `api_key` or the environment variable named by `api_key_env`; local servers that
+    ignore it get a placeholder, since the SDK requires one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        api_key_env: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        top_p: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.label = name
+        self.prefix = name.upper().replace("-", "_")
+        self.defaults = {
+            "BASE_URL": base_url,
+            "MODEL": model,
+            "TEMPERATURE": temperature,
+            "MAX_TOKENS": max_tokens,
+            "TOP_P": top_p,
+        }
+        self._api_key = api_key
+        self.api_key_env = api_key_env
+        self.config_keys = tuple(f"{self.prefix}_{key}" for key in self.defaults)
+
+    def _setting(self, config: ConfigSnapshot, key: str, cast=str):
+        return self.config_value(config, f"{self.prefix}_{key}", self.defaults[key], cast)
+
+    def api_key(self, config: ConfigSnapshot) -> Optional[str]:
+        if self._api_key:
+            return self._api_key
+        if self.api_key_env:
+            return os.getenv(self.api_key_env)
+        return "not-needed"
+
+    def base_url(self, config: ConfigSnapshot) -> Optional[str]:
+        return self._setting(config, "BASE_URL")
+
+    def sampling_params(self, config: ConfigSnapshot) -> dict:
+        return {
+            "model": self._setting(config, "MODEL"),
+            "temperature": self._setting(config, "TEMPERATURE", float),
+            "max_tokens": self._setting(config, "MAX_TOKENS", int),
+            "top_p": self._setting(config, "TOP_P", float),
+        }
+
+    def with_model(self, config: ConfigSnapshot, model: str) -> ConfigSnapshot:
+        return dataclasses.replace(config, raw={**config.raw, f"{self.prefix}_MODEL": model})
@@ -0,0 +1,144 @@
+"""
+Registry of LLM providers by name.
+
+Providers are registered as a "module:Class" path (or a factory) and only imported and
+instantiated on first lookup, so a deployment that never selects a provider never pays for
+its SDK. Besides the built-in providers, CUSTOM_PROVIDERS declares extra ones as JSON, e.g.
+
+    {"local": {"type": "openai_compatible", "base_url": "http://ollama:11434/v1", "model": "llama3"}}
+
+"type" is "openai_compatible" or a "module:Class" path to a BaseProvider subclass; the
+remaining keys are passed to its constructor (name is passed too).
+
+Exports:
+    registry: ProviderRegistry — the process-wide registry instance.
+"""
+
+import importlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Optional, Union
+
+from ai_gateway.llm.base import BaseProvider
+from ai_gateway.settings import settings
+
+#: Providers shipped with the gateway.
+BUILTIN_PROVIDERS = {
+    "openai": "ai_gateway.llm.openai_provider:OpenAIProvider",
+    "anthropic": "ai_gateway.llm.anthropic_provider:AnthropicProvider",
+    "mistral": "ai_gateway.llm.mistral_provider:MistralProvider",
+    "mock": "ai_gateway.llm.mock_provider:MockProvider",
+}
+
+#: Short names accepted as "type" in CUSTOM_PROVIDERS.
+PROVIDER_TYPES = {
+    "openai_compatible": "ai_gateway.llm.openai_provider:OpenAICompatibleProvider",
+}
+
+
+def import_path(path: str) -> Any:
+    """
+    Import and return the object named by a "package.module:attribute" path.
+    """
+    module_name, _, attribute = path.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected 'module:attribute', got {path!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ProviderRegistry:
+    """
+    Maps provider names to lazily constructed BaseProvider instances.
+
+    Methods:
+        register(name, factory, options): Register a "module:Class" path or callable.
+        get(name): The provider instance, imported and built on first use (KeyError if unknown).
+        names(): Every registered provider name.
+        config_keys(): bot_config keys declared by the registered providers.
+        stats(): Registered and loaded providers.
+    """
+
+    def __init__(self) -> None:
+        self._factories: dict[str, tuple[Union[str, Callable[..., BaseProvider]], dict]] = {}
+        self.providers: dict[str, BaseProvider] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        factory: Union[str, Callable[..., BaseProvider]],
+        options: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """
+        Register (or replace) a provider. `factory` is called with `options` on first use.
+        """
+        with self._lock:
+            self._factories[name] = (factory, options or {})
+            self.providers.pop(name, None)
+
+    def get(self, name: str) -> BaseProvider:
+        provider = self.providers.get(name)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self.providers.get(name)
+            if provider is None:
+                factory, kwargs = self._factories[name]
+                if isinstance(factory, str):
+                    factory = import_path(factory)
+                provider = factory(**kwargs)
+                provider.name = name
+                self.providers[name] = provider
+                logging.info(f"[Providers] Loaded provider '{name}'")
+        return provider
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def names(self) -> list[str]:
+        return list(self._factories)
+
+    def load_custom(self, spec: str) -> None:
+        """
+        Register the providers declared in a CUSTOM_PROVIDERS JSON document.
+        Invalid entries are logged and skipped.
+        """
+        if not spec.strip():
+            return
+        try:
+            declared = json.loads(spec)
+        except json.JSONDecodeError as e:
+            logging.error(f"[Providers] CUSTOM_PROVIDERS is not valid JSON: {e}")
+            return
+        for name, options in declared.items():
+            options = dict(options)
+            provider_type = options.pop("type", "openai_compatible")
+            path = PROVIDER_TYPES.get(provider_type, provider_type)
+            if ":" not in path:
+                logging.error(f"[Providers] Unknown type {provider_type!r} for provider '{name}'")
+                continue
+            self.register(name, path, {**options, "name": name})
+
+    def config_keys(self) -> set[str]:
+        """
+        bot_config keys declared by every registered provider; one that cannot be loaded is
+        logged and skipped.
+        """
+        keys: set[str] = set()
+        for name in self.names():
+            try:
+                keys.update(self.get(name).config_keys)
+            except Exception as e:
+                logging.warning(f"[Providers] Could not load provider '{name}': {e}")
+        return keys
+
+    def stats(self) -> dict[str, Any]:
+        return {"registered": self.names(), "loaded": sorted(self.providers)}
+
+
+#: Process-wide provider registry.
+registry = ProviderRegistry()
+for _name, _path in BUILTIN_PROVIDERS.items():
+    registry.register(_name, _path)
+registry.load_custom(settings.CUSTOM_PROVIDERS)
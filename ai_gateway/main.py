@@ -4,9 +4,11 @@ Main FastAPI application for AI Gateway.
 - Sets up global error middleware
 - Provides healthcheck endpoint
 - Adds audit logging for all config/admin endpoints
+- Owns long-lived resources (pooled provider clients, config change feed, audit writer and spool) through the app lifespan
 """
 
 import os
+from contextlib import asynccontextmanager
 # --- Ensure .env is loaded early ---
 try:
     from dotenv import load_dotenv
@@ -14,10 +16,15 @@ try:
 except ImportError:
     pass
 
-from ai_gateway.audit_helpers import log_audit_event
+from ai_gateway.audit_helpers import audit_writer, log_audit_event
 from ai_gateway.context_memory import router as context_memory_router
 from ai_gateway.error_middleware import GlobalErrorMiddleware
-from ai_gateway.routers import ask, config, help, roles
+from ai_gateway.policy import policy
+from ai_gateway.provider_clients import provider_clients
+from ai_gateway.routers import admin, ask, config, help, roles
+from ai_gateway.settings import settings
+from ai_gateway.spool import spool
+from ai_gateway.supabase_config import config_bus
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -25,8 +32,28 @@ from pydantic import BaseModel
 from config_engine.access import get_user_role
 from mcp_server.router import router as mcp_router
 
+
+# --- Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Run startup checks, expose shared resources on app.state, and close them on shutdown.
+    """
+    app.state.provider_clients = provider_clients
+    await config_bus.start()
+    await policy.reload()
+    await spool.start()
+    audit_writer.start()
+    await startup_tasks()
+    yield
+    await audit_writer.stop(settings.AUDIT_DRAIN_TIMEOUT_SECONDS)
+    await spool.stop()
+    await config_bus.stop()
+    await provider_clients.aclose()
+
+
 # --- App creation ---
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(GlobalErrorMiddleware)
 
 # --- CORS Middleware ---
@@ -51,6 +78,7 @@ app.include_router(help.router)
 app.include_router(config.router)
 app.include_router(roles.router)
 app.include_router(ask.router)
+app.include_router(admin.router)
 app.include_router(context_memory_router)
 
 # 4. Auth router (Discord OAuth2)
@@ -157,11 +185,10 @@ async def debug_root():
     return {"status": "ok", "message": "debug-root reached"}
 
 
-@app.on_event("startup")
 async def startup_tasks():
     print("=== Registered Routes ===")
     for route in app.routes:
-        print(f"{route.path} -> {getattr(route, 'endpoint', None)}")
+        print(f"{getattr(route, 'path', route)} -> {getattr(route, 'endpoint', None)}")
     # --- Log presence of critical config keys ---
     from ai_gateway.supabase_config import get_config
     from common.utils import mask_value
@@ -0,0 +1,109 @@
+"""
+In-process metrics registry for the gateway.
+
+Counters and latency summaries are kept in memory per process and exposed to admins
+through /admin/metrics. Labels are passed as keyword arguments, e.g.
+metrics.observe("llm_ttft_seconds", 0.42, provider="openai").
+
+Exports:
+    metrics: MetricsRegistry — the process-wide registry instance.
+"""
+
+import math
+from collections import deque
+from typing import Any, Optional
+
+#: Number of recent observations kept per summary for percentile estimates.
+SUMMARY_WINDOW = 1024
+
+
+def _series_name(name: str, labels: dict[str, Any]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+class _Summary:
+    """
+    Running count/sum/max plus a bounded window of recent values for percentiles.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=SUMMARY_WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 4) if self.count else None,
+            "max": round(self.max, 4),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Registry of labelled counters and summaries.
+
+    Methods:
+        incr(name, value, **labels): Increment a counter.
+        observe(name, value, **labels): Record an observation (e.g. a latency in seconds).
+        percentile(name, pct, **labels): Percentile of recent observations, or None.
+        sample_count(name, **labels): Number of recent observations kept for a series.
+        snapshot(): All counters and summaries as a JSON-serializable dict.
+    """
+
+    def __init__(self) -> None:
+        self._counters: dict[str, float] = {}
+        self._summaries: dict[str, _Summary] = {}
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        series = _series_name(name, labels)
+        self._counters[series] = self._counters.get(series, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        series = _series_name(name, labels)
+        summary = self._summaries.get(series)
+        if summary is None:
+            summary = self._summaries[series] = _Summary()
+        summary.observe(value)
+
+    def percentile(self, name: str, pct: float, **labels: Any) -> Optional[float]:
+        summary = self._summaries.get(_series_name(name, labels))
+        return summary.percentile(pct) if summary else None
+
+    def sample_count(self, name: str, **labels: Any) -> int:
+        summary = self._summaries.get(_series_name(name, labels))
+        return len(summary.recent) if summary else 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "counters": dict(sorted(self._counters.items())),
+            "summaries": {k: v.to_dict() for k, v in sorted(self._summaries.items())},
+        }
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._summaries.clear()
+
+
+#: Process-wide metrics registry.
+metrics = MetricsRegistry()
@@ -0,0 +1,154 @@
+"""
+Central authorization policy.
+
+Every protected command is an action (the names match /mcp/actions and the Discord
+commands) allowed to a set of roles. Where the gateway or the MCP server enforces a command
+differently from what /mcp/actions advertises, that endpoint has its own gateway_ or mcp_
+action. DEFAULT_RULES is the policy in code; rows of the
+optional `policy_rules` table (action, roles) override single actions without a redeploy.
+Both are compiled into a matrix of one role bitmask per action, so a check is a dict lookup
+and a bit test. Unknown actions and roles are denied.
+
+The table is re-read at startup and whenever a "policy:<action>" change arrives on the config
+bus (migrations/003_policy_rules.sql announces edits made anywhere); a failed read keeps the
+current matrix. Every decision is counted per action and outcome.
+"""
+
+import asyncio
+import logging
+from typing import Any, Iterable, Mapping, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.supabase_client import supabase
+from ai_gateway.supabase_config import config_bus
+from fastapi import HTTPException
+
+ROLES = ("guest", "user", "admin", "superadmin")
+ROLE_BITS = {role: 1 << i for i, role in enumerate(ROLES)}
+POLICY_CHANGE_PREFIX = "policy:"
+POLICY_TABLE = "policy_rules"
+
+_MEMBERS = ("user", "admin", "superadmin")
+_STAFF = ("admin", "superadmin")
+_SUPERADMIN = ("superadmin",)
+
+#: Roles allowed to perform each action unless `policy_rules` overrides it.
+DEFAULT_RULES: dict[str, tuple[str, ...]] = {
+    "ask": _MEMBERS,
+    "help": ROLES,
+    "get_all_roles": _STAFF,
+    "get_user_role": _STAFF,
+    "set_user_role": _SUPERADMIN,
+    "gateway_set_user_role": _STAFF,
+    "get_config": _STAFF,
+    "get_config_key": _STAFF,
+    "get_sensitive_config": _SUPERADMIN,
+    "set_config": _STAFF,
+    "mcp_set_config": _SUPERADMIN,
+    "delete_config": _SUPERADMIN,
+    "gateway_delete_config": _STAFF,
+    "list_config_keys": _STAFF,
+    "config_help": _STAFF,
+    "config_status": _STAFF,
+    "get_audit_log": _SUPERADMIN,
+    "get_bot_context": _STAFF,
+    "set_bot_context": _STAFF,
+    "dashboard": _STAFF,
+    "view_metrics": _STAFF,
+}
+
+
+def compile_rules(rules: Mapping[str, Iterable[str]]) -> dict[str, int]:
+    """
+    Role bitmask per action; roles outside ROLES are dropped.
+    """
+    matrix = {}
+    for action, roles in rules.items():
+        mask = 0
+        for role in roles:
+            bit = ROLE_BITS.get(role)
+            if bit is None:
+                logging.warning(f"[Policy] Ignoring unknown role '{role}' for action '{action}'")
+                continue
+            mask |= bit
+        matrix[action] = mask
+    return matrix
+
+
+class PolicyEngine:
+    """
+    Compiled action→roles matrix with per-decision counters.
+
+    Methods:
+        allows(action, role): Whether `role` may perform `action`; counted.
+        require(action, role): Raise 403 unless allowed.
+        roles_for(action): The roles currently allowed to perform `action`.
+        load(overrides): Recompile from the defaults plus `overrides`.
+        reload(): Re-read overrides from the policy table.
+        stats(): Matrix, overrides and decision counts.
+    """
+
+    def __init__(self, defaults: Mapping[str, Iterable[str]]) -> None:
+        self.defaults = {action: tuple(roles) for action, roles in defaults.items()}
+        self.overrides: dict[str, tuple[str, ...]] = {}
+        self.matrix = compile_rules(self.defaults)
+        self.decisions: dict[str, dict[str, int]] = {}
+        self.counts = {"reloads": 0, "reload_errors": 0}
+
+    def allows(self, action: str, role: Optional[str]) -> bool:
+        allowed = bool(self.matrix.get(action, 0) & ROLE_BITS.get(role or "guest", 0))
+        outcome = "allow" if allowed else "deny"
+        counts = self.decisions.setdefault(action, {"allow": 0, "deny": 0})
+        counts[outcome] += 1
+        metrics.incr("policy_decision", action=action, result=outcome)
+        return allowed
+
+    def require(self, action: str, role: Optional[str]) -> None:
+        if not self.allows(action, role):
+            raise HTTPException(
+                status_code=403,
+                detail=f"Unauthorized: requires one of {', '.join(self.roles_for(action)) or 'no role'}",
+            )
+
+    def roles_for(self, action: str) -> list[str]:
+        mask = self.matrix.get(action, 0)
+        return [role for role in ROLES if mask & ROLE_BITS[role]]
+
+    def load(self, overrides: Mapping[str, Iterable[str]]) -> None:
+        overrides = {action: tuple(roles) for action, roles in overrides.items()}
+        # Built aside and swapped in whole, so checks never see a half-built matrix.
+        self.matrix = compile_rules({**self.defaults, **overrides})
+        self.overrides = overrides
+
+    async def reload(self) -> None:
+        try:
+            result = await asyncio.to_thread(
+                lambda: supabase.table(POLICY_TABLE).select("action, roles").execute()
+            )
+        except Exception as e:
+            self.counts["reload_errors"] += 1
+            logging.warning(f"[Policy] Could not load {POLICY_TABLE}; keeping current rules: {e}")
+            return
+        self.load({row["action"]: row.get("roles") or () for row in result.data or []})
+        self.counts["reloads"] += 1
+        logging.info(f"[Policy] Loaded {len(self.overrides)} rule override(s)")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counts,
+            "overrides": {action: list(roles) for action, roles in self.overrides.items()},
+            "matrix": {action: self.roles_for(action) for action in sorted(self.matrix)},
+            "decisions": self.decisions,
+        }
+
+
+#: Process-wide authorization policy.
+policy = PolicyEngine(DEFAULT_RULES)
+
+
+async def _on_policy_change(action: str) -> None:
+    # The table is small; re-reading it whole keeps deletes and resyncs simple.
+    await policy.reload()
+
+
+config_bus.add_handler(POLICY_CHANGE_PREFIX, _on_policy_change)
@@ -0,0 +1,189 @@
+"""
+Long-lived, pooled HTTP clients for the LLM providers.
+
+One keep-alive client is kept per provider. It is rebuilt only when the provider's
+API key or base URL changes, and all clients are closed by the FastAPI app lifespan.
+The openai, httpx and aiohttp packages are imported when the first client is built.
+
+Exports:
+    provider_clients: ProviderClientRegistry — the process-wide registry instance.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Any, Optional
+
+from ai_gateway.settings import settings
+
+if TYPE_CHECKING:
+    import aiohttp
+    import openai
+
+
+def _fingerprint(api_key: Optional[str], base_url: Optional[str]) -> str:
+    """
+    Hash the identifying parts of a client so raw keys are never kept as dict keys.
+    """
+    return hashlib.sha256(f"{api_key or ''}|{base_url or ''}".encode()).hexdigest()
+
+
+class ProviderClientRegistry:
+    """
+    Registry of pooled provider clients, keyed by provider name.
+
+    Methods:
+        openai_client(api_key, base_url, provider): Pooled openai.AsyncOpenAI for a provider.
+        http_session(provider, api_key, base_url): Pooled aiohttp.ClientSession for a provider.
+        http_timeout(total): Per-request aiohttp.ClientTimeout.
+        aclose(): Close every client (called on app shutdown).
+        stats(): Client counts and rebuild counters.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, tuple[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._retired: dict[asyncio.Task, Any] = {}
+        self._builds = 0
+        self._rebuilds = 0
+
+    async def openai_client(
+        self, api_key: str, base_url: Optional[str] = None, provider: str = "openai"
+    ) -> "openai.AsyncOpenAI":
+        """
+        Return the pooled OpenAI SDK client for a provider (OpenAI itself or an
+        OpenAI-compatible server), building it on first use or after a key/base URL change.
+        """
+        return await self._get(provider, api_key, base_url, self._build_openai)
+
+    async def http_session(
+        self, provider: str, api_key: str, base_url: Optional[str] = None
+    ) -> "aiohttp.ClientSession":
+        """
+        Return the pooled aiohttp session for a provider, rebuilt on key/base URL change.
+        """
+        return await self._get(provider, api_key, base_url, self._build_session)
+
+    async def _get(self, provider: str, api_key: str, base_url: Optional[str], build) -> Any:
+        fingerprint = _fingerprint(api_key, base_url)
+        entry = self._clients.get(provider)
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+        async with self._lock:
+            entry = self._clients.get(provider)
+            if entry and entry[0] == fingerprint:
+                return entry[1]
+            client = build(api_key, base_url)
+            self._clients[provider] = (fingerprint, client)
+            self._builds += 1
+            if entry:
+                self._rebuilds += 1
+                logging.info(f"[ProviderClients] Rebuilt {provider} client after key/base URL change")
+                self._close_later(entry[1])
+            else:
+                logging.info(f"[ProviderClients] Created pooled {provider} client")
+            return client
+
+    def _build_openai(self, api_key: str, base_url: Optional[str]) -> "openai.AsyncOpenAI":
+        import httpx
+        import openai
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PROVIDER_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                settings.PROVIDER_TIMEOUT_SECONDS,
+                connect=settings.PROVIDER_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+        # Retries are handled by ai_gateway.retry for every provider alike.
+        return openai.AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0
+        )
+
+    def _build_session(self, api_key: str, base_url: Optional[str]) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.PROVIDER_MAX_CONNECTIONS,
+            keepalive_timeout=settings.PROVIDER_KEEPALIVE_SECONDS,
+            ttl_dns_cache=300,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.PROVIDER_TIMEOUT_SECONDS,
+            connect=settings.PROVIDER_CONNECT_TIMEOUT_SECONDS,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @staticmethod
+    def http_timeout(total: float) -> "aiohttp.ClientTimeout":
+        """
+        Per-request aiohttp timeout, for calls that must finish sooner than the session default.
+        """
+        import aiohttp
+
+        return aiohttp.ClientTimeout(total=total, connect=settings.PROVIDER_CONNECT_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def http_stream_timeout() -> "aiohttp.ClientTimeout":
+        """
+        Per-request aiohttp timeout for streamed replies: no total, so a long answer is not cut
+        off, but a stall between reads longer than PROVIDER_TIMEOUT_SECONDS fails the stream.
+        """
+        import aiohttp
+
+        return aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.PROVIDER_CONNECT_TIMEOUT_SECONDS,
+            sock_read=settings.PROVIDER_TIMEOUT_SECONDS,
+        )
+
+    def _close_later(self, client: Any) -> None:
+        """
+        Close a replaced client once in-flight requests using it have had time to finish.
+        """
+        async def close_after_grace() -> None:
+            await asyncio.sleep(settings.PROVIDER_TIMEOUT_SECONDS)
+            await self._close(client)
+
+        task = asyncio.create_task(close_after_grace())
+        self._retired[task] = client
+        task.add_done_callback(lambda t: self._retired.pop(t, None))
+
+    @staticmethod
+    async def _close(client: Any) -> None:
+        try:
+            await client.close()
+        except Exception as e:
+            logging.warning(f"[ProviderClients] Failed to close client: {e}")
+
+    async def aclose(self) -> None:
+        """
+        Close all pooled clients, including any still waiting out their grace period.
+        """
+        async with self._lock:
+            clients = [client for _, client in self._clients.values()]
+            self._clients.clear()
+        for task, client in list(self._retired.items()):
+            task.cancel()
+            clients.append(client)
+        for client in clients:
+            await self._close(client)
+        logging.info(f"[ProviderClients] Closed {len(clients)} pooled client(s)")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the active providers and build/rebuild counters.
+        """
+        return {
+            "providers": sorted(self._clients),
+            "builds": self._builds,
+            "rebuilds": self._rebuilds,
+        }
+
+
+#: Process-wide provider client registry, closed by the app lifespan.
+provider_clients = ProviderClientRegistry()
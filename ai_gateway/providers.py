@@ -1,187 +1,387 @@
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
 import logging
-import os
-import aiohttp
-import openai
-from ai_gateway.supabase_config import get_config
+from ai_gateway.circuit_breaker import breakers
+from ai_gateway.concurrency import LimiterRejected, limiters
+from ai_gateway.conversation import History
+from ai_gateway.deadline import with_deadline
+from ai_gateway.hedging import HedgeBudget, hedged_call
+from ai_gateway.llm import ProviderError, registry
+from ai_gateway.llm.base import mask_api_key  # noqa: F401 (re-exported)
+from ai_gateway.metrics import metrics
+from ai_gateway.response_cache import ResponseCache, cache_key
+from ai_gateway.retry import retry_policy
+from ai_gateway.settings import settings
+from ai_gateway.singleflight import SingleFlight
+from ai_gateway.supabase_config import (ConfigSnapshot, add_config_listener,
+                                        get_config_snapshot)
 
 
-def mask_api_key(key: Optional[str]) -> str:
+class CircuitOpenError(ProviderError):
     """
-    Mask an API key for logging purposes.
+    Raised when a provider's circuit breaker is open and no failover provider is available.
     """
-    if not key or len(key) < 8:
-        return "****"
-    return f"{key[:8]}...{'*' * (len(key) - 12)}"
 
+    local = True
 
-# --- Provider Handlers ---
+    def __init__(self, provider: str):
+        super().__init__(
+            provider,
+            "The AI service is temporarily unavailable. Please try again shortly.",
+            503,
+        )
+
+
+class OverloadedError(ProviderError):
+    """
+    Raised when a provider's concurrency limiter rejects a call; carries a Retry-After hint.
+    """
+
+    local = True
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(
+            provider,
+            "The AI service is busy right now. Please try again shortly.",
+            503,
+            retry_after,
+        )
+
+
+#: Upstream statuses that mean the provider is shedding load.
+OVERLOAD_STATUSES = {429, 503, 529}
 
 
-async def ask_openai(prompt: str) -> str:
+async def ask_openai(prompt: str, config: Optional[ConfigSnapshot] = None) -> str:
     """
     Ask OpenAI's chat model asynchronously with error handling and logging.
-    Returns the generated response as a string.
-    """
-    messages = []
-    personality = await get_config("AI_PERSONALITY")
-    if personality:
-        messages.append({"role": "system", "content": personality})
-    messages.append({"role": "user", "content": prompt})
-
-    model = await get_config("OPENAI_MODEL") or "gpt-4"
-    temperature = float(await get_config("OPENAI_TEMPERATURE") or "0.7")
-    max_tokens = int(await get_config("OPENAI_MAX_TOKENS") or "1000")
-    top_p = float(await get_config("OPENAI_TOP_P") or "1.0")
-    presence_penalty = float(await get_config("OPENAI_PRESENCE_PENALTY") or "0.0")
-    frequency_penalty = float(await get_config("OPENAI_FREQUENCY_PENALTY") or "0.0")
-    api_key = await get_config("OPENAI_API_KEY")
-    env_key = os.getenv("OPENAI_API_KEY")
-    logging.error(f"[DEBUG] os.getenv('OPENAI_API_KEY') = {mask_api_key(env_key)}; get_config('OPENAI_API_KEY') = {mask_api_key(api_key)}")
-
-    if not api_key:
-        logging.error("[OpenAI] Missing OPENAI_API_KEY")
-        return "OpenAI API key is not configured."
-
-    client = openai.AsyncOpenAI(api_key=api_key)
+    Uses the given config snapshot, or the cached one if omitted.
+    Returns the generated response, or a user-facing error message, as a string.
+    """
+    try:
+        return await registry.get("openai").complete(prompt, config or await get_config_snapshot())
+    except ProviderError as e:
+        return str(e)
+
 
+async def ask_anthropic(prompt: str, config: Optional[ConfigSnapshot] = None) -> str:
+    """
+    Ask Anthropic's Claude model asynchronously with error handling and logging.
+    Uses the given config snapshot, or the cached one if omitted.
+    Returns the generated response, or a user-facing error message, as a string.
+    """
     try:
-        logging.info(
-            f"[OpenAI] Sending prompt: {prompt!r} | Model: {model} | Key: {mask_api_key(api_key)}"
-        )
-        response = await client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            top_p=top_p,
-            presence_penalty=presence_penalty,
-            frequency_penalty=frequency_penalty,
-        )
-        result = response.choices[0].message.content
-        if not result or not str(result).strip():
-            logging.warning(
-                f"[OpenAI] Empty response for prompt: {prompt!r} | Raw: {response}"
-            )
-            return "Sorry, I couldn't generate a response."
-        return result
+        return await registry.get("anthropic").complete(prompt, config or await get_config_snapshot())
+    except ProviderError as e:
+        return str(e)
+
+
+async def ask_mistral(prompt: str, config: Optional[ConfigSnapshot] = None) -> str:
+    """
+    Ask Mistral's chat model asynchronously with error handling and logging.
+    Uses the given config snapshot, or the cached one if omitted.
+    Returns the generated response, or a user-facing error message, as a string.
+    """
+    try:
+        return await registry.get("mistral").complete(prompt, config or await get_config_snapshot())
+    except ProviderError as e:
+        return str(e)
+
+
+response_cache = ResponseCache.from_settings()
+add_config_listener(response_cache.invalidate_config_key)
+
+#: Coalesces identical concurrent /ask requests into one upstream call.
+inflight_requests = SingleFlight("ask")
+
+
+def provider_chain(config: ConfigSnapshot) -> list[str]:
+    """
+    Return the configured provider followed by the AI_PROVIDER_FAILOVER order, without duplicates.
+    """
+    chain = [config.ai_provider]
+    for name in config.ai_provider_failover:
+        if name not in chain:
+            chain.append(name)
+    return chain
+
+
+def select_provider(config: ConfigSnapshot) -> str:
+    """
+    Pick the first provider in the failover chain whose circuit breaker admits calls.
+    Raises ValueError for an unsupported AI_PROVIDER and CircuitOpenError if every breaker is open.
+    """
+    if config.ai_provider not in registry:
+        raise ValueError(f"Unsupported AI_PROVIDER: {config.ai_provider}")
+    for name in provider_chain(config):
+        if name not in registry:
+            logging.warning(f"[Failover] Ignoring unknown provider '{name}' in AI_PROVIDER_FAILOVER")
+            continue
+        if breakers.get(name).available():
+            if name != config.ai_provider:
+                logging.warning(f"[Failover] {config.ai_provider} circuit open; using {name}")
+                metrics.incr("provider_failover", primary=config.ai_provider, provider=name)
+            return name
+    raise CircuitOpenError(config.ai_provider)
+
+
+async def call_provider(
+    provider: str, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+) -> str:
+    """
+    Call one provider through its concurrency limiter and circuit breaker,
+    recording outcome and latency.
+    Raises OverloadedError if the limiter's wait queue is full or its deadline passes.
+    """
+    limiter = limiters.get(provider)
+    try:
+        await limiter.acquire()
+    except LimiterRejected as e:
+        raise OverloadedError(provider, e.retry_after) from e
+    breaker = breakers.get(provider)
+    if not breaker.acquire():
+        limiter.release()
+        raise CircuitOpenError(provider)
+    started = time.monotonic()
+    try:
+        reply = await registry.get(provider).complete(prompt, config, history)
+    except asyncio.CancelledError:
+        limiter.release()
+        breaker.release()
+        raise
     except Exception as e:
-        import traceback
-        # Try to extract response body from OpenAI error if available
-        error_message = str(e)
-        error_body = None
-        if hasattr(e, 'response') and hasattr(e.response, 'text'):
-            try:
-                error_body = await e.response.text()
-            except Exception:
-                error_body = None
-        logging.error(
-            f"[OpenAI API Error] {error_message}\nPrompt: {prompt!r}\nModel: {model}\nKey: {mask_api_key(api_key)}\nTraceback: {traceback.format_exc()}\nOpenAI Response: {error_body}"
+        limiter.release(overloaded=getattr(e, "status", None) in OVERLOAD_STATUSES)
+        breaker.record(False, time.monotonic() - started)
+        metrics.incr("llm_requests", provider=provider, outcome="error")
+        raise
+    elapsed = time.monotonic() - started
+    limiter.release(elapsed)
+    breaker.record(True, elapsed)
+    metrics.incr("llm_requests", provider=provider, outcome="ok")
+    metrics.observe("llm_latency_seconds", elapsed, provider=provider)
+    return reply
+
+
+#: Caps the share of requests that send a hedge.
+hedge_budget = HedgeBudget(settings.HEDGE_MAX_RATE)
+
+
+def hedge_delay(provider: str) -> float:
+    """
+    Seconds to wait for the primary before hedging: HEDGE_PERCENTILE of its recent latency.
+    """
+    if metrics.sample_count("llm_latency_seconds", provider=provider) < settings.HEDGE_MIN_SAMPLES:
+        delay = settings.HEDGE_DEFAULT_DELAY_SECONDS
+    else:
+        delay = metrics.percentile(
+            "llm_latency_seconds", settings.HEDGE_PERCENTILE, provider=provider
         )
-        # Return detailed error to user for debugging
-        return f"OpenAI API error: {error_message}\n{error_body if error_body else ''}"
+    return max(delay, settings.HEDGE_MIN_DELAY_SECONDS)
 
 
-async def ask_anthropic(prompt: str) -> str:
+def hedge_target(provider: str, config: ConfigSnapshot) -> Optional[tuple[str, ConfigSnapshot]]:
     """
-    Ask Anthropic's Claude model asynchronously with error handling and logging.
-    Returns the generated response as a string.
+    Resolve the backup provider (and config, possibly with another model) for a hedge.
+    HEDGE_BACKUP may be `provider` or `provider:model`; if empty, the next available
+    provider in the failover chain is used. Returns None if there is no usable backup.
+    """
+    if settings.HEDGE_BACKUP:
+        name, _, model = settings.HEDGE_BACKUP.partition(":")
+        if name not in registry or not breakers.get(name).available():
+            return None
+        if model:
+            config = registry.get(name).with_model(config, model)
+        return name, config
+    for name in provider_chain(config):
+        if name != provider and name in registry and breakers.get(name).available():
+            return name, config
+    return None
+
+
+async def complete(
+    provider: str, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+) -> str:
+    """
+    Call the provider, retrying transient failures (see ai_gateway.retry) and hedging with a
+    backup request when HEDGE_ENABLED and the primary is slow.
+    """
+    deadline = retry_policy.deadline()
+
+    def attempt(name: str, attempt_config: ConfigSnapshot):
+        return retry_policy.call(
+            name, lambda: call_provider(name, prompt, attempt_config, history), deadline
+        )
+
+    target = hedge_target(provider, config) if settings.HEDGE_ENABLED else None
+    if target is None:
+        return await attempt(provider, config)
+    backup_provider, backup_config = target
+    return await hedged_call(
+        lambda: attempt(provider, config),
+        lambda: attempt(backup_provider, backup_config),
+        hedge_delay(provider),
+        hedge_budget,
+    )
+
+
+async def generate(prompt: str, history: Optional[History] = None) -> str:
+    """
+    Route prompt to the configured AI provider asynchronously.
+    Config is read once from the cached snapshot and shared with the provider call.
+    If the configured provider's circuit breaker is open, the request fails over along
+    AI_PROVIDER_FAILOVER, and slow calls may be hedged (see complete()).
+    Identical low-temperature requests are answered from the response cache, and identical
+    concurrent requests share a single upstream call.
+    `history` carries earlier conversation turns; conversational requests are never cached.
+    Raises ProviderError (OverloadedError when the provider's concurrency limit and wait
+    queue are exhausted), DeadlineExceeded once the request deadline passes, or ValueError
+    for an unsupported AI_PROVIDER.
     """
-    personality = await get_config("AI_PERSONALITY")
-    full_prompt = (
-        f"{personality}\n\nHuman: {prompt}\n\nAssistant:" if personality else prompt
+    config = await get_config_snapshot()
+    provider = select_provider(config)
+
+    params = registry.get(provider).sampling_params(config)
+    if history:
+        # Still keyed on the context so only identical in-flight requests coalesce.
+        params = {**params, "summary": history.summary, "history": list(history.messages)}
+    key = cache_key(provider, params, config.ai_personality, prompt)
+    cacheable = not history and response_cache.is_cacheable(params["temperature"])
+    if cacheable:
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached
+    reply = await with_deadline(
+        inflight_requests.do(key, lambda: complete(provider, prompt, config, history))
     )
+    if cacheable and reply and reply.strip():
+        tags = ["AI_PROVIDER", "AI_PERSONALITY", *registry.get(provider).config_keys]
+        await response_cache.set(key, reply, tags)
+    return reply
+
 
-    api_key = await get_config("ANTHROPIC_API_KEY")
-    model = await get_config("ANTHROPIC_MODEL") or "claude-3-opus-20240229"
-    temperature = float(await get_config("ANTHROPIC_TEMPERATURE") or "0.7")
-    max_tokens = int(await get_config("ANTHROPIC_MAX_TOKENS") or "1000")
-
-    if not api_key:
-        logging.error("[Anthropic] Missing ANTHROPIC_API_KEY")
-        return "Anthropic API key is not configured."
-
-    headers = {
-        "x-api-key": api_key,
-        "content-type": "application/json",
-        "anthropic-version": "2023-06-01",
-    }
-    body = {
-        "model": model,
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "prompt": full_prompt,
-    }
+async def ask(prompt: str, history: Optional[History] = None) -> str:
+    """
+    Like generate(), but provider failures come back as a user-facing message string.
+    Raises OverloadedError when the provider is at capacity, so callers can answer 503
+    with Retry-After.
+    """
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/complete",
-                json=body,
-                headers=headers,
-                timeout=30,
-            ) as res:
-                res.raise_for_status()
-                data = await res.json()
-                return data["completion"]
-    except Exception as e:
-        logging.error(f"[Anthropic API Error] {e}")
-        return "There was an error while processing your request with Anthropic."
+        return await generate(prompt, history)
+    except OverloadedError:
+        raise
+    except ProviderError as e:
+        return str(e)
 
 
-async def ask_mistral(prompt: str) -> str:
+async def ask_stream(prompt: str, history: Optional[History] = None) -> AsyncIterator[str]:
     """
-    Ask Mistral's chat model asynchronously with error handling and logging.
-    Returns the generated response as a string.
-    """
-    personality = await get_config("AI_PERSONALITY")
-    full_prompt = f"{personality}\n\n{prompt}" if personality else prompt
-
-    api_key = await get_config("MISTRAL_API_KEY")
-    model = await get_config("MISTRAL_MODEL") or "mistral-medium"
-    base_url = await get_config("MISTRAL_BASE_URL") or "https://api.mistral.ai"
-    temperature = float(await get_config("MISTRAL_TEMPERATURE") or "0.7")
-    max_tokens = int(await get_config("MISTRAL_MAX_TOKENS") or "1000")
-
-    if not api_key:
-        logging.error("[Mistral] Missing MISTRAL_API_KEY")
-        return "Mistral API key is not configured."
-
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    body = {
-        "model": model,
-        "messages": [{"role": "user", "content": full_prompt}],
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
+    Stream the configured provider's reply token by token, failing over like ask().
+    Failures before the first chunk are retried like completions; once text has been
+    yielded, errors propagate. Raises DeadlineExceeded if the request deadline passes while
+    waiting for a chunk.
+    """
+    config = await get_config_snapshot()
+    provider = select_provider(config)
+    deadline = retry_policy.deadline()
+    attempt = 0
+    while True:
+        streamed = False
+        try:
+            async with aclosing(stream_provider(provider, prompt, config, history)) as chunks:
+                while True:
+                    try:
+                        text = await with_deadline(chunks.__anext__())
+                    except StopAsyncIteration:
+                        return
+                    streamed = True
+                    yield text
+        except ProviderError as e:
+            delay = None if streamed else retry_policy.next_delay(provider, e, attempt, deadline)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def stream_provider(
+    provider: str, prompt: str, config: ConfigSnapshot, history: Optional[History] = None
+) -> AsyncIterator[str]:
+    """
+    Stream one provider's reply through its concurrency limiter and circuit breaker.
+    The stream holds a concurrency slot until it ends; OverloadedError is raised before the
+    first chunk if none is available.
+    Records time-to-first-token and total stream duration per provider.
+    """
+    limiter = limiters.get(provider)
+    try:
+        await limiter.acquire()
+    except LimiterRejected as e:
+        raise OverloadedError(provider, e.retry_after) from e
+    breaker = breakers.get(provider)
+    if not breaker.acquire():
+        limiter.release()
+        raise CircuitOpenError(provider)
+    started = time.monotonic()
+    ttft: Optional[float] = None
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{base_url}/v1/chat/completions",
-                json=body,
-                headers=headers,
-                timeout=30,
-            ) as res:
-                res.raise_for_status()
-                data = await res.json()
-                return data["choices"][0]["message"]["content"]
+        async for text in registry.get(provider).stream(prompt, config, history):
+            if ttft is None:
+                ttft = time.monotonic() - started
+                metrics.observe("llm_ttft_seconds", ttft, provider=provider)
+            yield text
+    except (asyncio.CancelledError, GeneratorExit):
+        limiter.release()
+        breaker.release()
+        raise
     except Exception as e:
-        logging.error(f"[Mistral API Error] {e}")
-        return "There was an error while processing your request with Mistral."
+        limiter.release(overloaded=getattr(e, "status", None) in OVERLOAD_STATUSES)
+        breaker.record(False, time.monotonic() - started)
+        raise
+    elapsed = time.monotonic() - started
+    # Stream length depends on the reply; time-to-first-token is the load signal.
+    limiter.release(ttft)
+    breaker.record(True, elapsed)
+    metrics.observe("llm_stream_seconds", elapsed, provider=provider)
 
 
-async def ask(prompt: str) -> str:
+async def coalesce_stream(chunks: AsyncIterator[str], interval: float) -> AsyncIterator[str]:
     """
-    Route prompt to the configured AI provider asynchronously.
-    Returns the generated response as a string.
-    """
-    provider = await get_config("AI_PROVIDER") or "openai"
-    if provider == "openai":
-        return await ask_openai(prompt)
-    elif provider == "anthropic":
-        return await ask_anthropic(prompt)
-    elif provider == "mistral":
-        return await ask_mistral(prompt)
-    else:
-        raise ValueError(f"Unsupported AI_PROVIDER: {provider}")
+    Merge streamed chunks so at most one piece of text is yielded per interval (seconds).
+    The first chunk is yielded immediately; buffered text is flushed once the interval has
+    passed, even while upstream is silent, and any remainder when the stream ends.
+    """
+    buffer: list[str] = []
+    last_flush = time.monotonic() - interval
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(chunks.__anext__())
+            # With nothing buffered there is nothing to flush, so wait for upstream alone.
+            timeout = max(0.0, last_flush + interval - time.monotonic()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if done:
+                chunk, pending = pending, None
+                try:
+                    buffer.append(chunk.result())
+                except StopAsyncIteration:
+                    break
+            now = time.monotonic()
+            if buffer and now - last_flush >= interval:
+                yield "".join(buffer)
+                buffer.clear()
+                last_flush = now
+    finally:
+        # The consumer stopped early: don't leave the upstream read running.
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, Exception):
+                pass
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,264 @@
+"""
+Token-bucket rate limiting per Discord user and guild.
+
+Every request admitted by with_permission spends one token from the caller's bucket
+(keyed by x-discord-user-id) and, when RATE_LIMIT_GUILD is set, one from the guild's bucket
+(keyed by x-discord-guild-id). Rates are strings such as "100/minute"; RATE_LIMIT is the
+default and RATE_LIMIT_ROLES overrides it per role. Superadmins are never limited.
+
+Backends:
+    InMemoryRateLimitBackend — per-process buckets, bounded LRU (default).
+    RedisRateLimitBackend — buckets shared across replicas via a Redis-protocol server
+        (RATE_LIMIT_URL), updated atomically by a Lua script.
+"""
+
+import abc
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.redis_client import RedisClient
+from ai_gateway.settings import settings
+
+#: Roles that are never rate limited.
+EXEMPT_ROLES = {"superadmin"}
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+?)s?\s*$")
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    A bucket of `capacity` tokens refilled evenly over `period` seconds.
+    """
+
+    capacity: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rate(spec: str) -> Rate:
+    """
+    Parse "N/unit" or "N/Munit" (e.g. "100/minute", "5/10seconds") into a Rate.
+    Raises ValueError for malformed specs.
+    """
+    match = _RATE_RE.match(spec.lower())
+    if not match or match.group(3) not in _UNITS or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    count, multiple, unit = match.groups()
+    return Rate(int(count), int(multiple or 1) * _UNITS[unit])
+
+
+def parse_role_rates(spec: str) -> dict[str, Rate]:
+    """
+    Parse "role=rate,role=rate" into a mapping of role to Rate.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        role, _, rate = item.partition("=")
+        rates[role.strip()] = parse_rate(rate)
+    return rates
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0
+    scope: str = "user"
+
+
+def retry_after(rate: Rate, cost: float, tokens: float) -> int:
+    """
+    Whole seconds until a bucket holding `tokens` has refilled enough to spend `cost`.
+    """
+    return max(1, math.ceil((cost - tokens) / rate.per_second))
+
+
+class BaseRateLimitBackend(abc.ABC):
+    @abc.abstractmethod
+    async def take(
+        self, key: str, rate: Rate, cost: float = 1, force: bool = False
+    ) -> tuple[bool, float]:
+        """
+        Spend `cost` tokens from the bucket at `key`.
+        Returns (allowed, tokens left); nothing is spent when the bucket is short unless
+        `force` is set, in which case the bucket may go negative (a negative cost refunds).
+        """
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class InMemoryRateLimitBackend(BaseRateLimitBackend):
+    """
+    Process-local buckets; the least recently used are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(
+        self, key: str, rate: Rate, cost: float = 1, force: bool = False
+    ) -> tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(rate.capacity), now))
+        tokens = min(rate.capacity, tokens + (now - updated) * rate.per_second)
+        allowed = tokens >= cost
+        if allowed or force:
+            tokens = min(rate.capacity, tokens - cost)
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def stats(self) -> dict[str, Any]:
+        return {"buckets": len(self._buckets)}
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * per_second)
+local allowed = 0
+if tokens >= cost then
+    allowed = 1
+end
+if allowed == 1 or force then
+    tokens = math.min(capacity, tokens - cost)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / per_second * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(BaseRateLimitBackend):
+    """
+    Buckets stored in a Redis-protocol server so all replicas share one limit.
+    The refill and spend happen in one script using the server clock.
+    """
+
+    def __init__(self, client: RedisClient, prefix: str = "ai_gateway:rl:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def take(
+        self, key: str, rate: Rate, cost: float = 1, force: bool = False
+    ) -> tuple[bool, float]:
+        allowed, tokens = await self.client.execute(
+            "EVAL",
+            _TAKE_SCRIPT,
+            1,
+            self.prefix + key,
+            rate.capacity,
+            rate.per_second,
+            cost,
+            int(force),
+        )
+        return bool(allowed), float(tokens)
+
+
+class RateLimiter:
+    """
+    Applies per-user (per-role) and optional per-guild token buckets.
+    Backend failures are logged and the request is allowed, so an outage of the shared
+    store never takes the bot down.
+    """
+
+    def __init__(
+        self,
+        backend: BaseRateLimitBackend,
+        default_rate: Rate,
+        role_rates: Optional[dict[str, Rate]] = None,
+        guild_rate: Optional[Rate] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.backend = backend
+        self.default_rate = default_rate
+        self.role_rates = role_rates or {}
+        self.guild_rate = guild_rate
+        self.enabled = enabled
+        self.counts = {"allowed": 0, "limited": 0, "exempt": 0, "errors": 0}
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        """
+        Build the limiter configured by RATE_LIMIT* settings.
+        """
+        if settings.RATE_LIMIT_URL:
+            backend: BaseRateLimitBackend = RedisRateLimitBackend(RedisClient(settings.RATE_LIMIT_URL))
+        else:
+            backend = InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+        return cls(
+            backend,
+            default_rate=parse_rate(settings.RATE_LIMIT),
+            role_rates=parse_role_rates(settings.RATE_LIMIT_ROLES),
+            guild_rate=parse_rate(settings.RATE_LIMIT_GUILD) if settings.RATE_LIMIT_GUILD else None,
+            enabled=settings.RATE_LIMIT_ENABLED,
+        )
+
+    def rate_for(self, role: Optional[str]) -> Rate:
+        return self.role_rates.get(role or "", self.default_rate)
+
+    async def check(
+        self, user_id: str, role: Optional[str], guild_id: Optional[str] = None
+    ) -> Optional[RateLimitResult]:
+        """
+        Spend one request for the user (and guild). Returns None when the caller is not
+        limited at all (disabled or exempt role), otherwise the user's bucket result, or
+        the first bucket that refused the request.
+        """
+        if not self.enabled or role in EXEMPT_ROLES:
+            self.counts["exempt"] += 1
+            return None
+        buckets = [("user", f"user:{user_id}", self.rate_for(role))]
+        if self.guild_rate and guild_id:
+            buckets.append(("guild", f"guild:{guild_id}", self.guild_rate))
+        result = None
+        for scope, key, rate in buckets:
+            try:
+                allowed, tokens = await self.backend.take(key, rate)
+            except Exception as e:
+                self._count("errors")
+                logging.warning(f"[RateLimit] Backend error, allowing request: {e}")
+                return None
+            if not allowed:
+                self._count("limited", scope)
+                return RateLimitResult(False, rate.capacity, 0, retry_after(rate, 1, tokens), scope)
+            if result is None:
+                result = RateLimitResult(True, rate.capacity, int(tokens), scope=scope)
+        self._count("allowed")
+        return result
+
+    def _count(self, result: str, scope: str = "") -> None:
+        self.counts[result] += 1
+        if scope:
+            metrics.incr("rate_limit_requests", result=result, scope=scope)
+        else:
+            metrics.incr("rate_limit_requests", result=result)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counts, **self.backend.stats()}
+
+
+#: Process-wide request rate limiter.
+rate_limiter = RateLimiter.from_settings()
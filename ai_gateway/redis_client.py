@@ -0,0 +1,113 @@
+"""
+Minimal asyncio client for the Redis wire protocol (RESP2).
+
+Used by optional shared backends (response cache, rate limiting) without adding a
+Redis client dependency. Works with Redis, Valkey, KeyDB or any RESP-compatible server.
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    """
+    Raised when the server replies with a RESP error.
+    """
+
+
+class RedisClient:
+    """
+    Single-connection RESP client, reconnecting on demand.
+
+    Commands are serialized over one connection, which is enough for the small
+    GET/SET style workloads the gateway sends. Every command is bounded by `timeout`.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", self.db)
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, rest = line[:1], line[1:-2]
+        if prefix == b"+":
+            return rest.decode()
+        if prefix == b"-":
+            raise RedisError(rest.decode())
+        if prefix == b":":
+            return int(rest)
+        if prefix == b"$":
+            length = int(rest)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode()
+        if prefix == b"*":
+            count = int(rest)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def _roundtrip(self, *args: Any) -> Any:
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def execute(self, *args: Any) -> Any:
+        """
+        Send one command and return its decoded reply.
+        Drops the connection on I/O errors or timeouts so the next call reconnects.
+        """
+        async with self._lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._roundtrip(*args), self.timeout)
+            except RedisError:
+                raise
+            except Exception:
+                await self._reset()
+                raise
+
+    async def _reset(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception as e:
+                logging.debug(f"[Redis] Error while closing connection: {e}")
+
+    async def close(self) -> None:
+        """
+        Close the underlying connection.
+        """
+        async with self._lock:
+            await self._reset()
@@ -0,0 +1,236 @@
+"""
+Exact-match response cache for /ask.
+
+Replies are keyed by a hash of provider, model, sampling parameters, personality and the
+normalized prompt. Entries are tagged with the config keys that shaped them so set_config
+can drop exactly the affected entries. Requests with a temperature above
+RESPONSE_CACHE_MAX_TEMPERATURE bypass the cache.
+
+Backends:
+    InMemoryCacheBackend — bounded LRU with per-entry TTL (default).
+    RedisCacheBackend — shared across replicas via any Redis-protocol server (RESPONSE_CACHE_URL).
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.redis_client import RedisClient
+from ai_gateway.settings import settings
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for cache lookups: collapse whitespace and ignore case.
+    """
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(provider: str, params: dict, personality: Optional[str], prompt: str) -> str:
+    """
+    Build a stable cache key from everything that determines a provider's reply.
+    """
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "params": params,
+            "personality": personality or "",
+            "prompt": normalize_prompt(prompt),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class BaseCacheBackend(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl: float, tags: list[str]) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def invalidate_tag(self, tag: str) -> int:
+        pass
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class InMemoryCacheBackend(BaseCacheBackend):
+    """
+    Process-local LRU cache with per-entry expiry and a tag index for invalidation.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str, list[str]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float, tags: list[str]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def invalidate_tag(self, tag: str) -> int:
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._entries), "evictions": self.evictions}
+
+
+class RedisCacheBackend(BaseCacheBackend):
+    """
+    Shared cache stored in a Redis-protocol server.
+    Values expire server-side; tag sets track which keys each config key affects.
+    """
+
+    def __init__(self, client: RedisClient, prefix: str = "ai_gateway:resp:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.execute("GET", self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: float, tags: list[str]) -> None:
+        ttl_ms = int(ttl * 1000)
+        await self.client.execute("SET", self.prefix + key, value, "PX", ttl_ms)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            await self.client.execute("SADD", tag_key, key)
+            await self.client.execute("PEXPIRE", tag_key, ttl_ms)
+
+    async def invalidate_tag(self, tag: str) -> int:
+        tag_key = f"{self.prefix}tag:{tag}"
+        keys = await self.client.execute("SMEMBERS", tag_key) or []
+        if keys:
+            await self.client.execute("DEL", *[self.prefix + key for key in keys])
+        await self.client.execute("DEL", tag_key)
+        return len(keys)
+
+
+class ResponseCache:
+    """
+    Response cache front-end: temperature bypass, hit/miss accounting and error isolation.
+    Backend failures are logged and treated as misses so /ask never fails because of the cache.
+    """
+
+    def __init__(
+        self,
+        backend: BaseCacheBackend,
+        ttl: float,
+        max_temperature: float,
+        enabled: bool = True,
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+        self.counts = {"hits": 0, "misses": 0, "bypassed": 0, "errors": 0, "invalidated": 0}
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        """
+        Build the cache configured by RESPONSE_CACHE_* settings.
+        """
+        if settings.RESPONSE_CACHE_URL:
+            backend: BaseCacheBackend = RedisCacheBackend(RedisClient(settings.RESPONSE_CACHE_URL))
+        else:
+            backend = InMemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+        return cls(
+            backend,
+            ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+            max_temperature=settings.RESPONSE_CACHE_MAX_TEMPERATURE,
+            enabled=settings.RESPONSE_CACHE_ENABLED,
+        )
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """
+        Return True if a request with this temperature may be served from or stored in the cache.
+        """
+        if self.enabled and temperature <= self.max_temperature:
+            return True
+        self._count("bypassed")
+        return False
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            logging.warning(f"[ResponseCache] Lookup failed: {e}")
+            return None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    async def set(self, key: str, value: str, tags: list[str]) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl, tags)
+        except Exception as e:
+            self._count("errors")
+            logging.warning(f"[ResponseCache] Store failed: {e}")
+
+    async def invalidate_config_key(self, config_key: str) -> None:
+        """
+        Drop every cached reply that depended on the given config key.
+        """
+        try:
+            removed = await self.backend.invalidate_tag(config_key)
+        except Exception as e:
+            self._count("errors")
+            logging.warning(f"[ResponseCache] Invalidation for '{config_key}' failed: {e}")
+            return
+        self.counts["invalidated"] += removed
+        if removed:
+            logging.info(f"[ResponseCache] Invalidated {removed} entries after '{config_key}' changed")
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        metrics.incr("response_cache_requests", result=result)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.counts["hits"] + self.counts["misses"]
+        return {
+            **self.counts,
+            "hit_rate": round(self.counts["hits"] / lookups, 4) if lookups else None,
+            **self.backend.stats(),
+        }
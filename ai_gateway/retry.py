@@ -0,0 +1,155 @@
+"""
+Shared retry policy for LLM provider calls.
+
+Transient upstream failures (429, 5xx, 529 and connection errors) are retried with full-jitter
+exponential backoff: attempt n waits a random time in [0, min(max_delay, base * 2**n)], or
+the provider's Retry-After if that is longer. A retry is only made if its wait ends before
+the request's deadline (see ai_gateway.deadline), so retries never outlast the caller. Local
+admission failures (open circuit, concurrency limit) are never retried, and streams are only
+retried before their first chunk, since completions have no side effects until text reaches
+the user.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from ai_gateway.deadline import deadline_within
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+
+T = TypeVar("T")
+
+#: Upstream statuses worth retrying.
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+
+
+def _connection_errors() -> tuple[type, ...]:
+    """
+    Transport error types of the HTTP clients loaded so far (they are imported lazily).
+    """
+    errors: list[type] = [asyncio.TimeoutError, ConnectionError]
+    if "aiohttp" in sys.modules:
+        errors.append(sys.modules["aiohttp"].ClientConnectionError)
+    if "openai" in sys.modules:
+        errors.append(sys.modules["openai"].APIConnectionError)
+    return tuple(errors)
+
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a failed provider call; counts retries per provider
+    and status.
+
+    Methods:
+        call(provider, fn, deadline): Await fn(), retrying per the policy.
+        next_delay(provider, error, attempt, deadline): Seconds to wait before retrying, or None.
+        stats(): Retry, exhausted and deadline counts per provider and status.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        budget_seconds: float = 30.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_seconds = budget_seconds
+        self.counts: dict[str, dict[str, dict[str, int]]] = defaultdict(
+            lambda: defaultdict(lambda: {"retried": 0, "exhausted": 0, "deadline": 0})
+        )
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=settings.RETRY_MAX_ATTEMPTS,
+            base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+            budget_seconds=settings.RETRY_BUDGET_SECONDS,
+        )
+
+    def deadline(self) -> float:
+        """
+        Monotonic deadline for retrying a call starting now: the retry budget, or the
+        request deadline if that is sooner.
+        """
+        return deadline_within(self.budget_seconds)
+
+    @staticmethod
+    def status_label(error: Exception) -> Optional[str]:
+        """
+        Metrics label for a retryable error ("429", "connection", ...), or None if the
+        error must not be retried.
+        """
+        if getattr(error, "local", False):
+            return None
+        status = getattr(error, "status", None)
+        if status in RETRY_STATUSES:
+            return str(status)
+        if status is None and isinstance(error.__cause__, _connection_errors()):
+            return "connection"
+        return None
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def next_delay(
+        self, provider: str, error: Exception, attempt: int, deadline: float
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying after the `attempt`-th failure (0-based), or None
+        to give up: the error is not retryable, attempts are used up, or the wait would end
+        after `deadline`.
+        """
+        label = self.status_label(error)
+        if label is None:
+            return None
+        counts = self.counts[provider][label]
+        if attempt + 1 >= self.max_attempts:
+            counts["exhausted"] += 1
+            metrics.incr("llm_retries", provider=provider, status=label, outcome="exhausted")
+            return None
+        delay = max(self.backoff(attempt), getattr(error, "retry_after", None) or 0)
+        if time.monotonic() + delay >= deadline:
+            counts["deadline"] += 1
+            metrics.incr("llm_retries", provider=provider, status=label, outcome="deadline")
+            return None
+        counts["retried"] += 1
+        metrics.incr("llm_retries", provider=provider, status=label, outcome="retried")
+        logging.warning(
+            f"[Retry] {provider} failed with {label}; retry {attempt + 1} in {delay:.2f}s"
+        )
+        return delay
+
+    async def call(
+        self, provider: str, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None
+    ) -> T:
+        """
+        Await fn(), retrying retryable failures until it succeeds, attempts run out or
+        the deadline (monotonic; default from deadline()) would be passed.
+        """
+        deadline = deadline or self.deadline()
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self.next_delay(provider, e, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {provider: dict(statuses) for provider, statuses in self.counts.items()}
+
+
+#: Process-wide retry policy for provider calls.
+retry_policy = RetryPolicy.from_settings()
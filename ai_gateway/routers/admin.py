@@ -0,0 +1,90 @@
+from typing import Optional
+
+from ai_gateway.audit_helpers import audit_writer
+from ai_gateway.circuit_breaker import breakers
+from ai_gateway.concurrency import limiters
+from ai_gateway.conversation import conversations
+from ai_gateway.decorators import with_permission
+from ai_gateway.llm import registry
+from ai_gateway.metrics import metrics
+from ai_gateway.policy import policy
+from ai_gateway.provider_clients import provider_clients
+from ai_gateway.providers import (hedge_budget, inflight_requests,
+                                  provider_chain, response_cache)
+from ai_gateway.rate_limit import rate_limiter
+from ai_gateway.retry import retry_policy
+from ai_gateway.spool import spool
+from ai_gateway.supabase_config import (config_bus, config_snapshot_stats,
+                                        get_config_snapshot)
+from ai_gateway.supabase_roles import get_user_role, role_cache
+from ai_gateway.token_auth import verified_tokens
+from ai_gateway.token_budget import token_budget
+from fastapi import APIRouter, Request
+
+router = APIRouter()
+
+
+@router.get("/admin/metrics")
+@with_permission("view_metrics")
+async def admin_metrics(request: Request, user_id_ctx=None, username=None, role=None) -> dict:
+    """
+    Return in-process gateway metrics: counters, latency summaries and cache stats.
+    """
+    return {
+        **metrics.snapshot(),
+        "config_cache": config_snapshot_stats(),
+        "config_bus": config_bus.stats(),
+        "provider_clients": provider_clients.stats(),
+        "response_cache": response_cache.stats(),
+        "singleflight": inflight_requests.stats(),
+        "hedging": hedge_budget.stats(),
+        "retries": retry_policy.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "role_cache": role_cache.stats(),
+        "verified_tokens": verified_tokens.stats(),
+        "policy": policy.stats(),
+        "audit": audit_writer.stats(),
+        "spool": spool.stats(),
+        "conversations": conversations.stats(),
+    }
+
+
+@router.get("/admin/providers")
+@with_permission("view_metrics")
+async def admin_providers(request: Request, user_id_ctx=None, username=None, role=None) -> dict:
+    """
+    Return the registered providers, failover order, circuit breaker state and
+    concurrency limits of each provider.
+    """
+    config = await get_config_snapshot()
+    return {
+        "configured": config.ai_provider,
+        "registry": registry.stats(),
+        "failover_order": provider_chain(config),
+        "breakers": breakers.states(),
+        "limiters": limiters.states(),
+    }
+
+
+@router.get("/admin/usage")
+@with_permission("view_metrics")
+async def admin_usage(
+    request: Request,
+    user: Optional[str] = None,
+    guild: Optional[str] = None,
+    user_id_ctx=None,
+    username=None,
+    role=None,
+) -> dict:
+    """
+    Return token consumption per user and guild plus the configured budgets.
+    With ?user= or ?guild=, also report the tokens left in that bucket right now
+    (a user's bucket is sized by their role).
+    """
+    result = token_budget.usage()
+    if user:
+        user_role = await get_user_role(user)
+        result["user_remaining"] = await token_budget.remaining("user", user, user_role)
+    if guild:
+        result["guild_remaining"] = await token_budget.remaining("guild", guild)
+    return result
@@ -1,7 +1,21 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional
+
 from ai_gateway.audit_helpers import log_audit_event
 from ai_gateway.decorators import with_permission
-from ai_gateway.providers import ask
-from fastapi import APIRouter, Request
+from ai_gateway.conversation import (History, conversation_owner,
+                                     conversations, load_history)
+from ai_gateway.deadline import DeadlineExceeded
+from ai_gateway.metrics import metrics
+from ai_gateway.providers import (OverloadedError, ProviderError, ask_stream,
+                                  coalesce_stream, generate)
+from ai_gateway.rate_limit import RateLimitResult
+from ai_gateway.settings import settings
+from ai_gateway.token_budget import token_budget
+from ai_gateway.tokens import TokenUsage, current_usage, estimate_tokens
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -11,8 +25,81 @@ class MessageRequest(BaseModel):
     message: str
 
 
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    message: str
+
+
+class BatchRequest(BaseModel):
+    items: list[BatchItem]
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Format a single Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def overloaded_response(error: OverloadedError) -> JSONResponse:
+    """
+    503 reply telling the client when to retry, used when admission control rejects a request.
+    """
+    return JSONResponse(
+        {"reply": str(error)},
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def budget_exceeded_response(limit: RateLimitResult) -> JSONResponse:
+    """
+    429 reply for a request refused by the tokens-per-minute budget.
+    """
+    return JSONResponse(
+        {"reply": f"Token budget exceeded ({limit.scope}). Try again in {limit.retry_after} seconds."},
+        status_code=429,
+        headers={"Retry-After": str(limit.retry_after), "X-RateLimit-Scope": limit.scope},
+    )
+
+
+class StreamWithCleanup(StreamingResponse):
+    """
+    StreamingResponse that awaits `cleanup` once it is done, whether the body was sent,
+    cut short by a disconnect, or never started because the client left first.
+    """
+
+    def __init__(self, content, cleanup: Callable[[], Awaitable[None]], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.cleanup = cleanup
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.cleanup()
+
+
+async def conversation_context(
+    request: Request, user_id: str, prompt: str
+) -> tuple[str, Optional[History], int]:
+    """
+    Load the caller's conversation and estimate the prompt size including history.
+    Returns (conversation owner, history or None when disabled, estimated prompt tokens).
+    """
+    owner = conversation_owner(user_id, request.headers.get("x-discord-channel-id"))
+    history = await load_history(owner) if settings.CONVERSATION_ENABLED else None
+    estimate = estimate_tokens(prompt)
+    if history:
+        estimate += estimate_tokens(history.summary) + sum(
+            estimate_tokens(m["content"]) for m in history.messages
+        )
+    metrics.observe("ask_prompt_tokens", estimate)
+    return owner, history, estimate
+
+
 @router.post("/ask")
-@with_permission(["user", "admin", "superadmin"])
+@with_permission("ask")
 async def ask_endpoint(
     request: Request, body: MessageRequest, user_id=None, user_id_ctx=None, username=None, role=None
 ) -> dict:
@@ -24,10 +111,216 @@ async def ask_endpoint(
         ip=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
+    guild_id = request.headers.get("x-discord-guild-id")
+    owner, history, estimate = await conversation_context(request, user_id, body.message)
+    limit = await token_budget.reserve(user_id, role, guild_id, estimate)
+    if limit is not None:
+        return budget_exceeded_response(limit)
+    usage = TokenUsage()
+    usage_token = current_usage.set(usage)
     try:
-        reply = await ask(body.message)
+        reply = await generate(body.message, history)
+        if history is not None and reply and reply.strip():
+            conversations.remember(owner, body.message, reply)
+    except OverloadedError as e:
+        return overloaded_response(e)
+    except ProviderError as e:
+        reply = str(e)
+    except DeadlineExceeded:
+        # with_permission answers 504.
+        raise
     except Exception as e:
         reply = f"Sorry, I couldn't generate a response: {e}"
+    finally:
+        current_usage.reset(usage_token)
+        # Cache hits and coalesced requests report no usage and are refunded.
+        await token_budget.settle(user_id, role, guild_id, estimate, usage.total)
     if not reply or not str(reply).strip():
         reply = "Sorry, I couldn't generate a response."
     return {"reply": reply}
+
+
+@router.post("/ask/stream")
+@with_permission("ask")
+async def ask_stream_endpoint(
+    request: Request,
+    body: MessageRequest,
+    flush_ms: Optional[int] = None,
+    user_id=None,
+    user_id_ctx=None,
+    username=None,
+    role=None,
+):
+    """
+    Stream the reply as Server-Sent Events.
+    Emits `delta` events ({"text": ...}) at most once per flush interval, then `done`,
+    or an `error` event if the provider fails mid-stream.
+    Answers 503 with Retry-After, before any event is sent, if the provider is at capacity,
+    429 if the caller's token budget is exhausted, and 504 if the request deadline passes
+    before the first chunk.
+    """
+    user_id = user_id or user_id_ctx
+    await log_audit_event(
+        user_id,
+        "ask_stream",
+        username=username,
+        ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    interval_ms = max(
+        flush_ms or settings.STREAM_FLUSH_INTERVAL_MS, settings.STREAM_MIN_FLUSH_INTERVAL_MS
+    )
+
+    guild_id = request.headers.get("x-discord-guild-id")
+    owner, history, estimate = await conversation_context(request, user_id, body.message)
+    limit = await token_budget.reserve(user_id, role, guild_id, estimate)
+    if limit is not None:
+        return budget_exceeded_response(limit)
+    # Bound for the rest of the request; the streaming task inherits this context.
+    usage = TokenUsage()
+    current_usage.set(usage)
+    streamed: list[str] = []
+
+    settled = False
+
+    async def settle():
+        nonlocal settled
+        if settled:
+            return
+        settled = True
+        actual = usage.total or estimate + estimate_tokens("".join(streamed))
+        await token_budget.settle(user_id, role, guild_id, estimate, actual)
+
+    chunks = ask_stream(body.message, history)
+    # Start the stream here so admission failures become a 503 rather than an SSE error.
+    first: Optional[str] = None
+    first_error: Optional[Exception] = None
+    try:
+        first = await chunks.__anext__()
+    except OverloadedError as e:
+        await token_budget.settle(user_id, role, guild_id, estimate, 0)
+        return overloaded_response(e)
+    except DeadlineExceeded:
+        await token_budget.settle(user_id, role, guild_id, estimate, usage.total)
+        raise
+    except StopAsyncIteration:
+        pass
+    except Exception as e:
+        first_error = e
+
+    async def replay():
+        if first is not None:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+
+    async def events():
+        sent_text = False
+        try:
+            if first_error is not None:
+                raise first_error
+            async for text in coalesce_stream(replay(), interval_ms / 1000):
+                sent_text = True
+                streamed.append(text)
+                yield format_sse("delta", {"text": text})
+            if not sent_text:
+                yield format_sse("delta", {"text": "Sorry, I couldn't generate a response."})
+            elif history is not None:
+                conversations.remember(owner, body.message, "".join(streamed))
+            yield format_sse("done", {})
+        except Exception as e:
+            yield format_sse("error", {"error": f"Sorry, I couldn't generate a response: {e}"})
+        finally:
+            await close()
+
+    async def close():
+        # Frees the provider slot and the token reservation; runs once, from whichever ends first.
+        await chunks.aclose()
+        await settle()
+
+    return StreamWithCleanup(
+        events(),
+        cleanup=close,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def answer_batch_item(
+    index: int, item: BatchItem, user_id: str, role: Optional[str], guild_id: Optional[str]
+) -> dict:
+    """
+    Answer one /ask/batch prompt. Failures are reported in the result instead of raised.
+    """
+    result: dict = {"index": index, "id": item.id}
+    estimate = estimate_tokens(item.message)
+    limit = await token_budget.reserve(user_id, role, guild_id, estimate)
+    if limit is not None:
+        return {**result, "error": "Token budget exceeded.", "status": 429,
+                "retry_after": limit.retry_after}
+    # Each item runs in its own task, so this usage is the item's alone.
+    usage = TokenUsage()
+    current_usage.set(usage)
+    try:
+        reply = await generate(item.message)
+        if not reply or not reply.strip():
+            return {**result, "error": "Sorry, I couldn't generate a response.", "status": 502}
+        return {**result, "reply": reply}
+    except OverloadedError as e:
+        return {**result, "error": str(e), "status": 503, "retry_after": e.retry_after}
+    except DeadlineExceeded as e:
+        return {**result, "error": str(e), "status": 504}
+    except ProviderError as e:
+        return {**result, "error": str(e), "status": e.status or 502}
+    except Exception as e:
+        return {**result, "error": f"Sorry, I couldn't generate a response: {e}", "status": 500}
+    finally:
+        await token_budget.settle(user_id, role, guild_id, estimate, usage.total)
+
+
+@router.post("/ask/batch")
+@with_permission("ask")
+async def ask_batch_endpoint(
+    request: Request, body: BatchRequest, user_id=None, user_id_ctx=None, username=None, role=None
+):
+    """
+    Answer many independent prompts in one request.
+    Permissions and the request rate limit are checked once; prompts are sent to providers
+    at most ASK_BATCH_CONCURRENCY at a time and each result is streamed back as one NDJSON
+    line ({"index", "id", "reply"} or {"index", "id", "error", "status"}) as soon as it is
+    ready, so results may arrive out of order. Each prompt is charged to the token budget.
+    """
+    user_id = user_id or user_id_ctx
+    if not body.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(body.items) > settings.ASK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: at most {settings.ASK_BATCH_MAX_ITEMS} items",
+        )
+    await log_audit_event(
+        user_id,
+        "ask_batch",
+        username=username,
+        ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    guild_id = request.headers.get("x-discord-guild-id")
+    slots = asyncio.Semaphore(settings.ASK_BATCH_CONCURRENCY)
+
+    async def bounded(index: int, item: BatchItem) -> dict:
+        async with slots:
+            return await answer_batch_item(index, item, user_id, role, guild_id)
+
+    async def results():
+        tasks = [asyncio.ensure_future(bounded(i, item)) for i, item in enumerate(body.items)]
+        metrics.incr("ask_batch_items", len(tasks))
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # The client went away: stop spending on prompts nobody will read.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
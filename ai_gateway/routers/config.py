@@ -1,7 +1,10 @@
 from ai_gateway.audit_helpers import log_audit_event
+from ai_gateway.config_etag import config_not_modified
 from ai_gateway.decorators import with_permission
-from ai_gateway.supabase_config import get_all_config, get_config, set_config
-from fastapi import APIRouter, Request
+from ai_gateway.policy import policy
+from ai_gateway.supabase_config import (config_bus, get_all_config, get_config,
+                                        get_config_snapshot, set_config)
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 
 from config_engine.help_text import CONFIG_HELP
@@ -14,12 +17,18 @@ class ConfigUpdate(BaseModel):
 
 
 @router.get("/show/config")
-@with_permission(["admin", "superadmin"])
+@with_permission("get_config")
 async def show_config_list(
-    request: Request, user_id=None, user_id_ctx=None, username=None, role=None
+    request: Request, response: Response, user_id=None, user_id_ctx=None, username=None, role=None
 ) -> dict:
+    """
+    List config values. Supports If-None-Match (304 while unchanged) and ?wait= long-polls.
+    """
     user_id = user_id or user_id_ctx
     role = role or "admin"
+    not_modified = await config_not_modified(request, response, "list", role)
+    if not_modified:
+        return not_modified
     await log_audit_event(
         user_id,
         "list_config_keys",
@@ -33,17 +42,23 @@ async def show_config_list(
 
 
 @router.get("/show/config/{key}")
-@with_permission(["admin", "superadmin"])
+@with_permission("get_config_key")
 async def show_config_key(
-    key: str, request: Request, user_id=None, user_id_ctx=None, username=None, role=None
+    key: str, request: Request, response: Response, user_id=None, user_id_ctx=None, username=None, role=None
 ) -> dict:
+    """
+    Show one config value. Supports If-None-Match (304 while unchanged) and ?wait= long-polls.
+    """
     user_id = user_id or user_id_ctx
     role = role or "admin"
+    not_modified = await config_not_modified(request, response, "key", key, role)
+    if not_modified:
+        return not_modified
     from common.utils import SENSITIVE_KEYS, mask_value
     is_sensitive = key in SENSITIVE_KEYS
     value = await get_config(key, role)
     if is_sensitive:
-        if role != "superadmin":
+        if not policy.allows("get_sensitive_config", role):
             await log_audit_event(
                 user_id,
                 f"forbidden_show_sensitive_config:{key}",
@@ -77,7 +92,7 @@ async def show_config_key(
 
 
 @router.post("/set/config/{key}")
-@with_permission(["admin", "superadmin"])
+@with_permission("set_config")
 async def set_config_key(
     key: str,
     payload: ConfigUpdate,
@@ -100,7 +115,7 @@ async def set_config_key(
 
 
 @router.delete("/delete/config/{key}")
-@with_permission(["admin", "superadmin"])
+@with_permission("gateway_delete_config")
 async def delete_config_key(
     key: str, request: Request, user_id=None, username=None, role=None
 ):
@@ -116,13 +131,20 @@ async def delete_config_key(
 
 
 @router.get("/config/status")
-@with_permission(["admin", "superadmin"])
-async def config_status(request: Request, user_id=None, user_id_ctx=None, username=None, role=None):
+@with_permission("config_status")
+async def config_status(request: Request, response: Response, user_id=None, user_id_ctx=None, username=None, role=None):
     """
     Returns a summary of the current config: provider, model, and personality.
+    Served from the config snapshot, with this replica's config version (compare across
+    replicas to check convergence). Cache and bus counters are in /admin/metrics, so every
+    field here is covered by the ETag.
+    Supports If-None-Match (304 while the config is unchanged) and ?wait= long-polls.
     """
     user_id = user_id or user_id_ctx
     role = role or "admin"
+    not_modified = await config_not_modified(request, response, "status")
+    if not_modified:
+        return not_modified
     await log_audit_event(
         user_id,
         "config_status",
@@ -130,13 +152,12 @@ async def config_status(request: Request, user_id=None, user_id_ctx=None, userna
         ip=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent"),
     )
-    provider = await get_config("AI_PROVIDER", role)
-    model = await get_config("OPENAI_MODEL", role)
-    personality = await get_config("AI_PERSONALITY", role)
+    config = await get_config_snapshot()
     return {
-        "provider": provider,
-        "model": model,
-        "personality": personality,
+        "provider": config.ai_provider,
+        "model": config.openai_model,
+        "personality": config.ai_personality,
+        "config_version": config_bus.version,
     }
 
 
@@ -1,8 +1,9 @@
 from ai_gateway.audit_helpers import log_audit_event
 from ai_gateway.decorators import with_discord_headers, with_permission
+from ai_gateway.settings import settings
 from ai_gateway.supabase_roles import (get_all_roles, get_user_role,
-                                       set_user_role)
-from fastapi import APIRouter, Request
+                                       get_user_roles, set_user_role)
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -13,8 +14,12 @@ class RoleUpdate(BaseModel):
     role: str
 
 
+class RoleBatchRequest(BaseModel):
+    user_ids: list[str]
+
+
 @router.get("/acl/role/{user_id}")
-@with_permission(["admin", "superadmin"])
+@with_permission("get_user_role")
 async def get_user_role_route(
     user_id: str, request: Request, user_id_ctx=None, username=None, role=None
 ) -> dict:
@@ -29,8 +34,33 @@ async def get_user_role_route(
     return {"role": result}
 
 
+@router.post("/acl/roles:batch")
+@with_permission("get_user_role")
+async def get_user_roles_route(
+    payload: RoleBatchRequest, request: Request, user_id_ctx=None, username=None, role=None
+) -> dict:
+    """
+    Resolve the roles of up to ROLE_BATCH_MAX_IDS users in one request.
+    Returns {"roles": {user_id: role}}; users without a role are "guest".
+    """
+    if len(payload.user_ids) > settings.ROLE_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ROLE_BATCH_MAX_IDS} user IDs per request.",
+        )
+    roles = await get_user_roles(payload.user_ids)
+    await log_audit_event(
+        user_id_ctx,
+        f"view_roles_batch:{len(roles)}",
+        username=username,
+        ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    return {"roles": roles}
+
+
 @router.get("/acl/show/{user_id}")
-@with_permission(["admin", "superadmin"])
+@with_permission("get_user_role")
 async def show_user_role(
     user_id: str, request: Request, user_id_ctx=None, username=None, role=None
 ) -> dict:
@@ -46,7 +76,7 @@ async def show_user_role(
 
 
 @router.post("/acl/set")
-@with_permission(["admin", "superadmin"])
+@with_permission("gateway_set_user_role")
 async def set_user_role_route(
     payload: RoleUpdate, request: Request, user_id_ctx=None, username=None, role=None
 ):
@@ -65,7 +95,7 @@ async def set_user_role_route(
 
 
 @router.get("/acl/all")
-@with_permission(["admin", "superadmin"])
+@with_permission("get_all_roles")
 async def list_all_roles(request: Request, user_id_ctx=None, username=None, role=None):
     try:
         roles = await get_all_roles()
@@ -27,7 +27,84 @@ class Settings(BaseSettings):
         OPENAI_API_KEY: OpenAI provider API key.
         ANTHROPIC_API_KEY: Anthropic provider API key.
         MISTRAL_API_KEY: Mistral provider API key.
-        RATE_LIMIT: Rate limiting config string.
+        RATE_LIMIT: Default per-user request rate, e.g. `100/minute`.
+        RATE_LIMIT_ENABLED: Enforce request rate limits in with_permission.
+        RATE_LIMIT_ROLES: Per-role overrides, e.g. `admin=300/minute,guest=10/minute`.
+        RATE_LIMIT_GUILD: Optional shared rate per Discord guild; empty disables it.
+        RATE_LIMIT_URL: Optional redis:// URL for buckets shared between replicas.
+        RATE_LIMIT_MAX_KEYS: Maximum buckets kept by the in-process backend.
+        TOKEN_BUDGET_USER_TPM: Tokens per minute each user may consume; 0 disables the budget.
+        TOKEN_BUDGET_ROLES: Per-role overrides, e.g. `admin=100000,guest=2000`.
+        TOKEN_BUDGET_GUILD_TPM: Tokens per minute shared by each guild; 0 disables it.
+        CONVERSATION_ENABLED: Send earlier turns of the conversation with /ask prompts.
+        CONVERSATION_SCOPE: `user` for one conversation per user, `channel` for one per channel.
+        CONVERSATION_RECENT_TOKENS: Token budget for verbatim recent turns in each prompt.
+        CONVERSATION_SUMMARY_MAX_TOKENS: Target length of the rolling conversation summary.
+        CONVERSATION_MAX_TURNS: Hard cap on unsummarized turns kept per conversation.
+        CONFIG_CACHE_TTL_SECONDS: Lifetime of the in-process bot_config snapshot.
+        CONFIG_CACHE_ERROR_TTL_SECONDS: Lifetime of a snapshot served after a failed reload.
+        CONFIG_BUS: Transport for config change events: `local`, `postgres` or `supabase`.
+        CONFIG_BUS_URL: Postgres DSN for the `postgres` config bus.
+        CONFIG_BUS_CHANNEL: NOTIFY channel or Realtime topic carrying config changes.
+        CONFIG_LONG_POLL_MAX_SECONDS: Longest a config read with ?wait= is held for a change.
+        ROLE_CACHE_TTL_SECONDS: Lifetime of a cached user role.
+        ROLE_CACHE_GUEST_TTL_SECONDS: Lifetime of a cached "guest" (no role row) lookup.
+        ROLE_CACHE_MAX_ENTRIES: Maximum users kept in the role cache; 0 disables it.
+        ROLE_BATCH_MAX_IDS: Maximum user IDs accepted by one /acl/roles:batch request.
+        TOKEN_CACHE_MAX_ENTRIES: Verified dashboard access tokens kept in memory; 0 disables the cache.
+        AUDIT_QUEUE_MAX_EVENTS: Audit events buffered in memory before the overflow policy applies.
+        AUDIT_BATCH_SIZE: Buffered audit events that trigger a flush, and the most per insert.
+        AUDIT_FLUSH_INTERVAL_SECONDS: Longest a buffered audit event waits for a flush.
+        AUDIT_OVERFLOW: Full-queue policy: `drop_oldest`, `drop_newest` or `block`.
+        AUDIT_DRAIN_TIMEOUT_SECONDS: Longest shutdown waits for buffered audit events to be written.
+        AUDIT_PAGE_MAX_ROWS: Most audit log rows returned per page.
+        SPOOL_DIR: Directory spooling audit and log rows while Supabase is unavailable; empty disables it.
+        SPOOL_SEGMENT_MAX_BYTES: Size at which the spool starts a new segment file.
+        SPOOL_REPLAY_BATCH: Spooled rows re-sent per replay write.
+        SPOOL_REPLAY_INTERVAL_SECONDS: Pause between replay attempts while rows are spooled.
+        CUSTOM_PROVIDERS: JSON object declaring extra LLM providers (e.g. OpenAI-compatible local servers).
+        PROVIDER_MAX_CONNECTIONS: Connection pool size per LLM provider client.
+        PROVIDER_MAX_KEEPALIVE_CONNECTIONS: Idle keep-alive connections kept per provider client.
+        PROVIDER_KEEPALIVE_SECONDS: How long idle provider connections are kept open.
+        PROVIDER_CONNECT_TIMEOUT_SECONDS: Connect timeout for provider requests.
+        PROVIDER_TIMEOUT_SECONDS: Total timeout for provider requests.
+        REQUEST_TIMEOUT_SECONDS: Deadline for requests that send no X-Request-Timeout-Ms (0 = none).
+        REQUEST_TIMEOUT_MAX_SECONDS: Upper bound on client-requested deadlines (0 = unbounded).
+        RETRY_MAX_ATTEMPTS: Attempts per provider call, including the first.
+        RETRY_BASE_DELAY_SECONDS: Base of the full-jitter exponential retry backoff.
+        RETRY_MAX_DELAY_SECONDS: Cap on the backoff between retries (Retry-After may exceed it).
+        RETRY_BUDGET_SECONDS: Time after which a request's provider call is no longer retried.
+        STREAM_FLUSH_INTERVAL_MS: Default interval between streamed /ask/stream events.
+        STREAM_MIN_FLUSH_INTERVAL_MS: Lower bound for client-requested flush intervals.
+        ASK_BATCH_MAX_ITEMS: Maximum prompts accepted by one /ask/batch request.
+        ASK_BATCH_CONCURRENCY: Prompts of one batch sent to providers at the same time.
+        RESPONSE_CACHE_ENABLED: Enable the exact-match /ask response cache.
+        RESPONSE_CACHE_MAX_ENTRIES: Maximum entries kept by the in-process response cache.
+        RESPONSE_CACHE_TTL_SECONDS: Lifetime of a cached response.
+        RESPONSE_CACHE_MAX_TEMPERATURE: Highest sampling temperature whose replies are cached.
+        RESPONSE_CACHE_URL: Optional redis:// URL for a cache shared between replicas.
+        BREAKER_WINDOW_SIZE: Number of recent calls each provider circuit breaker scores.
+        BREAKER_MIN_CALLS: Calls required in the window before a breaker may open.
+        BREAKER_ERROR_RATE: Error rate that opens a provider breaker.
+        BREAKER_SLOW_CALL_SECONDS: Latency above which a call counts as slow.
+        BREAKER_SLOW_CALL_RATE: Slow-call rate that opens a provider breaker.
+        BREAKER_OPEN_SECONDS: How long an open breaker rejects calls before probing.
+        BREAKER_HALF_OPEN_PROBES: Concurrent probe calls allowed while half-open.
+        LIMITER_ENABLED: Enforce adaptive per-provider concurrency limits.
+        LIMITER_INITIAL_LIMIT: Starting concurrent-call limit per provider.
+        LIMITER_MIN_LIMIT: Lowest limit the limiter backs off to.
+        LIMITER_MAX_LIMIT: Highest limit the limiter grows to.
+        LIMITER_QUEUE_SIZE: Calls allowed to wait for a slot before new ones are rejected.
+        LIMITER_QUEUE_TIMEOUT_SECONDS: Longest a call waits for a slot before it is rejected.
+        LIMITER_BACKOFF: Factor applied to the limit on 429s or latency spikes.
+        LIMITER_LATENCY_TOLERANCE: Latency, as a multiple of the baseline, treated as overload.
+        HEDGE_ENABLED: Send a backup request when the primary provider is slow (opt-in).
+        HEDGE_PERCENTILE: Latency percentile of the primary after which a hedge is sent.
+        HEDGE_MIN_SAMPLES: Latency samples needed before the percentile is trusted.
+        HEDGE_DEFAULT_DELAY_SECONDS: Hedge delay used until enough samples exist.
+        HEDGE_MIN_DELAY_SECONDS: Lower bound on the hedge delay.
+        HEDGE_MAX_RATE: Maximum fraction of requests that may be hedged.
+        HEDGE_BACKUP: Backup target as `provider` or `provider:model`; empty uses the failover chain.
     """
 
     #: Enable debug mode.
@@ -81,9 +158,240 @@ class Settings(BaseSettings):
     #: Mistral provider API key.
     MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY", "")
 
-    #: Rate limiting config string.
+    #: Default per-user request rate, e.g. `100/minute`.
     RATE_LIMIT: str = os.getenv("RATE_LIMIT", "100/minute")
 
+    #: Enforce request rate limits in with_permission.
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "t")
+
+    #: Per-role overrides, e.g. `admin=300/minute,guest=10/minute`.
+    RATE_LIMIT_ROLES: str = os.getenv("RATE_LIMIT_ROLES", "")
+
+    #: Optional shared rate per Discord guild; empty disables it.
+    RATE_LIMIT_GUILD: str = os.getenv("RATE_LIMIT_GUILD", "")
+
+    #: Optional redis:// URL for buckets shared between replicas.
+    RATE_LIMIT_URL: str = os.getenv("RATE_LIMIT_URL", "")
+
+    #: Maximum buckets kept by the in-process backend.
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+    #: Tokens per minute each user may consume; 0 disables the budget.
+    TOKEN_BUDGET_USER_TPM: int = int(os.getenv("TOKEN_BUDGET_USER_TPM", "20000"))
+
+    #: Per-role overrides, e.g. `admin=100000,guest=2000`.
+    TOKEN_BUDGET_ROLES: str = os.getenv("TOKEN_BUDGET_ROLES", "")
+
+    #: Tokens per minute shared by each guild; 0 disables it.
+    TOKEN_BUDGET_GUILD_TPM: int = int(os.getenv("TOKEN_BUDGET_GUILD_TPM", "0"))
+
+    #: Send earlier turns of the conversation with /ask prompts.
+    CONVERSATION_ENABLED: bool = os.getenv("CONVERSATION_ENABLED", "True").lower() in ("true", "1", "t")
+
+    #: `user` for one conversation per user, `channel` for one per channel.
+    CONVERSATION_SCOPE: str = os.getenv("CONVERSATION_SCOPE", "user")
+
+    #: Token budget for verbatim recent turns in each prompt.
+    CONVERSATION_RECENT_TOKENS: int = int(os.getenv("CONVERSATION_RECENT_TOKENS", "1500"))
+
+    #: Target length of the rolling conversation summary.
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "300"))
+
+    #: Hard cap on unsummarized turns kept per conversation.
+    CONVERSATION_MAX_TURNS: int = int(os.getenv("CONVERSATION_MAX_TURNS", "50"))
+
+    #: Lifetime of the in-process bot_config snapshot.
+    CONFIG_CACHE_TTL_SECONDS: float = float(os.getenv("CONFIG_CACHE_TTL_SECONDS", "30"))
+
+    #: Lifetime of a snapshot served after a failed bot_config reload, so the next reload comes soon.
+    CONFIG_CACHE_ERROR_TTL_SECONDS: float = float(os.getenv("CONFIG_CACHE_ERROR_TTL_SECONDS", "2"))
+
+    #: Transport for config change events: `local` (this process only), `postgres` or `supabase`.
+    CONFIG_BUS: str = os.getenv("CONFIG_BUS", "local")
+
+    #: Postgres DSN for the `postgres` config bus (LISTEN needs a direct, non-pooled connection).
+    CONFIG_BUS_URL: str = os.getenv("CONFIG_BUS_URL", "")
+
+    #: NOTIFY channel or Realtime topic carrying config changes.
+    CONFIG_BUS_CHANNEL: str = os.getenv("CONFIG_BUS_CHANNEL", "bot_config_changes")
+
+    #: Longest a config read with ?wait= is held for a change (keep below proxy idle timeouts).
+    CONFIG_LONG_POLL_MAX_SECONDS: float = float(os.getenv("CONFIG_LONG_POLL_MAX_SECONDS", "55"))
+
+    #: Lifetime of a cached user role (the bound on staleness without a shared config bus).
+    ROLE_CACHE_TTL_SECONDS: float = float(os.getenv("ROLE_CACHE_TTL_SECONDS", "60"))
+
+    #: Lifetime of a cached "guest" (no role row) lookup.
+    ROLE_CACHE_GUEST_TTL_SECONDS: float = float(os.getenv("ROLE_CACHE_GUEST_TTL_SECONDS", "10"))
+
+    #: Maximum users kept in the role cache; 0 disables it.
+    ROLE_CACHE_MAX_ENTRIES: int = int(os.getenv("ROLE_CACHE_MAX_ENTRIES", "10000"))
+
+    #: Maximum user IDs accepted by one /acl/roles:batch request.
+    ROLE_BATCH_MAX_IDS: int = int(os.getenv("ROLE_BATCH_MAX_IDS", "500"))
+
+    #: Verified dashboard access tokens kept in memory; 0 disables the cache.
+    TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "1024"))
+
+    #: Audit events buffered in memory before the overflow policy applies.
+    AUDIT_QUEUE_MAX_EVENTS: int = int(os.getenv("AUDIT_QUEUE_MAX_EVENTS", "10000"))
+
+    #: Buffered audit events that trigger a flush, and the most per insert.
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+
+    #: Longest a buffered audit event waits for a flush.
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+    #: Full-queue policy: `drop_oldest`, `drop_newest` or `block` (callers wait for room).
+    AUDIT_OVERFLOW: str = os.getenv("AUDIT_OVERFLOW", "drop_oldest")
+
+    #: Longest shutdown waits for buffered audit events to be written.
+    AUDIT_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("AUDIT_DRAIN_TIMEOUT_SECONDS", "5"))
+
+    #: Most audit log rows returned per page.
+    AUDIT_PAGE_MAX_ROWS: int = int(os.getenv("AUDIT_PAGE_MAX_ROWS", "500"))
+
+    #: Directory spooling audit and log rows while Supabase is unavailable (one per process); empty disables it.
+    SPOOL_DIR: str = os.getenv("SPOOL_DIR", "spool")
+
+    #: Size at which the spool starts a new segment file.
+    SPOOL_SEGMENT_MAX_BYTES: int = int(os.getenv("SPOOL_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+
+    #: Spooled rows re-sent per replay write.
+    SPOOL_REPLAY_BATCH: int = int(os.getenv("SPOOL_REPLAY_BATCH", "500"))
+
+    #: Pause between replay attempts while rows are spooled.
+    SPOOL_REPLAY_INTERVAL_SECONDS: float = float(os.getenv("SPOOL_REPLAY_INTERVAL_SECONDS", "5"))
+
+    #: JSON object declaring extra LLM providers, keyed by name; see ai_gateway.llm.registry.
+    CUSTOM_PROVIDERS: str = os.getenv("CUSTOM_PROVIDERS", "")
+
+    #: Connection pool size per LLM provider client.
+    PROVIDER_MAX_CONNECTIONS: int = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+
+    #: Idle keep-alive connections kept per provider client.
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+    #: How long idle provider connections are kept open.
+    PROVIDER_KEEPALIVE_SECONDS: float = float(os.getenv("PROVIDER_KEEPALIVE_SECONDS", "30"))
+
+    #: Connect timeout for provider requests.
+    PROVIDER_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("PROVIDER_CONNECT_TIMEOUT_SECONDS", "5"))
+
+    #: Total timeout for provider requests.
+    PROVIDER_TIMEOUT_SECONDS: float = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "30"))
+
+    #: Deadline for requests that send no X-Request-Timeout-Ms (0 = none).
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "0"))
+
+    #: Upper bound on client-requested deadlines (0 = unbounded).
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "300"))
+
+    #: Attempts per provider call, including the first.
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+
+    #: Base of the full-jitter exponential retry backoff.
+    RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+
+    #: Cap on the backoff between retries (Retry-After may exceed it).
+    RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+
+    #: Time after which a request's provider call is no longer retried.
+    RETRY_BUDGET_SECONDS: float = float(os.getenv("RETRY_BUDGET_SECONDS", "60"))
+
+    #: Default interval between streamed /ask/stream events.
+    STREAM_FLUSH_INTERVAL_MS: int = int(os.getenv("STREAM_FLUSH_INTERVAL_MS", "1000"))
+
+    #: Lower bound for client-requested flush intervals (Discord edit rate limits).
+    STREAM_MIN_FLUSH_INTERVAL_MS: int = int(os.getenv("STREAM_MIN_FLUSH_INTERVAL_MS", "250"))
+
+    #: Maximum prompts accepted by one /ask/batch request.
+    ASK_BATCH_MAX_ITEMS: int = int(os.getenv("ASK_BATCH_MAX_ITEMS", "100"))
+
+    #: Prompts of one batch sent to providers at the same time.
+    ASK_BATCH_CONCURRENCY: int = int(os.getenv("ASK_BATCH_CONCURRENCY", "8"))
+
+    #: Enable the exact-match /ask response cache.
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+
+    #: Maximum entries kept by the in-process response cache (LRU eviction beyond this).
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+    #: Lifetime of a cached response.
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+    #: Highest sampling temperature whose replies are cached; hotter requests bypass the cache.
+    RESPONSE_CACHE_MAX_TEMPERATURE: float = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.0"))
+
+    #: Optional redis:// URL for a response cache shared between replicas.
+    RESPONSE_CACHE_URL: Optional[str] = os.getenv("RESPONSE_CACHE_URL", "")
+
+    #: Number of recent calls each provider circuit breaker scores.
+    BREAKER_WINDOW_SIZE: int = int(os.getenv("BREAKER_WINDOW_SIZE", "20"))
+
+    #: Calls required in the window before a breaker may open.
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+
+    #: Error rate that opens a provider breaker.
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+
+    #: Latency above which a call counts as slow.
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "15"))
+
+    #: Slow-call rate that opens a provider breaker.
+    BREAKER_SLOW_CALL_RATE: float = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+
+    #: How long an open breaker rejects calls before probing.
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+    #: Concurrent probe calls allowed while half-open.
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+    #: Enforce adaptive per-provider concurrency limits.
+    LIMITER_ENABLED: bool = os.getenv("LIMITER_ENABLED", "True").lower() in ("true", "1", "t")
+
+    #: Starting concurrent-call limit per provider.
+    LIMITER_INITIAL_LIMIT: int = int(os.getenv("LIMITER_INITIAL_LIMIT", "20"))
+
+    #: Lowest limit the limiter backs off to.
+    LIMITER_MIN_LIMIT: int = int(os.getenv("LIMITER_MIN_LIMIT", "2"))
+
+    #: Highest limit the limiter grows to.
+    LIMITER_MAX_LIMIT: int = int(os.getenv("LIMITER_MAX_LIMIT", "200"))
+
+    #: Calls allowed to wait for a slot before new ones are rejected.
+    LIMITER_QUEUE_SIZE: int = int(os.getenv("LIMITER_QUEUE_SIZE", "50"))
+
+    #: Longest a call waits for a slot before it is rejected.
+    LIMITER_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LIMITER_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    #: Factor applied to the limit on 429s or latency spikes.
+    LIMITER_BACKOFF: float = float(os.getenv("LIMITER_BACKOFF", "0.9"))
+
+    #: Latency, as a multiple of the baseline, treated as overload.
+    LIMITER_LATENCY_TOLERANCE: float = float(os.getenv("LIMITER_LATENCY_TOLERANCE", "2.0"))
+
+    #: Send a backup request when the primary provider is slow (opt-in).
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "False").lower() in ("true", "1", "t")
+
+    #: Latency percentile of the primary after which a hedge is sent.
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+    #: Latency samples needed before the percentile is trusted.
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+    #: Hedge delay used until enough samples exist.
+    HEDGE_DEFAULT_DELAY_SECONDS: float = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "8"))
+
+    #: Lower bound on the hedge delay.
+    HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1"))
+
+    #: Maximum fraction of requests that may be hedged.
+    HEDGE_MAX_RATE: float = float(os.getenv("HEDGE_MAX_RATE", "0.05"))
+
+    #: Backup target as `provider` or `provider:model`; empty uses the failover chain.
+    HEDGE_BACKUP: str = os.getenv("HEDGE_BACKUP", "")
+
     model_config = {'extra': 'allow'}
 
 
@@ -0,0 +1,78 @@
+"""
+Single-flight coalescing of identical in-flight async calls.
+
+Concurrent callers with the same key share one underlying task. Each caller waits on a
+shielded view of it, so cancelling one waiter never cancels the call for the others; the
+shared task is cancelled only once every waiter has gone away.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+from ai_gateway.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Group of keyed single-flight calls.
+
+    Methods:
+        do(key, fn): Await fn(), or join an identical call already in flight.
+        stats(): Leader/follower counts and current waiters per in-flight key.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[str, _Call] = {}
+        self.counts = {"leaders": 0, "followers": 0, "cancelled_waiters": 0, "abandoned": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._count("leaders")
+        else:
+            self._count("followers")
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            self.counts["cancelled_waiters"] += 1
+            raise
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to read the result; stop spending on it.
+                call.task.cancel()
+                self.counts["abandoned"] += 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _count(self, role: str) -> None:
+        self.counts[role] += 1
+        metrics.incr("singleflight_calls", group=self.name, role=role[:-1])
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return counters plus the number of waiters on each in-flight call.
+        `followers` is the number of upstream calls saved by coalescing.
+        """
+        return {
+            **self.counts,
+            "in_flight": len(self._calls),
+            "waiters": sorted((c.waiters for c in self._calls.values()), reverse=True),
+        }
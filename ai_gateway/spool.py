@@ -0,0 +1,345 @@
+"""
+Local write-ahead spool for audit_log and bot_logs rows.
+
+When a Supabase write fails, the rows are appended to segment files under SPOOL_DIR instead of
+being dropped: one JSON record per line ({id, table, at, row}), written and fsynced once per
+appended batch, with a new segment once the current one reaches SPOOL_SEGMENT_MAX_BYTES. A
+replay task re-sends spooled rows in order as upserts keyed by their event_id, so a row that
+reached the database before its write was reported failed is not stored twice
+(migrations/004_event_ids.sql adds the unique keys). The replay position is kept in a cursor
+file, and segments are deleted once replayed.
+
+While rows are spooled, writers append new rows behind them rather than writing directly,
+which keeps the order. Each process needs its own SPOOL_DIR: a directory locked by another
+process disables the spool. An empty SPOOL_DIR disables it too.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from ai_gateway.settings import settings
+from ai_gateway.supabase_client import supabase
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; the directory lock is skipped there.
+    fcntl = None
+
+CURSOR_FILE = "cursor.json"
+LOCK_FILE = ".lock"
+_SEGMENT = re.compile(r"^(\d{12})\.log$")
+
+
+class Spool:
+    """
+    Append-only segment files replayed in order into Supabase.
+
+    Methods:
+        append(table, rows): Durably spool rows; False if the spool is unusable.
+        replay(): Re-send spooled rows until the spool is empty or a write fails.
+        start(): Open the spool and start the replay task.
+        stop(): Stop the replay task, close the open segment and unlock the directory.
+        stats(): Depth, age of the oldest row, segments and counters.
+    """
+
+    def __init__(
+        self, directory: str, segment_max_bytes: int, replay_batch: int, replay_interval: float
+    ) -> None:
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.replay_batch = max(1, replay_batch)
+        self.replay_interval = replay_interval
+        self.depth = 0
+        self.counts = {
+            "appended": 0, "append_errors": 0, "replayed": 0, "replay_errors": 0, "corrupt": 0,
+        }
+        self._lock = threading.Lock()
+        self._enabled = bool(directory)
+        self._opened = False
+        self._lock_handle = None
+        self._file = None
+        self._segment = 1
+        self._cursor = (1, 0)
+        self._task: Optional[asyncio.Task] = None
+        self._replaying = asyncio.Lock()
+
+    # --- Files (callers hold self._lock) ---
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:012d}.log")
+
+    def _segments(self) -> list[int]:
+        names = (_SEGMENT.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in names if match)
+
+    def _fsync_dir(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _open(self) -> bool:
+        if self._opened:
+            return self._enabled
+        self._opened = True
+        if not self._enabled:
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_handle = open(os.path.join(self.directory, LOCK_FILE), "a")
+            if fcntl is not None:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            segments = self._segments()
+            if segments:
+                self._segment = segments[-1]
+                self._truncate_torn_record(self._segment)
+            try:
+                with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                    cursor = json.load(f)
+                self._cursor = (cursor["segment"], cursor["offset"])
+            except (FileNotFoundError, ValueError, KeyError):
+                # Replaying from the start is safe: replayed rows are deduplicated by event_id.
+                self._cursor = (segments[0] if segments else self._segment, 0)
+            self.depth = self._count_pending(segments)
+        except Exception as e:
+            logging.warning(f"[Spool] Disabled; cannot use {self.directory!r}: {e}")
+            self._enabled = False
+        return self._enabled
+
+    def _truncate_torn_record(self, segment: int) -> None:
+        # A crash mid-append can leave a partial last line; later appends would corrupt it.
+        with open(self._path(segment), "r+b") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                logging.warning(f"[Spool] Dropping torn record at the end of segment {segment}")
+                f.truncate(end)
+
+    def _count_pending(self, segments: list[int]) -> int:
+        pending = 0
+        for segment in segments:
+            if segment < self._cursor[0]:
+                continue
+            with open(self._path(segment), "rb") as f:
+                if segment == self._cursor[0]:
+                    f.seek(self._cursor[1])
+                pending += sum(1 for _ in f)
+        return pending
+
+    def _write_cursor(self) -> None:
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"segment": self._cursor[0], "offset": self._cursor[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    # --- Appending ---
+
+    def append(self, table: str, rows: list[dict[str, Any]]) -> bool:
+        """
+        Durably spool `rows` for `table`; blocking (file writes and an fsync), so async callers
+        use a thread. Returns False if there is nothing to replay into or the spool is unusable.
+        """
+        if supabase is None or not rows:
+            return False
+        now = time.time()
+        data = b"".join(
+            json.dumps(
+                {"id": row.get("event_id") or uuid.uuid4().hex, "table": table, "at": now, "row": row},
+                default=str,
+            ).encode()
+            + b"\n"
+            for row in rows
+        )
+        with self._lock:
+            if not self._open():
+                return False
+            try:
+                size = self._file.tell() if self._file is not None else 0
+                if size and size + len(data) > self.segment_max_bytes:
+                    self._file.close()
+                    self._file = None
+                    self._segment += 1
+                if self._file is None:
+                    self._file = open(self._path(self._segment), "ab")
+                    self._fsync_dir()
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                self.counts["append_errors"] += 1
+                logging.error(f"[Spool] Could not spool {len(rows)} {table} row(s): {e}")
+                return False
+            self.depth += len(rows)
+            self.counts["appended"] += len(rows)
+        return True
+
+    # --- Replay ---
+
+    def _read_batch(self) -> tuple[list[dict[str, Any]], tuple[int, int], int]:
+        """
+        Up to replay_batch records from the cursor, the position after them and the number of
+        lines consumed (corrupt lines are consumed but not returned).
+        """
+        records: list[dict[str, Any]] = []
+        consumed = 0
+        with self._lock:
+            segment, offset = self._cursor
+            while len(records) < self.replay_batch:
+                try:
+                    f = open(self._path(segment), "rb")
+                except FileNotFoundError:
+                    f = None
+                if f is not None:
+                    with f:
+                        f.seek(offset)
+                        while len(records) < self.replay_batch:
+                            line = f.readline()
+                            if not line.endswith(b"\n"):
+                                break
+                            offset += len(line)
+                            consumed += 1
+                            try:
+                                records.append(json.loads(line))
+                            except ValueError:
+                                self.counts["corrupt"] += 1
+                                logging.warning(f"[Spool] Skipping corrupt record in segment {segment}")
+                if len(records) >= self.replay_batch or segment >= self._segment:
+                    break
+                segment, offset = segment + 1, 0
+        return records, (segment, offset), consumed
+
+    def _commit(self, cursor: tuple[int, int], consumed: int, replayed: int) -> None:
+        with self._lock:
+            self._cursor = cursor
+            self._write_cursor()
+            self.depth = max(0, self.depth - consumed)
+            self.counts["replayed"] += replayed
+            for segment in self._segments():
+                if segment < cursor[0]:
+                    os.remove(self._path(segment))
+
+    async def _upsert(self, table: str, rows: list[dict[str, Any]]) -> bool:
+        try:
+            await asyncio.to_thread(
+                lambda: supabase.table(table)
+                .upsert(rows, on_conflict="event_id", ignore_duplicates=True)
+                .execute()
+            )
+        except Exception as e:
+            self.counts["replay_errors"] += 1
+            logging.warning(f"[Spool] Replay of {len(rows)} {table} row(s) failed: {e}")
+            return False
+        return True
+
+    async def replay(self) -> bool:
+        """
+        Re-send spooled rows in order; stops at the first failed write (the rows stay spooled).
+        Returns whether the spool was emptied.
+        """
+        if supabase is None:
+            return False
+        async with self._replaying:
+            while self.depth > 0:
+                records, cursor, consumed = await asyncio.to_thread(self._read_batch)
+                if consumed == 0:
+                    break
+                # Consecutive rows of one table go in one upsert, preserving the overall order.
+                runs: list[tuple[str, list[dict[str, Any]]]] = []
+                for record in records:
+                    row = {**record["row"], "event_id": record["id"]}
+                    if runs and runs[-1][0] == record["table"]:
+                        runs[-1][1].append(row)
+                    else:
+                        runs.append((record["table"], [row]))
+                for table, rows in runs:
+                    if not await self._upsert(table, rows):
+                        return False
+                await asyncio.to_thread(self._commit, cursor, consumed, len(records))
+                logging.info(f"[Spool] Replayed {len(records)} row(s); {self.depth} still spooled")
+        return self.depth == 0
+
+    async def _run(self) -> None:
+        while True:
+            if self.depth > 0:
+                await self.replay()
+            await asyncio.sleep(self.replay_interval)
+
+    async def start(self) -> None:
+        # Opening counts what a previous run left behind, so it is replayed now.
+        await asyncio.to_thread(self._locked_open)
+        if self._enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def _locked_open(self) -> None:
+        with self._lock:
+            self._open()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_handle is not None:
+                # Releases the directory; a later append reopens (and relocks) it.
+                self._lock_handle.close()
+                self._lock_handle = None
+            self._opened = False
+
+    def _oldest_age(self) -> Optional[float]:
+        if self.depth == 0:
+            return None
+        with self._lock:
+            segment, offset = self._cursor
+            for candidate in (segment, segment + 1):
+                try:
+                    with open(self._path(candidate), "rb") as f:
+                        f.seek(offset if candidate == segment else 0)
+                        line = f.readline()
+                except FileNotFoundError:
+                    continue
+                if line.endswith(b"\n"):
+                    try:
+                        return round(time.time() - json.loads(line)["at"], 3)
+                    except (ValueError, KeyError):
+                        return None
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        sizes = []
+        with self._lock:
+            if self._opened and self._enabled:
+                sizes = [os.path.getsize(self._path(segment)) for segment in self._segments()]
+        return {
+            **self.counts,
+            "enabled": self._enabled,
+            "depth": self.depth,
+            "oldest_age_seconds": self._oldest_age(),
+            "segments": len(sizes),
+            "bytes": sum(sizes),
+        }
+
+
+#: Process-wide spool for audit and bot log rows.
+spool = Spool(
+    settings.SPOOL_DIR,
+    settings.SPOOL_SEGMENT_MAX_BYTES,
+    settings.SPOOL_REPLAY_BATCH,
+    settings.SPOOL_REPLAY_INTERVAL_SECONDS,
+)
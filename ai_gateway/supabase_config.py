@@ -1,12 +1,19 @@
 import logging
 import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Union
 
+from ai_gateway.config_bus import ConfigBus, transport_from_settings
+from ai_gateway.deadline import DeadlineExceeded, with_deadline
+from ai_gateway.settings import settings
 from ai_gateway.supabase_client import supabase
 
 from common.utils import mask_value
 
 ALLOWED_KEYS = {
     "AI_PROVIDER",
+    "AI_PROVIDER_FAILOVER",
     "OPENAI_MODEL",
     "OPENAI_TEMPERATURE",
     "AI_PERSONALITY",
@@ -14,13 +21,25 @@ ALLOWED_KEYS = {
     "OPENAI_TOP_P",
     "OPENAI_PRESENCE_PENALTY",
     "OPENAI_FREQUENCY_PENALTY",
+    "OPENAI_BASE_URL",
     "ANTHROPIC_MODEL",
     "ANTHROPIC_TEMPERATURE",
     "ANTHROPIC_MAX_TOKENS",
+    "ANTHROPIC_BASE_URL",
     "MISTRAL_MODEL",
     "MISTRAL_TEMPERATURE",
     "MISTRAL_MAX_TOKENS",
     "MISTRAL_BASE_URL",
+    "MOCK_MODEL",
+    "MOCK_LATENCY_MS",
+    "MOCK_LATENCY_DISTRIBUTION",
+    "MOCK_LATENCY_SPREAD",
+    "MOCK_TOKENS_PER_SECOND",
+    "MOCK_RESPONSE_TOKENS",
+    "MOCK_ERROR_RATE_429",
+    "MOCK_ERROR_RATE_5XX",
+    "MOCK_TEMPERATURE",
+    "MOCK_SEED",
 }
 
 from common.utils import SENSITIVE_KEYS, mask_value
@@ -33,16 +52,24 @@ import asyncio
 async def set_config(key: str, value: str) -> None:
     """
     Asynchronously set a config value in Supabase for a given key.
-    Only allows keys in ALLOWED_KEYS. Logs and masks sensitive values.
+    Only allows keys in ALLOWED_KEYS or declared by a registered provider (config_keys).
+    Logs and masks sensitive values.
+    Publishes the change on the config bus so every process invalidates its caches.
     """
     if key not in ALLOWED_KEYS:
-        raise ValueError(f"Invalid config key: {key}")
+        # Imported here: the providers import this module for ConfigSnapshot.
+        from ai_gateway.llm import registry
+
+        if key not in registry.config_keys():
+            raise ValueError(f"Invalid config key: {key}")
     try:
-        await asyncio.to_thread(
+        res = await asyncio.to_thread(
             lambda: supabase.table("bot_config")
             .upsert({"key": key, "value": value})
             .execute()
         )
+        rows = res.data if isinstance(res.data, list) else []
+        await config_bus.publish(key, rows[0].get("version") if rows else None)
         logging.info(
             f"[Supabase] Config set for key '{key}' to value '{mask_value(key, value)}'"
         )
@@ -58,15 +85,16 @@ async def get_config(key: str, role: str = None) -> str:
     Asynchronously fetch a config value from Supabase, falling back to environment variable if not found.
     Sensitive values are masked in logs and only shown unmasked to superadmin via explicit request.
     Returns the config value as a string (masked or None if not found).
+    Raises DeadlineExceeded if the request deadline passes first.
     """
     try:
-        res = await asyncio.to_thread(
+        res = await with_deadline(asyncio.to_thread(
             lambda: supabase.table("bot_config")
             .select("value")
             .eq("key", key)
             .limit(1)
             .execute()
-        )
+        ))
         data = res.data
         value = None
         if data:
@@ -87,6 +115,8 @@ async def get_config(key: str, role: str = None) -> str:
         fallback = os.getenv(key)
         logging.info(f"[Supabase Fallback] No value for key '{key}' in DB; using .env fallback: '{mask_value(key, fallback)}'")
         return fallback
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         fallback = os.getenv(key)
         if key in SENSITIVE_KEYS and role != "superadmin":
@@ -101,29 +131,258 @@ async def get_all_config(role: str = None) -> dict[str, str]:
     """
     Asynchronously fetch all config values from Supabase, masking or omitting sensitive ones.
     Returns a dict of config keys to masked values for admins, or all for superadmin (masked in bulk).
+    Served from the config snapshot, so repeated listings do not rescan bot_config.
+    """
+    snapshot = await get_config_snapshot()
+    config = {}
+    for key, value in snapshot.raw.items():
+        if key in SENSITIVE_KEYS:
+            if role == "superadmin":
+                config[key] = mask_value(key, value)
+            # Hidden from admin in bulk listing
+            continue
+        config[key] = value
+    if not config:
+        logging.info("[Supabase] No config found in DB.")
+    return config
+
+
+# --- Config change listeners ---
+
+ConfigListener = Callable[[str], Union[None, Awaitable[None]]]
+_config_listeners: list[ConfigListener] = []
+
+
+def add_config_listener(listener: ConfigListener) -> None:
+    """
+    Register a callback (sync or async) invoked with the key whenever a config value changes,
+    in this process or another one. The key is "*" when changes may have been missed.
+    Used by caches derived from config to invalidate their entries.
+    """
+    _config_listeners.append(listener)
+
+
+async def notify_config_change(key: str) -> None:
+    """
+    Invalidate the config snapshot and notify every registered listener that a key changed.
+    Listener failures are logged and never propagate to the caller.
     """
+    invalidate_config_snapshot()
+    for listener in list(_config_listeners):
+        try:
+            result = listener(key)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logging.warning(f"[Config] Listener failed for key '{key}': {e}")
+
+
+async def _load_config_version() -> int:
+    """
+    Highest bot_config.version, i.e. the version of the latest config change.
+    """
+    res = await asyncio.to_thread(
+        lambda: supabase.table("bot_config")
+        .select("version")
+        .order("version", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return int(res.data[0]["version"] or 0) if res.data else 0
+
+
+#: Process-wide config change feed; started and stopped by the app lifespan.
+config_bus = ConfigBus(
+    transport_from_settings(), apply=notify_config_change, load_version=_load_config_version
+)
+
+
+# --- Config snapshot cache ---
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Typed, point-in-time view of every bot_config key, loaded in one query.
+    Empty DB values fall back to the environment, matching get_config.
+    Numeric settings are parsed once at load time.
+    """
+
+    raw: dict[str, str] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+    ai_provider: str = "openai"
+    ai_provider_failover: tuple[str, ...] = ()
+    ai_personality: Optional[str] = None
+
+    openai_api_key: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    openai_model: str = "gpt-4"
+    openai_temperature: float = 0.7
+    openai_max_tokens: int = 1000
+    openai_top_p: float = 1.0
+    openai_presence_penalty: float = 0.0
+    openai_frequency_penalty: float = 0.0
+
+    anthropic_api_key: Optional[str] = None
+    anthropic_base_url: str = "https://api.anthropic.com"
+    anthropic_model: str = "claude-3-opus-20240229"
+    anthropic_temperature: float = 0.7
+    anthropic_max_tokens: int = 1000
+
+    mistral_api_key: Optional[str] = None
+    mistral_model: str = "mistral-medium"
+    mistral_base_url: str = "https://api.mistral.ai"
+    mistral_temperature: float = 0.7
+    mistral_max_tokens: int = 1000
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the raw value for a key, falling back to the environment when unset or empty.
+        """
+        return self.raw.get(key) or os.getenv(key)
+
+
+def _parse_number(raw: dict[str, str], key: str, default, cast):
+    """
+    Parse a numeric config value, logging and using the default if it is malformed.
+    """
+    value = raw.get(key) or os.getenv(key)
+    if not value:
+        return default
     try:
-        res = await asyncio.to_thread(
-            lambda: supabase.table("bot_config").select("*").execute()
+        return cast(value)
+    except (TypeError, ValueError):
+        logging.warning(
+            f"[Config Snapshot] Invalid value for '{key}': {value!r}; using default {default!r}"
         )
-        data = res.data
-        config = {}
-        if data:
-            for row in data:
-                key = row["key"]
-                value = row["value"]
-                if key in SENSITIVE_KEYS:
-                    if role == "superadmin":
-                        config[key] = mask_value(key, value)
-                    else:
-                        # Hide from admin in bulk listing
-                        continue
-                else:
-                    config[key] = value
-            logging.info(f"[Supabase] Fetched all config (role={role}): {config}")
-            return config
-        logging.info("[Supabase] No config found in DB.")
-        return {}
-    except Exception as e:
-        logging.error(f"[Supabase Error] Failed to fetch all config: {str(e)}")
-        return {}
+        return default
+
+
+def build_config_snapshot(raw: dict[str, str]) -> ConfigSnapshot:
+    """
+    Build a typed ConfigSnapshot from raw bot_config key/value pairs.
+    """
+    def text(key: str, default: Optional[str] = None) -> Optional[str]:
+        return raw.get(key) or os.getenv(key) or default
+
+    return ConfigSnapshot(
+        raw=dict(raw),
+        loaded_at=time.monotonic(),
+        ai_provider=text("AI_PROVIDER", "openai"),
+        ai_provider_failover=tuple(
+            name.strip() for name in (text("AI_PROVIDER_FAILOVER") or "").split(",") if name.strip()
+        ),
+        ai_personality=text("AI_PERSONALITY"),
+        openai_api_key=text("OPENAI_API_KEY"),
+        openai_base_url=text("OPENAI_BASE_URL"),
+        openai_model=text("OPENAI_MODEL", "gpt-4"),
+        openai_temperature=_parse_number(raw, "OPENAI_TEMPERATURE", 0.7, float),
+        openai_max_tokens=_parse_number(raw, "OPENAI_MAX_TOKENS", 1000, int),
+        openai_top_p=_parse_number(raw, "OPENAI_TOP_P", 1.0, float),
+        openai_presence_penalty=_parse_number(raw, "OPENAI_PRESENCE_PENALTY", 0.0, float),
+        openai_frequency_penalty=_parse_number(raw, "OPENAI_FREQUENCY_PENALTY", 0.0, float),
+        anthropic_api_key=text("ANTHROPIC_API_KEY"),
+        anthropic_base_url=text("ANTHROPIC_BASE_URL", "https://api.anthropic.com"),
+        anthropic_model=text("ANTHROPIC_MODEL", "claude-3-opus-20240229"),
+        anthropic_temperature=_parse_number(raw, "ANTHROPIC_TEMPERATURE", 0.7, float),
+        anthropic_max_tokens=_parse_number(raw, "ANTHROPIC_MAX_TOKENS", 1000, int),
+        mistral_api_key=text("MISTRAL_API_KEY"),
+        mistral_model=text("MISTRAL_MODEL", "mistral-medium"),
+        mistral_base_url=text("MISTRAL_BASE_URL", "https://api.mistral.ai"),
+        mistral_temperature=_parse_number(raw, "MISTRAL_TEMPERATURE", 0.7, float),
+        mistral_max_tokens=_parse_number(raw, "MISTRAL_MAX_TOKENS", 1000, int),
+    )
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+_snapshot_expires_at = 0.0
+# Bumped on every invalidation so a reload already in flight does not cache stale rows.
+_snapshot_generation = 0
+_snapshot_lock = asyncio.Lock()
+_snapshot_stats = {"hits": 0, "misses": 0, "loads": 0, "load_errors": 0, "invalidations": 0}
+
+
+async def _load_config_rows() -> dict[str, str]:
+    """
+    Fetch every bot_config row in a single query, recording the newest row version.
+    """
+    res = await asyncio.to_thread(
+        lambda: supabase.table("bot_config").select("*").execute()
+    )
+    rows = res.data or []
+    config_bus.observe_version(max((row.get("version") or 0 for row in rows), default=0))
+    return {row["key"]: row["value"] for row in rows}
+
+
+def _fresh_snapshot() -> Optional[ConfigSnapshot]:
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() < _snapshot_expires_at:
+        return snapshot
+    return None
+
+
+async def get_config_snapshot() -> ConfigSnapshot:
+    """
+    Return the cached ConfigSnapshot, reloading all keys in one query once the TTL expires.
+    If the reload fails, the previous snapshot (or an env-only one) is served for
+    CONFIG_CACHE_ERROR_TTL_SECONDS before the next attempt. A reload that overlaps an
+    invalidation is returned to its caller but not cached.
+    Raises DeadlineExceeded if the request deadline passes during a reload.
+    """
+    global _snapshot, _snapshot_expires_at
+    snapshot = _fresh_snapshot()
+    if snapshot is not None:
+        _snapshot_stats["hits"] += 1
+        return snapshot
+    async with _snapshot_lock:
+        # Another task may have refreshed the snapshot while we waited for the lock.
+        snapshot = _fresh_snapshot()
+        if snapshot is not None:
+            _snapshot_stats["hits"] += 1
+            return snapshot
+        _snapshot_stats["misses"] += 1
+        previous = _snapshot
+        generation = _snapshot_generation
+        ttl = settings.CONFIG_CACHE_TTL_SECONDS
+        try:
+            raw = await with_deadline(_load_config_rows())
+            _snapshot_stats["loads"] += 1
+            logging.info(f"[Config Snapshot] Loaded {len(raw)} config keys")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            _snapshot_stats["load_errors"] += 1
+            logging.warning(
+                f"[Config Snapshot] Failed to load bot_config: {str(e)} — using "
+                f"{'previous snapshot' if previous else 'environment fallback'}"
+            )
+            raw = previous.raw if previous else {}
+            ttl = settings.CONFIG_CACHE_ERROR_TTL_SECONDS
+        snapshot = build_config_snapshot(raw)
+        if generation == _snapshot_generation:
+            _snapshot = snapshot
+            _snapshot_expires_at = time.monotonic() + ttl
+        return snapshot
+
+
+def invalidate_config_snapshot() -> None:
+    """
+    Drop the cached snapshot so the next read reloads from Supabase.
+    """
+    global _snapshot, _snapshot_generation
+    _snapshot = None
+    _snapshot_generation += 1
+    _snapshot_stats["invalidations"] += 1
+
+
+def config_snapshot_stats() -> dict[str, float]:
+    """
+    Return hit/miss/load counters for the config snapshot cache.
+    """
+    stats = dict(_snapshot_stats)
+    snapshot = _snapshot
+    stats["age_seconds"] = (
+        round(time.monotonic() - snapshot.loaded_at, 3) if snapshot else None
+    )
+    return stats
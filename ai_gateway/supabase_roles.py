@@ -1,6 +1,14 @@
 import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
 
+from ai_gateway.config_bus import ALL_KEYS
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+from ai_gateway.singleflight import SingleFlight
 from ai_gateway.supabase_client import supabase
+from ai_gateway.supabase_config import config_bus
 
 FALLBACK_ROLES = {
     "402357815995400200": "superadmin",
@@ -11,12 +19,90 @@ FALLBACK_ROLES = {
 
 import asyncio
 
+#: Config bus key prefix for role changes, followed by the user ID.
+ROLE_CHANGE_PREFIX = "role:"
 
-async def get_user_role(user_id: str) -> str:
+#: User IDs per `in` query of get_user_roles, keeping request URLs short.
+ROLE_QUERY_CHUNK = 100
+
+
+class RoleCache:
     """
-    Asynchronously fetch a user's role from Supabase, with fallback to predefined roles or 'guest'.
-    Returns the user's role as a string.
+    Bounded LRU of user roles. Entries live ROLE_CACHE_TTL_SECONDS; "guest" (no role row)
+    is cached for the shorter ROLE_CACHE_GUEST_TTL_SECONDS so newly added users are seen soon.
+    Invalidated by set_user_role here and, through the config bus, on other replicas.
     """
+
+    def __init__(self, max_entries: int, ttl: float, guest_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.guest_ttl = guest_ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # Bumped on every invalidation so lookups already in flight do not cache stale roles.
+        self.generation = 0
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    @classmethod
+    def from_settings(cls) -> "RoleCache":
+        return cls(
+            settings.ROLE_CACHE_MAX_ENTRIES,
+            settings.ROLE_CACHE_TTL_SECONDS,
+            settings.ROLE_CACHE_GUEST_TTL_SECONDS,
+        )
+
+    def get(self, user_id: str) -> Optional[str]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self.counts["misses"] += 1
+            metrics.incr("role_cache", result="miss")
+            return None
+        self._entries.move_to_end(user_id)
+        self.counts["hits"] += 1
+        metrics.incr("role_cache", result="hit")
+        return entry[1]
+
+    def set(self, user_id: str, role: str, generation: int) -> None:
+        """
+        Cache `role` unless the cache was invalidated since `generation` was read.
+        """
+        if generation != self.generation or self.max_entries <= 0:
+            return
+        ttl = self.guest_ttl if role == "guest" else self.ttl
+        self._entries[user_id] = (time.monotonic() + ttl, role)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counts["evictions"] += 1
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop one user's entry, or every entry for ALL_KEYS.
+        """
+        self.generation += 1
+        self.counts["invalidations"] += 1
+        if user_id == ALL_KEYS:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counts, "entries": len(self._entries)}
+
+
+#: Process-wide role cache shared by every permission check.
+role_cache = RoleCache.from_settings()
+role_lookups = SingleFlight("roles")
+
+
+async def _on_role_change(user_id: str) -> None:
+    role_cache.invalidate(user_id)
+
+
+config_bus.add_handler(ROLE_CHANGE_PREFIX, _on_role_change)
+
+
+async def _fetch_user_role(user_id: str) -> str:
+    generation = role_cache.generation
     try:
         result = await asyncio.to_thread(
             lambda: supabase.table("roles")
@@ -27,10 +113,13 @@ async def get_user_role(user_id: str) -> str:
         data = result.data
         if not data:
             logging.info(f"[Supabase] No DB role found for {user_id}; returning guest")
+            role_cache.set(user_id, "guest", generation)
             return "guest"
         logging.info(f"[Supabase] Role for {user_id}: {data[0]['role']}")
+        role_cache.set(user_id, data[0]["role"], generation)
         return data[0]["role"]
     except Exception as e:
+        # Not cached, so the next request retries the database.
         fallback_role = FALLBACK_ROLES.get(user_id, "guest")
         logging.warning(
             f"[FALLBACK] Supabase role fetch failed for {user_id}: {str(e)} — using fallback role: {fallback_role}"
@@ -38,9 +127,61 @@ async def get_user_role(user_id: str) -> str:
         return fallback_role
 
 
+async def get_user_role(user_id: str) -> str:
+    """
+    Asynchronously fetch a user's role from Supabase, with fallback to predefined roles or 'guest'.
+    Served from the role cache when possible; concurrent misses for a user share one query.
+    Returns the user's role as a string.
+    """
+    role = role_cache.get(user_id)
+    if role is not None:
+        return role
+    return await role_lookups.do(user_id, lambda: _fetch_user_role(user_id))
+
+
+async def get_user_roles(user_ids: list[str]) -> dict[str, str]:
+    """
+    Resolve many users' roles at once: cached roles first, then one `in` query per
+    ROLE_QUERY_CHUNK missing IDs. Users without a role row are "guest"; if the query fails,
+    fallback roles are returned for that chunk (uncached), as in get_user_role.
+    Returns a map of user ID to role.
+    """
+    roles: dict[str, str] = {}
+    missing: list[str] = []
+    for user_id in dict.fromkeys(user_ids):
+        role = role_cache.get(user_id)
+        if role is None:
+            missing.append(user_id)
+        else:
+            roles[user_id] = role
+    for start in range(0, len(missing), ROLE_QUERY_CHUNK):
+        chunk = missing[start:start + ROLE_QUERY_CHUNK]
+        generation = role_cache.generation
+        try:
+            result = await asyncio.to_thread(
+                lambda: supabase.table("roles")
+                .select("user_id, role")
+                .in_("user_id", chunk)
+                .execute()
+            )
+            found = {row["user_id"]: row["role"] for row in result.data or []}
+        except Exception as e:
+            logging.warning(
+                f"[FALLBACK] Supabase batch role fetch failed for {len(chunk)} users: {str(e)}"
+            )
+            roles.update({user_id: FALLBACK_ROLES.get(user_id, "guest") for user_id in chunk})
+            continue
+        for user_id in chunk:
+            roles[user_id] = found.get(user_id, "guest")
+            role_cache.set(user_id, roles[user_id], generation)
+    logging.info(f"[Supabase] Resolved {len(roles)} roles ({len(missing)} from DB)")
+    return roles
+
+
 async def set_user_role(user_id: str, username: str, role: str) -> None:
     """
     Asynchronously set a user's role in Supabase.
+    Invalidates the user's cached role in every process through the config bus.
     Returns None.
     """
     try:
@@ -49,6 +190,7 @@ async def set_user_role(user_id: str, username: str, role: str) -> None:
             .upsert({"user_id": user_id, "username": username, "role": role})
             .execute()
         )
+        await config_bus.announce(f"{ROLE_CHANGE_PREFIX}{user_id}")
         logging.info(f"[Supabase] Set role for {user_id} ({username}) to {role}")
     except Exception as e:
         logging.error(
@@ -0,0 +1,13 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_conversation_store():
+    # /ask loads and saves conversations through the MCP server; keep tests off the network.
+    import ai_gateway.routers.ask as ask_router
+
+    with patch.object(ask_router, "load_history", new=AsyncMock(return_value=None)), \
+         patch.object(ask_router.conversations, "remember"):
+        yield
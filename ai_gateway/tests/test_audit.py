@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_batches_inserts_and_drains_on_stop():
+    import asyncio
+
+    import ai_gateway.audit_helpers as audit_helpers
+
+    writer = audit_helpers.AuditWriter(max_events=3, batch_size=2, flush_interval=60, overflow="drop_oldest")
+    supabase = MagicMock()
+    insert = supabase.table.return_value.insert
+    with patch.object(audit_helpers, "supabase", new=supabase):
+        await writer.put({"action": "a"})
+        await writer.put({"action": "b"})
+        for _ in range(50):
+            if writer.counts["written"]:
+                break
+            await asyncio.sleep(0.01)
+        insert.assert_called_once_with([{"action": "a"}, {"action": "b"}])
+
+        # While the database is down the queue stays bounded, keeping the newest events.
+        insert.return_value.execute.side_effect = RuntimeError("down")
+        for action in "cdefg":
+            await writer.put({"action": action})
+            await asyncio.sleep(0.01)
+        assert writer.counts["write_errors"] >= 1
+        assert writer.stats()["pending"] == 3 and writer.counts["dropped"] >= 1
+        insert.return_value.execute.side_effect = None
+        await writer.stop(timeout=1)
+    assert writer.stats()["pending"] == 0
+    assert insert.call_args.args[0][-1] == {"action": "g"}
@@ -74,3 +74,303 @@ async def test_ask_endpoint(async_client):
         assert "reply" in resp.json()
 
 
+
+@pytest.mark.asyncio
+async def test_ask_stream_endpoint(async_client):
+    import ai_gateway.routers.ask as ask_router
+
+    async def fake_stream(prompt, history=None):
+        for token in ["Hel", "lo", "!"]:
+            yield token
+
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")), \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "ask_stream", new=fake_stream):
+        resp = await async_client.post(
+            "/ask/stream",
+            json={"message": "Hello!"},
+            headers={"x-discord-user-id": "testuser", "x-discord-username": "tester"},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert "event: delta" in resp.text
+        assert "event: done" in resp.text
+
+
+@pytest.mark.asyncio
+async def test_ask_endpoint_overloaded_returns_503(async_client):
+    import ai_gateway.routers.ask as ask_router
+    from ai_gateway.providers import OverloadedError
+
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")), \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "generate", new=AsyncMock(side_effect=OverloadedError("openai", 7))):
+        resp = await async_client.post(
+            "/ask",
+            json={"message": "Hello!"},
+            headers={"x-discord-user-id": "testuser", "x-discord-username": "tester"},
+        )
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "7"
+        assert "busy" in resp.json()["reply"]
+
+
+@pytest.mark.asyncio
+async def test_ask_endpoint_gives_up_at_request_deadline(async_client):
+    import asyncio
+    import time
+
+    import ai_gateway.routers.ask as ask_router
+
+    cancelled = asyncio.Event()
+
+    async def slow_generate(prompt, history=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    started = time.monotonic()
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")), \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "load_history", new=AsyncMock(return_value=None)), \
+         patch.object(ask_router, "generate", new=slow_generate):
+        resp = await async_client.post(
+            "/ask",
+            json={"message": "Hello!"},
+            headers={
+                "x-discord-user-id": "testuser",
+                "x-discord-username": "tester",
+                "x-request-timeout-ms": "200",
+            },
+        )
+    assert resp.status_code == 504
+    assert cancelled.is_set()
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_ask_batch_streams_ndjson_with_item_errors(async_client):
+    import json
+
+    import ai_gateway.routers.ask as ask_router
+    from ai_gateway.providers import ProviderError
+
+    async def fake_generate(prompt, history=None):
+        if prompt == "bad":
+            raise ProviderError("openai", "OpenAI API error: boom", 500)
+        return prompt.upper()
+
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")) as role_lookup, \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "generate", new=fake_generate):
+        resp = await async_client.post(
+            "/ask/batch",
+            json={"items": [{"id": "a", "message": "one"}, {"message": "bad"}, {"message": "two"}]},
+            headers={"x-discord-user-id": "batchuser", "x-discord-username": "tester"},
+        )
+        assert role_lookup.await_count == 1
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = sorted((json.loads(line) for line in resp.text.splitlines()), key=lambda r: r["index"])
+    assert lines[0] == {"index": 0, "id": "a", "reply": "ONE"}
+    assert lines[1]["status"] == 500 and "boom" in lines[1]["error"]
+    assert lines[2]["reply"] == "TWO"
+
+
+@pytest.mark.asyncio
+async def test_config_status_etag_and_long_poll(async_client):
+    import asyncio
+
+    import ai_gateway.routers.config as config_router
+    import ai_gateway.supabase_config as supabase_config
+
+    headers = {"x-discord-user-id": "admin", "x-discord-username": "adminuser"}
+    loader = AsyncMock(return_value={"AI_PROVIDER": "openai"})
+    audit = AsyncMock()
+    supabase_config.invalidate_config_snapshot()
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="admin")), \
+         patch.object(config_router, "log_audit_event", new=audit), \
+         patch.object(supabase_config, "_load_config_rows", new=loader):
+        first = await async_client.get("/config/status", headers=headers)
+        etag = first.headers["etag"]
+        unchanged = await async_client.get("/config/status", headers={**headers, "if-none-match": etag})
+        assert first.status_code == 200
+        assert unchanged.status_code == 304
+        assert loader.await_count == 1
+        assert audit.await_count == 1
+
+        async def change_soon():
+            await asyncio.sleep(0.1)
+            loader.return_value = {"AI_PROVIDER": "mistral"}
+            await supabase_config.config_bus.publish("AI_PROVIDER")
+
+        changer = asyncio.create_task(change_soon())
+        polled = await async_client.get(
+            "/config/status?wait=5", headers={**headers, "if-none-match": etag}
+        )
+        await changer
+    assert polled.status_code == 200
+    assert polled.json()["provider"] == "mistral"
+    assert polled.headers["etag"] != etag
+    assert int(polled.headers["x-config-version"]) > int(first.headers["x-config-version"])
+    # Only what the ETag covers: live counters would go stale behind a 304.
+    assert set(polled.json()) == {"provider", "model", "personality", "config_version"}
+
+
+@pytest.mark.asyncio
+async def test_acl_roles_batch_resolves_with_one_query(async_client):
+    from unittest.mock import MagicMock
+
+    import ai_gateway.routers.roles as roles_router
+    import ai_gateway.supabase_roles as supabase_roles
+
+    supabase_roles.role_cache.invalidate("*")
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.in_.return_value.execute
+    query.return_value.data = [{"user_id": "1", "role": "admin"}, {"user_id": "2", "role": "user"}]
+    headers = {"x-discord-user-id": "admin", "x-discord-username": "adminuser"}
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="admin")), \
+         patch.object(roles_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(supabase_roles, "supabase", new=supabase):
+        resp = await async_client.post(
+            "/acl/roles:batch", json={"user_ids": ["1", "2", "3", "1"]}, headers=headers
+        )
+        cached = await async_client.post("/acl/roles:batch", json={"user_ids": ["2", "3"]}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"roles": {"1": "admin", "2": "user", "3": "guest"}}
+    assert cached.json() == {"roles": {"2": "user", "3": "guest"}}
+    assert query.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_dashboard_token_authorizes_without_role_lookup_until_revoked(async_client):
+    import time
+
+    import ai_gateway.routers.config as config_router
+    import ai_gateway.token_auth as token_auth
+    from ai_gateway.auth import create_access_token
+    from ai_gateway.supabase_config import config_bus
+    from ai_gateway.token_auth import verified_tokens
+
+    token = create_access_token({"sub": "555", "username": "dash", "role": "superadmin"})
+    role_lookup = AsyncMock(return_value="guest")
+    with patch("ai_gateway.decorators.get_user_role", new=role_lookup), \
+         patch.object(config_router, "log_audit_event", new=noop_log_audit_event):
+        me = await async_client.get("/auth/me", headers={"authorization": f"Bearer {token}"})
+        resp = await async_client.get("/config/status", headers={"cookie": f"ai_dash_token={token}"})
+        assert me.json()["role"] == "superadmin"
+        assert resp.status_code == 200 and "provider" in resp.json()
+        assert role_lookup.await_count == 0
+        assert verified_tokens.stats()["hits"] >= 1
+
+        # A later role change refuses the token; the request falls back to a role lookup.
+        with patch.object(token_auth.time, "time", return_value=time.time() + 5):
+            await config_bus.announce("role:555")
+        denied = await async_client.get("/config/status", headers={"authorization": f"Bearer {token}"})
+    assert role_lookup.await_count == 1
+    assert "Permission denied" in denied.json()["text"]
+
+
+@pytest.mark.asyncio
+async def test_policy_override_applies_on_bus_change(async_client):
+    from unittest.mock import MagicMock
+
+    import ai_gateway.policy as policy_module
+    import ai_gateway.routers.config as config_router
+    from ai_gateway.supabase_config import config_bus
+
+    supabase = MagicMock()
+    rules = supabase.table.return_value.select.return_value.execute
+    rules.return_value.data = [{"action": "config_status", "roles": ["superadmin"]}]
+    headers = {"x-discord-user-id": "admin", "x-discord-username": "adminuser"}
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="admin")), \
+         patch.object(config_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(policy_module, "supabase", new=supabase):
+        allowed = await async_client.get("/config/status", headers=headers)
+        await config_bus.announce("policy:config_status")
+        denied = await async_client.get("/config/status", headers=headers)
+        actions = await async_client.get("/mcp/mcp/actions")
+        rules.return_value.data = []
+        await config_bus.announce("policy:config_status")
+        restored = await async_client.get("/config/status", headers=headers)
+    assert "provider" in allowed.json()
+    assert denied.json()["text"] == "Permission denied: requires one of superadmin."
+    assert "provider" in restored.json()
+    permissions = {action["name"]: action["permissions"] for action in actions.json()}
+    assert permissions["delete_config"] == ["superadmin"]
+    # Endpoints that enforced a command differently keep their own roles.
+    assert policy_module.DEFAULT_RULES["mcp_set_config"] == ("superadmin",)
+    assert policy_module.DEFAULT_RULES["gateway_delete_config"] == ("admin", "superadmin")
+    decisions = policy_module.policy.stats()["decisions"]["config_status"]
+    assert decisions["deny"] >= 1 and decisions["allow"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_keyset_pagination_and_filters(async_client):
+    from unittest.mock import MagicMock
+
+    import ai_gateway.audit as audit
+
+    rows = [
+        {"id": 9, "timestamp": "2025-06-02T10:00:00+00:00", "action": "set_config_key:A"},
+        {"id": 8, "timestamp": "2025-06-02T10:00:00+00:00", "action": "set_config_key:B"},
+        {"id": 7, "timestamp": "2025-06-01T09:00:00+00:00", "action": "set_config_key:C"},
+    ]
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value
+    for method in ("eq", "like", "gte", "lt", "or_", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value.data = rows
+    headers = {"X-User-ID": "admin"}
+    with patch("config_engine.access.get_user_role", new=AsyncMock(return_value="admin")), \
+         patch.object(audit, "supabase", new=supabase):
+        first = await async_client.get(
+            "/audit/audit/logs",
+            params={"limit": 2, "action": "set_config_", "user_id": "42", "fields": "action"},
+            headers=headers,
+        )
+        query.execute.return_value.data = rows[2:]
+        second = await async_client.get(
+            "/audit/audit/logs", params={"limit": 2, "cursor": first.json()["next_cursor"]}, headers=headers
+        )
+        bad = await async_client.get("/audit/audit/logs", params={"cursor": "nope"}, headers=headers)
+    assert first.status_code == 200
+    assert first.json()["logs"] == [{"action": "set_config_key:A"}, {"action": "set_config_key:B"}]
+    assert audit.decode_cursor(first.json()["next_cursor"]) == ("2025-06-02T10:00:00+00:00", 8)
+    assert supabase.table.return_value.select.call_args_list[0].args == ("id, timestamp, action",)
+    query.like.assert_called_once_with("action", "set\\_config\\_%")
+    query.eq.assert_called_once_with("user_id", "42")
+    query.or_.assert_called_once_with(
+        'timestamp.lt."2025-06-02T10:00:00+00:00",'
+        'and(timestamp.eq."2025-06-02T10:00:00+00:00",id.lt."8")'
+    )
+    assert query.limit.call_args_list[-1].args == (3,)
+    assert second.json()["next_cursor"] is None and len(second.json()["logs"]) == 1
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stream_cleanup_runs_when_client_leaves_before_the_body():
+    from ai_gateway.routers.ask import StreamWithCleanup
+
+    started, cleaned = [], []
+
+    async def body():
+        started.append(True)
+        yield "x"
+
+    async def cleanup():
+        cleaned.append(True)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client went away")
+
+    response = StreamWithCleanup(body(), cleanup=cleanup)
+    with pytest.raises(Exception):
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+    assert cleaned == [True] and not started
@@ -0,0 +1,338 @@
+import pytest
+
+from ai_gateway.provider_clients import ProviderClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_provider_clients_are_reused_until_key_changes():
+    registry = ProviderClientRegistry()
+    first = await registry.http_session("mistral", "key-1", "https://api.mistral.ai")
+    again = await registry.http_session("mistral", "key-1", "https://api.mistral.ai")
+    assert first is again
+
+    rotated = await registry.http_session("mistral", "key-2", "https://api.mistral.ai")
+    assert rotated is not first
+    assert registry.stats()["rebuilds"] == 1
+
+    await registry.aclose()
+    assert first.closed and rotated.closed
+    assert registry.stats()["providers"] == []
+
+
+@pytest.mark.asyncio
+async def test_coalesce_stream_merges_chunks_within_interval():
+    from ai_gateway.providers import coalesce_stream
+
+    async def chunks():
+        for token in ["a", "b", "c", "d"]:
+            yield token
+
+    flushed = [text async for text in coalesce_stream(chunks(), interval=60)]
+    assert flushed == ["a", "bcd"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_stream_flushes_on_interval_while_upstream_is_silent():
+    import asyncio
+    import time
+
+    from ai_gateway.providers import coalesce_stream
+
+    async def chunks():
+        yield "a"
+        await asyncio.sleep(0.01)
+        yield "b"
+        await asyncio.sleep(1)
+        yield "c"
+
+    started = time.monotonic()
+    flushed = [(text, time.monotonic() - started) async for text in coalesce_stream(chunks(), interval=0.1)]
+    assert [text for text, _ in flushed] == ["a", "b", "c"]
+    # "b" goes out when its interval ends, not when "c" arrives a second later.
+    assert flushed[1][1] < 0.5
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_call_and_survives_waiter_cancel():
+    import asyncio
+
+    from ai_gateway.singleflight import SingleFlight
+
+    group = SingleFlight("test")
+    release = asyncio.Event()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "shared"
+
+    waiters = [asyncio.create_task(group.do("k", upstream)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert group.stats()["waiters"] == [3]
+
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters[1:])
+
+    assert results == ["shared", "shared"]
+    assert calls == 1
+    assert group.stats()["followers"] == 2
+    assert group.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_ask_fails_over_when_primary_circuit_is_open():
+    from unittest.mock import AsyncMock, patch
+
+    import ai_gateway.providers as providers
+    from ai_gateway.circuit_breaker import OPEN, BreakerRegistry
+    from ai_gateway.supabase_config import build_config_snapshot
+
+    config = build_config_snapshot({"AI_PROVIDER": "openai", "AI_PROVIDER_FAILOVER": "anthropic,mistral"})
+    registry = BreakerRegistry()
+    primary = registry.get("openai")
+    for _ in range(primary.min_calls):
+        primary.record(False, 0.1)
+    assert primary.state == OPEN
+
+    openai_call = AsyncMock(return_value="from openai")
+    anthropic_call = AsyncMock(return_value="from anthropic")
+    with patch.object(providers, "breakers", new=registry), \
+         patch.object(providers, "get_config_snapshot", new=AsyncMock(return_value=config)), \
+         patch.object(providers.registry.get("openai"), "complete", new=openai_call), \
+         patch.object(providers.registry.get("anthropic"), "complete", new=anthropic_call):
+        assert await providers.ask("hello") == "from anthropic"
+    openai_call.assert_not_awaited()
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    from ai_gateway.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.available() and breaker.state == HALF_OPEN
+    assert breaker.acquire()
+    assert not breaker.available()  # single probe in flight
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_uses_backup_and_cancels_slow_primary():
+    import asyncio
+
+    from ai_gateway.hedging import HedgeBudget, hedged_call
+
+    primary_cancelled = asyncio.Event()
+
+    async def slow_primary():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+        return "primary"
+
+    async def backup():
+        return "backup"
+
+    budget = HedgeBudget(max_rate=1.0, burst=1.0)
+    assert await hedged_call(slow_primary, backup, delay=0.01, budget=budget) == "backup"
+    await asyncio.sleep(0)
+    assert primary_cancelled.is_set()
+
+    # Budget exhausted: the next slow call waits for the primary instead of hedging.
+    budget.tokens = 0
+    budget.max_rate = 0
+
+    async def quick_primary():
+        await asyncio.sleep(0.02)
+        return "primary"
+
+    assert await hedged_call(quick_primary, backup, delay=0.01, budget=budget) == "primary"
+    assert budget.stats()["denied"] == 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_queues_rejects_and_backs_off():
+    import asyncio
+
+    from ai_gateway.concurrency import AdaptiveLimiter, LimiterRejected
+
+    limiter = AdaptiveLimiter("test", initial_limit=2, min_limit=1, queue_size=1, queue_timeout=1.0)
+    await limiter.acquire()
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(LimiterRejected) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after >= 1
+
+    limiter.release(0.5)
+    await asyncio.wait_for(waiter, 1)
+    assert limiter.in_flight == 2
+
+    limit = limiter.limit
+    limiter.release(overloaded=True)
+    assert limiter.limit < limit
+    limiter.release(0.5)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_queue_deadline_rejects():
+    from ai_gateway.concurrency import AdaptiveLimiter, LimiterRejected
+
+    limiter = AdaptiveLimiter("test", initial_limit=1, queue_size=5, queue_timeout=0.01)
+    await limiter.acquire()
+    with pytest.raises(LimiterRejected) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.reason == "queue_timeout"
+    assert limiter.to_dict()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_conversation_history_budget_and_summarization():
+    import asyncio
+    import json
+    from unittest.mock import patch
+
+    from ai_gateway import conversation
+
+    stored = {}
+
+    async def fake_get(owner, key):
+        return stored[(owner, key)]
+
+    async def fake_set(owner, key, value):
+        stored[(owner, key)] = value
+
+    async def fake_summarize(summary, turns):
+        return f"{summary}+{len(turns)}"
+
+    store = conversation.ConversationStore()
+    with patch.object(conversation, "get_user_context", new=fake_get), \
+         patch.object(conversation, "set_user_context", new=fake_set), \
+         patch.object(conversation, "summarize", new=fake_summarize), \
+         patch.object(conversation.settings, "CONVERSATION_RECENT_TOKENS", 40):
+        for i in range(6):
+            await store.record_turn("u1", f"question {i} " + "x" * 20, f"answer {i} " + "y" * 20)
+            await asyncio.sleep(0)
+        while store._summarizing:
+            await asyncio.sleep(0.01)
+        history = await conversation.load_history("u1")
+
+    doc = json.loads(stored[("u1", "conversation")])
+    assert doc["summary"].startswith("+")
+    assert doc["summarized_turns"] + len(doc["turns"]) == 6
+    # Only the newest turns that fit the budget are sent, oldest first.
+    assert history.summary == doc["summary"]
+    assert history.messages[-1]["content"].startswith("answer 5")
+    assert len(history.messages) == 4
+    assert "Summary of the conversation so far" in history.system_prompt("Be nice.")
+    # Per-conversation locks are dropped once released.
+    assert store.stats()["locks"] == 0
+
+
+def test_registry_loads_custom_openai_compatible_provider_lazily():
+    from ai_gateway.llm.registry import ProviderRegistry
+    from ai_gateway.supabase_config import ConfigSnapshot
+
+    registry = ProviderRegistry()
+    registry.load_custom(
+        '{"local": {"type": "openai_compatible", "base_url": "http://ollama:11434/v1",'
+        ' "model": "llama3", "temperature": 0}, "broken": {"type": "nope"}}'
+    )
+    assert "local" in registry and "broken" not in registry
+    assert registry.stats()["loaded"] == []
+
+    local = registry.get("local")
+    assert registry.stats()["loaded"] == ["local"]
+    config = ConfigSnapshot(raw={"LOCAL_MAX_TOKENS": "256"})
+    assert local.sampling_params(config) == {
+        "model": "llama3", "temperature": 0.0, "max_tokens": 256, "top_p": 1.0,
+    }
+    assert local.base_url(config) == "http://ollama:11434/v1"
+    assert local.sampling_params(local.with_model(config, "qwen2"))["model"] == "qwen2"
+    assert "LOCAL_MODEL" in local.config_keys
+
+
+@pytest.mark.asyncio
+async def test_mock_provider_streams_caches_and_injects_errors():
+    from unittest.mock import AsyncMock, patch
+
+    import ai_gateway.providers as providers
+    from ai_gateway.circuit_breaker import BreakerRegistry
+    from ai_gateway.response_cache import InMemoryCacheBackend, ResponseCache
+    from ai_gateway.supabase_config import build_config_snapshot
+
+    raw = {
+        "AI_PROVIDER": "mock",
+        "MOCK_LATENCY_MS": "0",
+        "MOCK_TOKENS_PER_SECOND": "0",
+        "MOCK_RESPONSE_TOKENS": "5",
+        "MOCK_SEED": "1",
+    }
+    config = build_config_snapshot(raw)
+    cache = ResponseCache(InMemoryCacheBackend(10), ttl=60, max_temperature=0.0)
+    with patch.object(providers, "breakers", new=BreakerRegistry()), \
+         patch.object(providers, "get_config_snapshot", new=AsyncMock(return_value=config)), \
+         patch.object(providers, "response_cache", new=cache):
+        reply = await providers.generate("benchmark me")
+        assert len(reply.split()) == 5
+        assert await providers.generate("benchmark me") == reply
+        assert cache.stats()["hits"] == 1
+
+        chunks = [text async for text in providers.ask_stream("benchmark me")]
+        assert len(chunks) == 5 and "".join(chunks).strip() == reply
+
+    failing = build_config_snapshot({**raw, "MOCK_ERROR_RATE_429": "1"})
+    with pytest.raises(providers.ProviderError) as excinfo:
+        await providers.registry.get("mock").complete("hello", failing)
+    assert excinfo.value.status == 429
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_backs_off_honors_retry_after_and_deadline():
+    import time
+
+    from ai_gateway.llm.base import ProviderError, retry_after_header
+    from ai_gateway.providers import OverloadedError
+    from ai_gateway.retry import RetryPolicy
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ProviderError("openai", "bad gateway", 502)
+        return "ok"
+
+    assert await policy.call("openai", flaky) == "ok"
+    assert policy.stats()["openai"]["502"]["retried"] == 2
+
+    async def failing(error):
+        calls.append(1)
+        raise error
+
+    calls.clear()
+    throttled = ProviderError("openai", "slow down", 429, retry_after=30)
+    with pytest.raises(ProviderError):
+        await policy.call("openai", lambda: failing(throttled), deadline=time.monotonic() + 5)
+    assert len(calls) == 1 and policy.stats()["openai"]["429"]["deadline"] == 1
+
+    for error in (ProviderError("openai", "bad request", 400), OverloadedError("openai", 1)):
+        calls.clear()
+        with pytest.raises(ProviderError):
+            await policy.call("openai", lambda: failing(error))
+        assert len(calls) == 1
+
+    error = Exception("rate limited")
+    error.headers = {"retry-after": "7"}
+    assert retry_after_header(error) == 7.0
@@ -0,0 +1,149 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from ai_gateway.main import app
+from ai_gateway.rate_limit import (InMemoryRateLimitBackend, Rate, RateLimiter,
+                                   parse_rate, parse_role_rates)
+from httpx import AsyncClient
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+
+
+def test_parse_rate():
+    assert parse_rate("100/minute") == Rate(100, 60)
+    assert parse_rate("5/10seconds") == Rate(5, 10)
+    assert parse_rate("1000 / hours") == Rate(1000, 3600)
+    assert parse_role_rates("admin=300/minute, guest=10/minute") == {
+        "admin": Rate(300, 60),
+        "guest": Rate(10, 60),
+    }
+    with pytest.raises(ValueError):
+        parse_rate("lots/minute")
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_user_role_and_guild_buckets():
+    limiter = RateLimiter(
+        InMemoryRateLimitBackend(max_keys=100),
+        default_rate=Rate(2, 60),
+        role_rates={"admin": Rate(3, 60)},
+        guild_rate=Rate(4, 60),
+    )
+    assert (await limiter.check("u1", "user", "g1")).allowed
+    assert (await limiter.check("u1", "user", "g1")).remaining == 0
+    denied = await limiter.check("u1", "user", "g1")
+    assert not denied.allowed and denied.scope == "user"
+    assert denied.retry_after == 30
+
+    for _ in range(2):
+        assert (await limiter.check("u2", "admin", "g1")).allowed
+    denied = await limiter.check("u2", "admin", "g1")
+    assert not denied.allowed and denied.scope == "guild"
+
+    assert await limiter.check("u3", "superadmin", "g1") is None
+
+
+@pytest.mark.asyncio
+async def test_over_limit_request_returns_429(async_client):
+    import ai_gateway.decorators as decorators
+    import ai_gateway.routers.ask as ask_router
+
+    limiter = RateLimiter(InMemoryRateLimitBackend(max_keys=10), default_rate=Rate(1, 60))
+
+    async def noop_log_audit_event(*args, **kwargs):
+        return None
+
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")), \
+         patch.object(decorators, "rate_limiter", new=limiter), \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "generate", new=AsyncMock(return_value="hi")):
+        headers = {"x-discord-user-id": "limited", "x-discord-username": "tester"}
+        first = await async_client.post("/ask", json={"message": "Hello!"}, headers=headers)
+        second = await async_client.post("/ask", json={"message": "Hello!"}, headers=headers)
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["retry-after"] == "60"
+
+
+def test_estimate_tokens_heuristic_fallback():
+    from ai_gateway import tokens
+
+    with patch.object(tokens, "_encoding", return_value=None):
+        assert tokens.estimate_tokens("") == 0
+        assert tokens.estimate_tokens("a" * 10) == 3
+
+
+@pytest.mark.asyncio
+async def test_token_budget_reserve_settle_and_refuse():
+    from ai_gateway.token_budget import TokenBudget
+
+    budget = TokenBudget(InMemoryRateLimitBackend(max_keys=100), user_tpm=100, guild_tpm=150)
+    assert await budget.reserve("u1", "user", "g1", 40) is None
+    # The provider reported more than the estimate: the difference is charged.
+    await budget.settle("u1", "user", "g1", 40, 90)
+    assert await budget.remaining("user", "u1") == 10
+    refused = await budget.reserve("u1", "user", "g1", 20)
+    assert refused is not None and refused.scope == "user"
+    assert refused.retry_after >= 6
+    # Exempt roles and cache hits cost nothing.
+    assert await budget.reserve("root", "superadmin", "g1", 10_000) is None
+    assert await budget.reserve("u2", "user", "g1", 30) is None
+    await budget.settle("u2", "user", "g1", 30, 0)
+    assert await budget.remaining("user", "u2") == 100
+    usage = budget.usage()
+    assert usage["consumers"][0] == {
+        "key": "user:u1", "tokens": 90, "requests": 1, "tokens_this_minute": 90
+    }
+
+
+@pytest.mark.asyncio
+async def test_ask_endpoint_charges_reported_usage(async_client):
+    import ai_gateway.routers.ask as ask_router
+    from ai_gateway.token_budget import TokenBudget
+    from ai_gateway.tokens import record_usage
+
+    budget = TokenBudget(InMemoryRateLimitBackend(max_keys=10), user_tpm=1000)
+
+    async def fake_ask(prompt, history=None):
+        record_usage("openai", 12, 30)
+        return "hi"
+
+    async def noop_log_audit_event(*args, **kwargs):
+        return None
+
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="user")), \
+         patch.object(ask_router, "token_budget", new=budget), \
+         patch.object(ask_router, "log_audit_event", new=noop_log_audit_event), \
+         patch.object(ask_router, "generate", new=fake_ask):
+        resp = await async_client.post(
+            "/ask",
+            json={"message": "Hello!"},
+            headers={"x-discord-user-id": "tpm-user", "x-discord-username": "tester"},
+        )
+    assert resp.status_code == 200
+    # The estimate reserved up front was replaced by the 42 tokens the provider reported.
+    assert budget.usage()["consumers"][0]["tokens"] == 42
+    assert await budget.remaining("user", "tpm-user") == 958
+
+
+@pytest.mark.asyncio
+async def test_admin_usage_sizes_user_bucket_by_role(async_client):
+    import ai_gateway.routers.admin as admin_router
+    from ai_gateway.token_budget import TokenBudget
+
+    budget = TokenBudget(InMemoryRateLimitBackend(max_keys=10), user_tpm=1000, role_tpm={"admin": 5000})
+    with patch("ai_gateway.decorators.get_user_role", new=AsyncMock(return_value="admin")), \
+         patch.object(admin_router, "get_user_role", new=AsyncMock(return_value="admin")) as lookup, \
+         patch.object(admin_router, "token_budget", new=budget):
+        resp = await async_client.get(
+            "/admin/usage?user=someone",
+            headers={"x-discord-user-id": "admin", "x-discord-username": "adminuser"},
+        )
+    assert resp.status_code == 200
+    assert resp.json()["user_remaining"] == 5000
+    lookup.assert_awaited_once_with("someone")
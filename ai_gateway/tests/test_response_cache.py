@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from ai_gateway.redis_client import RedisClient
+from ai_gateway.response_cache import (InMemoryCacheBackend, RedisCacheBackend,
+                                       ResponseCache, cache_key)
+
+
+class FakeRedisServer:
+    """Tiny RESP server supporting the commands the cache backend uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+
+    async def handle(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int((await reader.readline())[1:-2])
+                args.append((await reader.readexactly(length + 2))[:-2].decode())
+            writer.write(self.dispatch(args[0].upper(), args[1:]))
+            await writer.drain()
+        writer.close()
+
+    def dispatch(self, cmd, args):
+        if cmd == "GET":
+            value = self.data.get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value.encode()), value.encode())
+        if cmd == "SET":
+            self.data[args[0]] = args[1]
+            return b"+OK\r\n"
+        if cmd == "SADD":
+            self.sets.setdefault(args[0], set()).update(args[1:])
+            return b":1\r\n"
+        if cmd == "SMEMBERS":
+            members = sorted(self.sets.get(args[0], set()))
+            return b"*%d\r\n" % len(members) + b"".join(b"$%d\r\n%s\r\n" % (len(m), m.encode()) for m in members)
+        if cmd == "DEL":
+            removed = sum(1 for k in args if self.data.pop(k, None) is not None or self.sets.pop(k, None) is not None)
+            return b":%d\r\n" % removed
+        if cmd == "PEXPIRE":
+            return b":1\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+def test_cache_key_normalizes_prompt():
+    params = {"model": "gpt-4", "temperature": 0.0}
+    assert cache_key("openai", params, None, "What  can you DO?") == cache_key("openai", params, None, " what can you do? ")
+    assert cache_key("openai", params, "pirate", "hi") != cache_key("openai", params, None, "hi")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_lru_ttl_and_tags():
+    backend = InMemoryCacheBackend(max_entries=2)
+    await backend.set("a", "A", 60, ["OPENAI_MODEL"])
+    await backend.set("b", "B", 60, ["MISTRAL_MODEL"])
+    await backend.get("a")
+    await backend.set("c", "C", 60, ["OPENAI_MODEL"])
+    assert await backend.get("b") is None  # least recently used evicted
+    assert await backend.invalidate_tag("OPENAI_MODEL") == 2
+    assert await backend.get("a") is None
+
+    await backend.set("d", "D", 0, [])
+    assert await backend.get("d") is None  # expired
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_against_fake_server():
+    fake = FakeRedisServer()
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = RedisClient(f"redis://127.0.0.1:{port}/0")
+    cache = ResponseCache(RedisCacheBackend(client), ttl=60, max_temperature=0.0)
+    try:
+        assert await cache.get("k") is None
+        await cache.set("k", "cached reply", ["AI_PERSONALITY"])
+        assert await cache.get("k") == "cached reply"
+        await cache.invalidate_config_key("AI_PERSONALITY")
+        assert await cache.get("k") is None
+        assert cache.stats()["hits"] == 1
+    finally:
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_ask_serves_repeat_prompts_from_cache():
+    import ai_gateway.providers as providers
+    from ai_gateway.supabase_config import build_config_snapshot
+
+    config = build_config_snapshot({"AI_PROVIDER": "mistral", "MISTRAL_TEMPERATURE": "0"})
+    upstream = AsyncMock(return_value="I can answer questions.")
+    cache = ResponseCache(InMemoryCacheBackend(10), ttl=60, max_temperature=0.0)
+    with patch.object(providers, "get_config_snapshot", new=AsyncMock(return_value=config)), \
+         patch.object(providers.registry.get("mistral"), "complete", new=upstream), \
+         patch.object(providers, "response_cache", new=cache):
+        assert await providers.ask("What can you do?") == "I can answer questions."
+        assert await providers.ask("what can you  do?") == "I can answer questions."
+    assert upstream.await_count == 1
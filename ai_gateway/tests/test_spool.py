@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_spool_replays_in_order_after_outage_and_restart(tmp_path):
+    import ai_gateway.spool as spool_module
+
+    supabase = MagicMock()
+    upsert = supabase.table.return_value.upsert
+    with patch.object(spool_module, "supabase", new=supabase):
+        spool = spool_module.Spool(str(tmp_path), segment_max_bytes=200, replay_batch=3, replay_interval=60)
+        assert spool.append("audit_log", [{"event_id": "a"}, {"event_id": "b"}])
+        assert spool.append("bot_logs", [{"event_id": "c"}])
+        assert spool.append("audit_log", [{"event_id": "d"}])
+        assert spool.stats()["segments"] > 1 and spool.stats()["oldest_age_seconds"] >= 0
+
+        # Still down: nothing is lost.
+        upsert.return_value.execute.side_effect = RuntimeError("down")
+        assert not await spool.replay()
+        assert spool.depth == 4
+
+        # A restart after a torn write keeps every complete record.
+        await spool.stop()
+        segments = sorted(tmp_path.glob("*.log"))
+        with open(segments[-1], "ab") as f:
+            f.write(b'{"id": "torn')
+        spool = spool_module.Spool(str(tmp_path), segment_max_bytes=200, replay_batch=3, replay_interval=60)
+        await spool.start()
+        assert spool.depth == 4
+        upsert.return_value.execute.side_effect = None
+        assert await spool.replay()
+        await spool.stop()
+
+    # One failed attempt, then each run of one table exactly once, in order.
+    assert upsert.call_count == 4
+    tables = [call.args[0] for call in supabase.table.call_args_list[-3:]]
+    batches = [[row["event_id"] for row in call.args[0]] for call in upsert.call_args_list[-3:]]
+    assert tables == ["audit_log", "bot_logs", "audit_log"]
+    assert batches == [["a", "b"], ["c"], ["d"]]
+    assert upsert.call_args.kwargs == {"on_conflict": "event_id", "ignore_duplicates": True}
+    assert spool.depth == 0 and len(list(tmp_path.glob("*.log"))) <= 1
@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import ai_gateway.supabase_config as supabase_config
+
+
+@pytest.fixture(autouse=True)
+def reset_snapshot():
+    supabase_config.invalidate_config_snapshot()
+    yield
+    supabase_config.invalidate_config_snapshot()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_loads_once_and_parses_types():
+    rows = {"AI_PROVIDER": "mistral", "OPENAI_TEMPERATURE": "0.2", "OPENAI_MAX_TOKENS": "256"}
+    loader = AsyncMock(return_value=rows)
+    with patch.object(supabase_config, "_load_config_rows", new=loader):
+        first = await supabase_config.get_config_snapshot()
+        second = await supabase_config.get_config_snapshot()
+    assert first is second
+    assert loader.await_count == 1
+    assert first.ai_provider == "mistral"
+    assert first.openai_temperature == 0.2
+    assert first.openai_max_tokens == 256
+
+
+@pytest.mark.asyncio
+async def test_snapshot_falls_back_on_bad_values_and_load_errors():
+    with patch.object(supabase_config, "_load_config_rows", new=AsyncMock(return_value={"OPENAI_TOP_P": "high"})):
+        snapshot = await supabase_config.get_config_snapshot()
+    assert snapshot.openai_top_p == 1.0
+
+    supabase_config.invalidate_config_snapshot()
+    with patch.object(supabase_config, "_load_config_rows", new=AsyncMock(side_effect=RuntimeError("down"))):
+        snapshot = await supabase_config.get_config_snapshot()
+    assert snapshot.ai_provider
+    assert supabase_config.config_snapshot_stats()["load_errors"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_retries_failed_load_soon_and_skips_stale_reloads():
+    import asyncio
+
+    failing = AsyncMock(side_effect=RuntimeError("down"))
+    with patch.object(supabase_config, "_load_config_rows", new=failing), \
+         patch.object(supabase_config.settings, "CONFIG_CACHE_ERROR_TTL_SECONDS", 0):
+        await supabase_config.get_config_snapshot()
+        await supabase_config.get_config_snapshot()
+    assert failing.await_count == 2
+
+    # An invalidation during a reload means the reload read older rows: serve, don't cache.
+    supabase_config.invalidate_config_snapshot()
+    release = asyncio.Event()
+
+    async def slow_load():
+        await release.wait()
+        return {"AI_PROVIDER": "openai"}
+
+    with patch.object(supabase_config, "_load_config_rows", new=slow_load):
+        reload = asyncio.create_task(supabase_config.get_config_snapshot())
+        await asyncio.sleep(0)
+        supabase_config.invalidate_config_snapshot()
+        release.set()
+        assert (await reload).ai_provider == "openai"
+    assert supabase_config._snapshot is None
+
+
+@pytest.mark.asyncio
+async def test_set_config_invalidates_snapshot():
+    with patch.object(supabase_config, "_load_config_rows", new=AsyncMock(return_value={})):
+        await supabase_config.get_config_snapshot()
+    with patch.object(supabase_config, "supabase"):
+        await supabase_config.set_config("AI_PROVIDER", "anthropic")
+    assert supabase_config._snapshot is None
+
+
+@pytest.mark.asyncio
+async def test_set_config_accepts_custom_provider_keys():
+    from ai_gateway.llm.registry import ProviderRegistry
+
+    providers = ProviderRegistry()
+    providers.load_custom('{"local": {"base_url": "http://ollama:11434/v1", "model": "llama3"}}')
+    with patch("ai_gateway.llm.registry", new=providers), patch.object(supabase_config, "supabase"):
+        await supabase_config.set_config("LOCAL_MODEL", "llama3.1")
+        with pytest.raises(ValueError):
+            await supabase_config.set_config("REMOTE_MODEL", "x")
+
+
+@pytest.mark.asyncio
+async def test_config_bus_invalidates_other_replicas_once_per_version():
+    from ai_gateway.config_bus import ConfigBus, LocalConfigTransport
+
+    feed = LocalConfigTransport()
+    applied = {"a": [], "b": []}
+
+    async def apply_a(key):
+        applied["a"].append(key)
+
+    async def apply_b(key):
+        applied["b"].append(key)
+
+    replica_a = ConfigBus(feed, apply=apply_a, load_version=AsyncMock(return_value=4))
+    replica_b = ConfigBus(feed, apply=apply_b, load_version=AsyncMock(return_value=4))
+    await replica_a.start()
+    await replica_b.start()
+
+    change = await replica_a.publish("AI_PROVIDER", 7)
+    # The database trigger announces the same row version again.
+    await feed.publish(change)
+
+    assert applied == {"a": ["AI_PROVIDER"], "b": ["AI_PROVIDER"]}
+    assert replica_a.stats()["version"] == replica_b.stats()["version"] == 7
+    assert replica_b.stats()["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_set_config_publishes_row_version():
+    supabase = MagicMock()
+    supabase.table.return_value.upsert.return_value.execute.return_value.data = [
+        {"key": "AI_PROVIDER", "value": "mistral", "version": 42}
+    ]
+    with patch.object(supabase_config, "supabase", new=supabase), \
+         patch.object(supabase_config.config_bus, "publish", new=AsyncMock()) as publish:
+        await supabase_config.set_config("AI_PROVIDER", "mistral")
+    publish.assert_awaited_once_with("AI_PROVIDER", 42)
+
+
+@pytest.mark.asyncio
+async def test_role_cache_serves_hits_and_follows_role_changes():
+    import ai_gateway.supabase_roles as supabase_roles
+    from ai_gateway.config_bus import ConfigChange
+
+    supabase_roles.role_cache.invalidate("*")
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.eq.return_value.execute
+    query.return_value.data = [{"role": "admin"}]
+    with patch.object(supabase_roles, "supabase", new=supabase):
+        assert await supabase_roles.get_user_role("42") == "admin"
+        assert await supabase_roles.get_user_role("42") == "admin"
+        assert query.call_count == 1
+
+        # A role change announced by another replica drops the entry.
+        query.return_value.data = [{"role": "user"}]
+        await supabase_config.config_bus._receive(ConfigChange(key="role:42", version=0, origin="other"))
+        assert await supabase_roles.get_user_role("42") == "user"
+        assert query.call_count == 2
+
+        # Unknown users are cached as guest; set_user_role invalidates immediately.
+        query.return_value.data = []
+        assert await supabase_roles.get_user_role("7") == "guest"
+        assert await supabase_roles.get_user_role("7") == "guest"
+        assert query.call_count == 3
+        query.return_value.data = [{"role": "admin"}]
+        await supabase_roles.set_user_role("7", "someone", "admin")
+        assert await supabase_roles.get_user_role("7") == "admin"
+    assert supabase_roles.role_cache.stats()["hits"] >= 2
@@ -0,0 +1,130 @@
+"""
+Verified dashboard access tokens.
+
+Access tokens minted by ai_gateway.auth carry the user's role and are short-lived
+(ACCESS_TOKEN_EXPIRE_MINUTES), so a request presenting a valid one is authorized from its
+claims alone, with no role lookup. Verified payloads are kept in a bounded LRU keyed by the
+token's SHA-256, so repeat requests skip signature checks as well.
+
+A role change (set_user_role, announced on the config bus) or a logout advances the user's
+revocation epoch: tokens issued before it are refused and the dashboard has to refresh,
+which re-reads the role. A bus resync advances every user's epoch. Epochs live in memory,
+so a restarted process only knows revocations it has seen since; the token lifetime bounds
+that window.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ai_gateway.config_bus import ALL_KEYS
+from ai_gateway.metrics import metrics
+from ai_gateway.settings import settings
+from ai_gateway.supabase_config import config_bus
+from ai_gateway.supabase_roles import ROLE_CHANGE_PREFIX
+from fastapi import Request
+from jose import jwt
+
+JWT_SECRET = os.getenv("JWT_SECRET", "changeme")
+JWT_ISSUER = "ai-discord-bot"
+JWT_ALGORITHM = "HS256"
+JWT_COOKIE_NAME = "ai_dash_token"
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token payloads, keyed by token hash and dropped at token expiry.
+
+    Methods:
+        verify(token): The token's claims if it is valid and not revoked, else None.
+        revoke(user_id): Refuse the user's tokens issued up to now (ALL_KEYS for everyone).
+        stats(): Hit, miss, rejection and revocation counts.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._epochs: dict[str, float] = {}
+        self.counts = {"hits": 0, "misses": 0, "rejected": 0, "revoked": 0, "revocations": 0}
+
+    def revoke(self, user_id: str) -> None:
+        # Whole seconds, like `iat`: a token re-issued right after a revocation stays valid.
+        self._epochs[user_id] = int(time.time())
+        self.counts["revocations"] += 1
+
+    def _revoked(self, claims: dict[str, Any]) -> bool:
+        issued_at = claims.get("iat") or 0
+        epoch = max(self._epochs.get(claims["sub"], 0), self._epochs.get(ALL_KEYS, 0))
+        return issued_at < epoch
+
+    def _decode(self, token: str) -> Optional[dict[str, Any]]:
+        try:
+            claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], issuer=JWT_ISSUER)
+        except Exception as e:
+            logging.info(f"[TokenAuth] Rejected access token: {e}")
+            return None
+        if claims.get("type", "access") != "access" or not all(
+            claims.get(claim) for claim in ("sub", "role", "exp")
+        ):
+            return None
+        return claims
+
+    def verify(self, token: str) -> Optional[dict[str, Any]]:
+        key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._entries.get(key)
+        if claims is not None and claims["exp"] > time.time():
+            self._entries.move_to_end(key)
+            self.counts["hits"] += 1
+        else:
+            self._entries.pop(key, None)
+            self.counts["misses"] += 1
+            claims = self._decode(token)
+            if claims is None:
+                self.counts["rejected"] += 1
+                metrics.incr("token_auth", result="rejected")
+                return None
+            if self.max_entries > 0:
+                self._entries[key] = claims
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if self._revoked(claims):
+            self.counts["revoked"] += 1
+            metrics.incr("token_auth", result="revoked")
+            return None
+        metrics.incr("token_auth", result="ok")
+        return claims
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counts, "entries": len(self._entries), "epochs": len(self._epochs)}
+
+
+#: Process-wide cache of verified dashboard tokens.
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+async def _on_role_change(user_id: str) -> None:
+    verified_tokens.revoke(user_id)
+
+
+config_bus.add_handler(ROLE_CHANGE_PREFIX, _on_role_change)
+
+
+def token_from_request(request: Request) -> Optional[str]:
+    """
+    The dashboard access token from the auth cookie or an Authorization: Bearer header.
+    """
+    token = request.cookies.get(JWT_COOKIE_NAME) or request.headers.get("authorization")
+    if token and token.startswith("Bearer "):
+        token = token.split(" ", 1)[1]
+    return token or None
+
+
+def request_claims(request: Request) -> Optional[dict[str, Any]]:
+    """
+    Verified claims (sub, username, role, ...) of the request's access token, or None.
+    """
+    token = token_from_request(request)
+    return verified_tokens.verify(token) if token else None
@@ -0,0 +1,193 @@
+"""
+Tokens-per-minute budgets per Discord user and guild.
+
+Before a request is dispatched, the estimated prompt size is reserved from the user's
+bucket (and the guild's, when TOKEN_BUDGET_GUILD_TPM is set); the request is refused if
+the bucket cannot cover it. Once the provider has answered, the reservation is replaced by
+the usage the provider actually reported, so long replies are charged in full and cache
+hits or coalesced requests cost nothing. Buckets reuse the rate-limit backends, so
+RATE_LIMIT_URL shares them between replicas.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+from ai_gateway.rate_limit import (EXEMPT_ROLES, BaseRateLimitBackend,
+                                   InMemoryRateLimitBackend, Rate,
+                                   RateLimitResult, RedisRateLimitBackend,
+                                   retry_after)
+from ai_gateway.redis_client import RedisClient
+from ai_gateway.settings import settings
+
+
+def parse_role_budgets(spec: str) -> dict[str, int]:
+    """
+    Parse "role=tokens,role=tokens" into a mapping of role to tokens per minute.
+    """
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        role, _, tokens = item.partition("=")
+        budgets[role.strip()] = int(tokens)
+    return budgets
+
+
+class TokenBudget:
+    """
+    Per-user (per-role) and optional per-guild tokens-per-minute budgets.
+    Keeps in-process consumption totals per user and guild for the admin usage view.
+    A budget of 0 means unlimited. Backend failures are logged and the request is allowed.
+    """
+
+    def __init__(
+        self,
+        backend: BaseRateLimitBackend,
+        user_tpm: int,
+        role_tpm: Optional[dict[str, int]] = None,
+        guild_tpm: int = 0,
+        max_tracked: int = 1000,
+    ) -> None:
+        self.backend = backend
+        self.user_tpm = user_tpm
+        self.role_tpm = role_tpm or {}
+        self.guild_tpm = guild_tpm
+        self.max_tracked = max_tracked
+        self.counts = {"allowed": 0, "limited": 0, "errors": 0}
+        self._consumption: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    @classmethod
+    def from_settings(cls) -> "TokenBudget":
+        """
+        Build the budgets configured by TOKEN_BUDGET_* settings.
+        """
+        if settings.RATE_LIMIT_URL:
+            backend: BaseRateLimitBackend = RedisRateLimitBackend(
+                RedisClient(settings.RATE_LIMIT_URL), prefix="ai_gateway:tpm:"
+            )
+        else:
+            backend = InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+        return cls(
+            backend,
+            user_tpm=settings.TOKEN_BUDGET_USER_TPM,
+            role_tpm=parse_role_budgets(settings.TOKEN_BUDGET_ROLES),
+            guild_tpm=settings.TOKEN_BUDGET_GUILD_TPM,
+        )
+
+    def _buckets(
+        self, user_id: str, role: Optional[str], guild_id: Optional[str]
+    ) -> list[tuple[str, str, Rate]]:
+        if role in EXEMPT_ROLES:
+            return []
+        buckets = []
+        user_tpm = self.role_tpm.get(role or "", self.user_tpm)
+        if user_tpm > 0:
+            buckets.append(("user", f"user:{user_id}", Rate(user_tpm, 60)))
+        if self.guild_tpm > 0 and guild_id:
+            buckets.append(("guild", f"guild:{guild_id}", Rate(self.guild_tpm, 60)))
+        return buckets
+
+    async def reserve(
+        self, user_id: str, role: Optional[str], guild_id: Optional[str], tokens: int
+    ) -> Optional[RateLimitResult]:
+        """
+        Reserve an estimated `tokens` for a request. Returns a refusal result if a budget
+        is exhausted, otherwise None. A prompt larger than the whole budget is admitted
+        when the bucket is full and leaves the bucket in debt.
+        """
+        reserved: list[tuple[str, Rate]] = []
+        for scope, key, rate in self._buckets(user_id, role, guild_id):
+            cost = min(tokens, rate.capacity)
+            try:
+                allowed, left = await self.backend.take(key, rate, cost)
+                if allowed and cost < tokens:
+                    await self.backend.take(key, rate, tokens - cost, force=True)
+            except Exception as e:
+                self.counts["errors"] += 1
+                logging.warning(f"[TokenBudget] Backend error, allowing request: {e}")
+                continue
+            if not allowed:
+                # Give back what the other scopes already reserved.
+                for other_key, other_rate in reserved:
+                    await self._adjust(other_key, other_rate, -tokens)
+                self.counts["limited"] += 1
+                metrics.incr("token_budget_requests", result="limited", scope=scope)
+                return RateLimitResult(False, rate.capacity, 0, retry_after(rate, cost, left), scope)
+            reserved.append((key, rate))
+        self.counts["allowed"] += 1
+        return None
+
+    async def settle(
+        self,
+        user_id: str,
+        role: Optional[str],
+        guild_id: Optional[str],
+        reserved: int,
+        actual: int,
+    ) -> None:
+        """
+        Replace a reservation with the tokens actually consumed and record consumption.
+        """
+        for _, key, rate in self._buckets(user_id, role, guild_id):
+            await self._adjust(key, rate, actual - reserved)
+        self._track(f"user:{user_id}", actual)
+        if guild_id:
+            self._track(f"guild:{guild_id}", actual)
+        metrics.incr("token_budget_tokens", actual)
+
+    async def _adjust(self, key: str, rate: Rate, delta: int) -> None:
+        if not delta:
+            return
+        try:
+            await self.backend.take(key, rate, delta, force=True)
+        except Exception as e:
+            self.counts["errors"] += 1
+            logging.warning(f"[TokenBudget] Could not adjust {key}: {e}")
+
+    def _track(self, key: str, tokens: int) -> None:
+        now = time.time()
+        entry = self._consumption.pop(key, None)
+        if entry is None:
+            entry = {"tokens": 0, "requests": 0, "minute_start": now, "tokens_this_minute": 0}
+        if now - entry["minute_start"] >= 60:
+            entry["minute_start"] = now
+            entry["tokens_this_minute"] = 0
+        entry["tokens"] += tokens
+        entry["requests"] += 1
+        entry["tokens_this_minute"] += tokens
+        self._consumption[key] = entry
+        while len(self._consumption) > self.max_tracked:
+            self._consumption.popitem(last=False)
+
+    async def remaining(self, scope: str, ident: str, role: Optional[str] = None) -> Optional[int]:
+        """
+        Tokens currently left in a user's or guild's bucket, or None if it has no budget.
+        """
+        tpm = self.role_tpm.get(role or "", self.user_tpm) if scope == "user" else self.guild_tpm
+        if tpm <= 0:
+            return None
+        _, left = await self.backend.take(f"{scope}:{ident}", Rate(tpm, 60), 0)
+        return int(left)
+
+    def usage(self, top: int = 50) -> dict[str, Any]:
+        """
+        In-process consumption per user and guild, heaviest first.
+        """
+        rows = sorted(self._consumption.items(), key=lambda kv: kv[1]["tokens"], reverse=True)
+        return {
+            "budgets": {
+                "user_tpm": self.user_tpm,
+                "role_tpm": self.role_tpm,
+                "guild_tpm": self.guild_tpm,
+            },
+            "consumers": [
+                {"key": key, **{k: v for k, v in entry.items() if k != "minute_start"}}
+                for key, entry in rows[:top]
+            ],
+            **self.counts,
+        }
+
+
+#: Process-wide tokens-per-minute budgets.
+token_budget = TokenBudget.from_settings()
@@ -0,0 +1,82 @@
+"""
+Token estimation and per-request usage accounting.
+
+estimate_tokens() uses a tiktoken encoding when the optional `tiktoken` package is installed
+(encodings are loaded once per model and cached) and falls back to a characters-per-token
+heuristic otherwise. Providers report the usage returned by the upstream API through
+record_usage(), which adds it to the TokenUsage bound to the current request, if any.
+"""
+
+import functools
+import logging
+import math
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ai_gateway.metrics import metrics
+
+#: Rough characters per token for English text, used when no tokenizer is available.
+CHARS_PER_TOKEN = 4
+
+#: Encoding used for models tiktoken does not recognise.
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@functools.lru_cache(maxsize=16)
+def _encoding(model: Optional[str]) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logging.warning(f"[Tokens] Could not load tokenizer for {model}: {e}")
+        return None
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Estimate the number of tokens in text for the given model.
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class TokenUsage:
+    """
+    Tokens consumed upstream on behalf of one request.
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+#: Usage accumulator for the request being served; set by the endpoint.
+current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_usage", default=None)
+
+
+def record_usage(provider: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """
+    Record usage reported by a provider against the current request and the metrics registry.
+    """
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+    metrics.incr("llm_tokens", prompt_tokens, provider=provider, kind="prompt")
+    metrics.incr("llm_tokens", completion_tokens, provider=provider, kind="completion")
+    usage = current_usage.get()
+    if usage is not None:
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
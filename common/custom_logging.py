@@ -37,11 +37,14 @@ except Exception as e:
 
 # --- Supabase logging handler ---
 try:
+    from ai_gateway.spool import spool
     from ai_gateway.supabase_client import supabase
 except ImportError:
+    spool = None
     supabase = None
 
 import asyncio
+import uuid
 
 
 class SupabaseLogHandler(logging.Handler):
@@ -49,7 +52,9 @@ class SupabaseLogHandler(logging.Handler):
     Async logging handler for Supabase. Uses asyncio.to_thread to avoid blocking the event loop.
 
     This handler logs messages to Supabase asynchronously, ensuring that the event loop remains unblocked.
-    If Supabase is not available, the handler will silently ignore the log message.
+    If Supabase is not configured, the handler will silently ignore the log message. Records that
+    cannot be written (or arrive while earlier ones are spooled) go to the local spool and are
+    replayed once Supabase recovers.
     """
 
     def emit(self, record: logging.LogRecord) -> None:
@@ -88,20 +93,24 @@ class SupabaseLogHandler(logging.Handler):
             username: The username of the user.
             action: The action performed.
         """
+        row = {
+            "event_id": uuid.uuid4().hex,
+            "timestamp": datetime.utcnow().isoformat(),
+            "user_id": user_id,
+            "username": username,
+            "action": action,
+        }
+        if spool is not None and spool.depth:
+            # Behind the rows already spooled, to keep their order.
+            if await asyncio.to_thread(spool.append, "bot_logs", [row]):
+                return
         try:
             await asyncio.to_thread(
-                lambda: supabase.table("bot_logs")
-                .insert(
-                    {
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "user_id": user_id,
-                        "username": username,
-                        "action": action,
-                    }
-                )
-                .execute()
+                lambda: supabase.table("bot_logs").insert(row).execute()
             )
         except Exception as e:
+            if spool is not None and await asyncio.to_thread(spool.append, "bot_logs", [row]):
+                return
             print(
                 f"[SupabaseLogHandler] Async log to Supabase failed: {e}",
                 file=sys.stderr,
@@ -2,6 +2,7 @@ import asyncio
 from typing import Tuple
 
 from ai_gateway.supabase_roles import get_user_role
+from ai_gateway.token_auth import request_claims
 from fastapi import HTTPException, Request
 
 # Re-export get_user_role for compatibility
@@ -12,6 +13,7 @@ __all__ = ["get_user_role", "get_user_id_and_role"]
 async def get_user_id_and_role(request: Request) -> Tuple[str, str]:
     """
     Dependency to extract user_id and role from request headers.
+    A valid dashboard access token is trusted instead, without a role lookup.
 
     Args:
         request (Request): The FastAPI request object.
@@ -22,6 +24,9 @@ async def get_user_id_and_role(request: Request) -> Tuple[str, str]:
     Raises:
         HTTPException: If the user_id is missing from the headers.
     """
+    claims = request_claims(request)
+    if claims is not None:
+        return claims["sub"], claims["role"]
     user_id = request.headers.get("X-User-ID")
     if not user_id:
         raise HTTPException(
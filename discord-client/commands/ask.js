@@ -1,41 +1,49 @@
-// Ask command handler with persistent memory integration
-const { getUserContext, setUserContext } = require('../memory');
+// Ask command handler with streamed replies
+// The gateway keeps the conversation (recent turns plus a rolling summary) per user or channel.
+const streamAsk = require('../utils/streamAsk');
+
+const DISCORD_MESSAGE_LIMIT = 2000;
+// How long we wait for a reply; the gateway abandons the request at the same deadline.
+const ASK_TIMEOUT_MS = Number(process.env.ASK_TIMEOUT_MS) || 60000;
 
 module.exports = async function handleAskCommand(message, args, axios, logger, getDiscordHeaders, formatErrorReply) {
   const userId = message.author.id;
   const input = args.join(' ');
 
-  // 1. Load conversation history (if any)
-  let history = [];
-  try {
-    const mem = await getUserContext(userId, 'conversation_history');
-    if (mem && mem.value) {
-      history = JSON.parse(mem.value);
-    }
-  } catch (e) {
-    logger.warn(`No prior conversation history for user ${userId}`);
-  }
-
-  // 2. Send message and history to AI gateway
+  // 1. Stream the reply from the AI gateway, editing one Discord message as text arrives.
+  // The gateway coalesces tokens so edits stay within Discord's rate limits.
   try {
-    const response = await axios.post('http://ai-gateway:8000/ask', {
-      message: input,
-      history
-    }, { headers: getDiscordHeaders(message) });
-    logger.info(`AI Gateway /ask response: ${JSON.stringify(response.data)}`);
-    const replyText = response.data.reply;
-    // 3. Update conversation history
-    const newHistory = [...history, { user: input, bot: replyText }].slice(-10); // keep last 10 exchanges
-    try {
-      await setUserContext(userId, 'conversation_history', JSON.stringify(newHistory));
-    } catch (setErr) {
-      logger.error(`setUserContext failed:`, setErr);
-      await message.reply(formatErrorReply(setErr, `\u274c Failed to save conversation history. ${setErr && setErr.stack || setErr}`));
-      return;
-    }
+    let streamMessage = null;
+    let shownText = '';
+    const replyText = await streamAsk(axios, 'http://ai-gateway:8000/ask/stream', {
+      message: input
+    }, getDiscordHeaders(message), async (text) => {
+      const preview = text.slice(0, DISCORD_MESSAGE_LIMIT);
+      if (!preview.trim() || preview === shownText) return;
+      try {
+        if (streamMessage) {
+          await streamMessage.edit(preview);
+        } else {
+          streamMessage = await message.reply(preview);
+        }
+        shownText = preview;
+      } catch (editErr) {
+        logger.warn(`Discord stream edit failed: ${editErr}`);
+      }
+    }, ASK_TIMEOUT_MS);
+    logger.info(`AI Gateway /ask/stream reply length: ${replyText.length} (user ${userId})`);
+    // 2. Send whatever did not fit in the streamed message
     try {
       if (replyText && replyText.trim().length > 0) {
-        const chunks = replyText.match(/.{1,2000}/gs) || [replyText];
+        // The first 2000 characters were streamed into streamMessage; send the rest as follow-ups.
+        const head = replyText.slice(0, DISCORD_MESSAGE_LIMIT);
+        if (!streamMessage) {
+          await message.reply(head);
+        } else if (shownText !== head) {
+          await streamMessage.edit(head);
+        }
+        const rest = replyText.slice(DISCORD_MESSAGE_LIMIT);
+        const chunks = rest.match(/.{1,2000}/gs) || [];
         for (const chunk of chunks) {
           await message.reply(chunk);
         }
@@ -46,6 +54,20 @@ module.exports = async function handleAskCommand(message, args, axios, logger, g
       logger.error(`Discord message.reply failed:`, replyErr);
     }
   } catch (err) {
+    // Our own deadline (request aborted) or the gateway's (504).
+    if ((err.response && err.response.status === 504) || ['CanceledError', 'AbortError', 'TimeoutError'].includes(err.name)) {
+      logger.warn(`AI gateway request timed out after ${ASK_TIMEOUT_MS}ms (user ${userId})`);
+      await message.reply('⏳ The AI took too long to answer. Please try again.');
+      return;
+    }
+    if (err.response && (err.response.status === 503 || err.response.status === 429)) {
+      // Gateway admission control (503) or per-user/guild rate limit (429).
+      const retryAfter = err.response.headers && err.response.headers['retry-after'];
+      logger.warn(`AI gateway returned ${err.response.status}; retry after ${retryAfter || '?'}s`);
+      const reason = err.response.status === 429 ? "You're sending requests too quickly." : 'The AI service is busy right now.';
+      await message.reply(`⏳ ${reason} Please try again${retryAfter ? ` in ${retryAfter} seconds` : ' shortly'}.`);
+      return;
+    }
     logger.error(`AI/ask failed:`, err);
     let errorDetails = '';
     if (err instanceof Error) {
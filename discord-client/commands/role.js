@@ -41,27 +41,28 @@ module.exports = async function handleRoleCommand(message, args, axios, logger,
         logger.error(`Failed to fetch all roles: ${err.message}`);
         await message.reply(formatErrorReply(err, '\u274c Failed to fetch all roles.'));
       }
-    } else if (args.length === 2) {
+    } else if (args.length >= 2) {
       if (!hasRole(userRole, 'admin')) {
         await message.reply('\u26d4 You must be admin or above to view roles.');
         return;
       }
-      // role show <@user>
-      const userMention = args[1];
-      const match = userMention.match(/^<@!?([0-9]+)>$/);
-      if (!match) {
-        await message.reply('Usage: `@bot role show <@user>` or `@bot role show all`');
+      // role show <@user> [<@user> ...] — resolved in one batch request
+      const matches = args.slice(1).map((mention) => mention.match(/^<@!?([0-9]+)>$/));
+      if (matches.some((match) => !match)) {
+        await message.reply('Usage: `@bot role show <@user> [<@user> ...]` or `@bot role show all`');
         return;
       }
-      const userId = match[1];
+      const userIds = matches.map((match) => match[1]);
       try {
-        const res = await axios.get(`http://ai-gateway:8000/acl/role/${userId}`, {
+        const res = await axios.post('http://ai-gateway:8000/acl/roles:batch', {
+          user_ids: userIds
+        }, {
           headers: getDiscordHeaders(message)
         });
-        const role = res.data.role;
-        await message.reply(`<@${userId}> has role: **${role}**`);
+        const roles = res.data.roles || {};
+        await message.reply(userIds.map((userId) => `<@${userId}> has role: **${roles[userId] || 'guest'}**`).join('\n'));
       } catch (err) {
-        logger.error(`Failed to fetch user role: ${err.message}`);
+        logger.error(`Failed to fetch user roles: ${err.message}`);
         await message.reply(formatErrorReply(err, '\u274c Failed to fetch user role.'));
       }
     } else {
@@ -97,7 +98,7 @@ module.exports = async function handleRoleCommand(message, args, axios, logger,
   } else {
     const usage = [
       '**Role Command Usage:**',
-      '`@bot role show <@user>` — Show user role (admin only)',
+      '`@bot role show <@user> [<@user> ...]` — Show user roles (admin only)',
       '`@bot role show all` — List all roles (admin only)',
       '`@bot role set <@user> <role>` — Set user role (superadmin only)',
     ].join('\n');
@@ -1,8 +1,13 @@
 // Discord headers utility
 module.exports = function getDiscordHeaders(message) {
-  return {
+  const headers = {
     'X-User-ID': message.author.id,
     'X-Discord-User-ID': message.author.id,
     'X-Discord-Username': message.author.username
   };
+  // Lets the gateway apply per-guild rate limits; absent for DMs.
+  if (message.guild) headers['X-Discord-Guild-ID'] = message.guild.id;
+  // Lets the gateway keep one conversation per channel when configured to.
+  if (message.channel) headers['X-Discord-Channel-ID'] = message.channel.id;
+  return headers;
 };
@@ -0,0 +1,38 @@
+// Streaming /ask client: reads Server-Sent Events from the AI gateway
+// Calls onText(fullText) each time the gateway flushes a delta and resolves with the final text.
+// With timeoutMs, the request is aborted after that long and the gateway is told the same
+// deadline (X-Request-Timeout-Ms), so it stops working on the reply when we stop waiting.
+module.exports = async function streamAsk(axios, url, payload, headers, onText, timeoutMs) {
+  const options = { headers: { ...headers }, responseType: 'stream' };
+  if (timeoutMs) {
+    options.headers['X-Request-Timeout-Ms'] = String(timeoutMs);
+    options.signal = AbortSignal.timeout(timeoutMs);
+  }
+  const response = await axios.post(url, payload, options);
+  let buffer = '';
+  let fullText = '';
+  for await (const chunk of response.data) {
+    buffer += chunk.toString('utf8');
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      const parsed = data ? JSON.parse(data) : {};
+      if (event === 'delta') {
+        fullText += parsed.text || '';
+        await onText(fullText);
+      } else if (event === 'error') {
+        throw new Error(parsed.error || 'AI stream error');
+      } else if (event === 'done') {
+        return fullText;
+      }
+    }
+  }
+  return fullText;
+};
@@ -1,5 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from mcp_server import router
 
-app = FastAPI()
+from ai_gateway.policy import policy
+from ai_gateway.spool import spool
+from ai_gateway.supabase_config import config_bus
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Follow config changes made by gateway replicas (and vice versa).
+    await config_bus.start()
+    await policy.reload()
+    # Replays bot_logs rows spooled during a Supabase outage.
+    await spool.start()
+    yield
+    await spool.stop()
+    await config_bus.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(router.router)
@@ -1,8 +1,14 @@
 from datetime import datetime
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
-from ai_gateway.supabase_config import get_all_config, get_config, set_config
-from fastapi import APIRouter, Depends, HTTPException, Request
+from ai_gateway.audit import audit_log_page, parse_columns
+from ai_gateway.config_etag import config_not_modified
+from ai_gateway.policy import policy
+from ai_gateway.settings import settings
+from ai_gateway.supabase_config import (get_all_config, get_config,
+                                        get_config_snapshot, set_config)
+from ai_gateway.token_auth import request_claims
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from common.custom_logging import log_action
 from config_engine.access import get_user_role
@@ -16,9 +22,13 @@ from fastapi import Depends
 async def get_user_id_and_role(request: Request) -> Tuple[str, str]:
     """
     Dependency to extract user_id and role from request headers.
+    A valid dashboard access token is trusted instead, without a role lookup.
     Raises HTTPException if missing or not authorized.
     Returns a tuple of (user_id, role).
     """
+    claims = request_claims(request)
+    if claims is not None:
+        return claims["sub"], claims["role"]
     user_id = request.headers.get("X-User-ID")
     if not user_id:
         raise HTTPException(
@@ -33,8 +43,7 @@ async def api_get_all_roles(user_and_role: Tuple[str, str] = Depends(get_user_id
     List all roles and their users. Admin/superadmin only.
     """
     user_id, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(status_code=403, detail="Unauthorized: admin or superadmin role required")
+    policy.require("get_all_roles", role)
     from ai_gateway.supabase_roles import get_all_roles
     result = await get_all_roles()
     await log_action(user_id, "get_all_roles", {"timestamp": datetime.utcnow().isoformat()})
@@ -50,23 +59,29 @@ async def healthz() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+MCP_ACTIONS = [
+    {"name": "get_all_roles", "description": "List all roles and their users", "parameters": {}},
+    {"name": "get_user_role", "description": "Get the role for a specific user", "parameters": {"user_id": "string"}},
+    {"name": "set_user_role", "description": "Set a user's role", "parameters": {"user_id": "string", "role": "string"}},
+    {"name": "get_config", "description": "Show all config values", "parameters": {}},
+    {"name": "get_config_key", "description": "Show value for a config key", "parameters": {"key": "string"}},
+    {"name": "set_config", "description": "Set a config value", "parameters": {"key": "string", "value": "string"}},
+    {"name": "delete_config", "description": "Delete a config key", "parameters": {"key": "string"}},
+    {"name": "list_config_keys", "description": "List all config keys", "parameters": {}},
+    {"name": "config_help", "description": "Show config help or help for a specific key", "parameters": {"key": "string (optional)"}},
+    {"name": "get_audit_log", "description": "Show audit log entries", "parameters": {"limit": "int (default 10)"}},
+    {"name": "help", "description": "Show help for a command", "parameters": {"command": "string (optional)"}},
+]
+
+
 @router.get("/mcp/actions")
 async def mcp_list_actions():
     """
     List all available MCP actions and their schemas for discovery by clients.
+    Permissions are the roles the policy currently allows for each action.
     """
     return [
-        {"name": "get_all_roles", "description": "List all roles and their users", "parameters": {}, "permissions": ["admin", "superadmin"]},
-        {"name": "get_user_role", "description": "Get the role for a specific user", "parameters": {"user_id": "string"}, "permissions": ["admin", "superadmin"]},
-        {"name": "set_user_role", "description": "Set a user's role", "parameters": {"user_id": "string", "role": "string"}, "permissions": ["superadmin"]},
-        {"name": "get_config", "description": "Show all config values", "parameters": {}, "permissions": ["admin", "superadmin"]},
-        {"name": "get_config_key", "description": "Show value for a config key", "parameters": {"key": "string"}, "permissions": ["admin", "superadmin"]},
-        {"name": "set_config", "description": "Set a config value", "parameters": {"key": "string", "value": "string"}, "permissions": ["admin", "superadmin"]},
-        {"name": "delete_config", "description": "Delete a config key", "parameters": {"key": "string"}, "permissions": ["superadmin"]},
-        {"name": "list_config_keys", "description": "List all config keys", "parameters": {}, "permissions": ["admin", "superadmin"]},
-        {"name": "config_help", "description": "Show config help or help for a specific key", "parameters": {"key": "string (optional)"}, "permissions": ["admin", "superadmin"]},
-        {"name": "get_audit_log", "description": "Show audit log entries", "parameters": {"limit": "int (default 10)"}, "permissions": ["superadmin"]},
-        {"name": "help", "description": "Show help for a command", "parameters": {"command": "string (optional)"}, "permissions": ["all"]},
+        {**action, "permissions": policy.roles_for(action["name"])} for action in MCP_ACTIONS
     ]
 
 
@@ -101,10 +116,7 @@ async def api_get_bot_context(
     Returns the value for the specified key.
     """
     _, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
+    policy.require("get_bot_context", role)
     mem = await memory.get_memory("bot", key)
     if not mem:
         raise HTTPException(status_code=404, detail="Bot context not found")
@@ -121,10 +133,7 @@ async def api_set_bot_context(
     Returns the key set.
     """
     _, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
+    policy.require("set_bot_context", role)
     key = payload.get("key")
     value = payload.get("value")
     if not key or value is None:
@@ -198,10 +207,13 @@ async def api_list_memories(
 
 @router.get("/config/{key}")
 async def api_get_config(
-    key: str, user_and_role: Tuple[str, str] = Depends(get_user_id_and_role)
-) -> Dict[str, Any]:
+    key: str,
+    request: Request,
+    response: Response,
+    user_and_role: Tuple[str, str] = Depends(get_user_id_and_role),
+) -> Any:
     """
-    Get a config value by key.
+    Get a config value by key. Supports If-None-Match (304) and ?wait= long-polls.
 
     Args:
     - key (str): The config key to retrieve.
@@ -213,10 +225,10 @@ async def api_get_config(
     - HTTPException: If the user is not authorized (admin or superadmin role required).
     """
     user_id, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
+    policy.require("get_config_key", role)
+    not_modified = await config_not_modified(request, response, "key", key)
+    if not_modified:
+        return not_modified
     value = await get_config(key)
     await log_action(
         user_id, "get_config", {"key": key, "timestamp": datetime.utcnow().isoformat()}
@@ -239,13 +251,10 @@ async def api_set_config(
     - Dict[str, Any]: A dictionary containing the config key and new value.
 
     Raises:
-    - HTTPException: If the user is not authorized (superadmin role required).
+    - HTTPException: If the policy does not allow the user's role to set config.
     """
     user_id, role = user_and_role
-    if role != "superadmin":
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: superadmin role required"
-        )
+    policy.require("mcp_set_config", role)
     key = payload.get("key")
     value = payload.get("value")
     if not key or not isinstance(key, str) or not key.strip():
@@ -263,10 +272,13 @@ async def api_set_config(
 
 @router.get("/config/show/{key}")
 async def api_show_config(
-    key: str, user_and_role: Tuple[str, str] = Depends(get_user_id_and_role)
-) -> Dict[str, Any]:
+    key: str,
+    request: Request,
+    response: Response,
+    user_and_role: Tuple[str, str] = Depends(get_user_id_and_role),
+) -> Any:
     """
-    Show a config value.
+    Show a config value. Supports If-None-Match (304) and ?wait= long-polls.
 
     Args:
     - key (str): The config key to retrieve.
@@ -278,10 +290,10 @@ async def api_show_config(
     - HTTPException: If the user is not authorized (admin or superadmin role required).
     """
     user_id, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
+    policy.require("get_config_key", role)
+    not_modified = await config_not_modified(request, response, "key", key)
+    if not_modified:
+        return not_modified
     value = await get_config(key)
     await log_action(
         user_id, "show_config", {"key": key, "timestamp": datetime.utcnow().isoformat()}
@@ -291,10 +303,12 @@ async def api_show_config(
 
 @router.get("/config")
 async def api_get_all_config(
+    request: Request,
+    response: Response,
     user_and_role: Tuple[str, str] = Depends(get_user_id_and_role),
 ) -> Any:
     """
-    Get all config values.
+    Get all config values. Supports If-None-Match (304) and ?wait= long-polls.
 
     Returns:
     - Any: A dictionary or list containing all config values.
@@ -303,10 +317,10 @@ async def api_get_all_config(
     - HTTPException: If the user is not authorized (admin or superadmin role required).
     """
     user_id, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
+    policy.require("get_config", role)
+    not_modified = await config_not_modified(request, response, "list")
+    if not_modified:
+        return not_modified
     result = await get_all_config()
     await log_action(
         user_id, "get_all_config", {"timestamp": datetime.utcnow().isoformat()}
@@ -322,8 +336,7 @@ async def api_delete_config(
     Delete a config key. Superadmin only.
     """
     user_id, role = user_and_role
-    if role != "superadmin":
-        raise HTTPException(status_code=403, detail="Unauthorized: superadmin role required")
+    policy.require("delete_config", role)
     from ai_gateway.supabase_client import supabase
     await supabase.table("bot_config").delete().eq("key", key).execute()
     await log_action(user_id, "delete_config", {"key": key, "timestamp": datetime.utcnow().isoformat()})
@@ -332,19 +345,20 @@ async def api_delete_config(
 
 @router.get("/config/keys")
 async def api_list_config_keys(
-    user_and_role: Tuple[str, str] = Depends(get_user_id_and_role)
-) -> Dict[str, Any]:
+    request: Request,
+    response: Response,
+    user_and_role: Tuple[str, str] = Depends(get_user_id_and_role),
+) -> Any:
     """
     List all config keys. Admin/superadmin only.
+    Supports If-None-Match (304) and ?wait= long-polls.
     """
     user_id, role = user_and_role
-    if role not in ("superadmin", "admin"):
-        raise HTTPException(
-            status_code=403, detail="Unauthorized: admin or superadmin role required"
-        )
-    from ai_gateway.supabase_client import supabase
-    res = await supabase.table("bot_config").select("key").execute()
-    keys = [row["key"] for row in res.data] if res.data else []
+    policy.require("list_config_keys", role)
+    not_modified = await config_not_modified(request, response, "keys")
+    if not_modified:
+        return not_modified
+    keys = list((await get_config_snapshot()).raw)
     await log_action(user_id, "list_config_keys", {"timestamp": datetime.utcnow().isoformat()})
     return {"keys": keys}
 
@@ -352,16 +366,30 @@ async def api_list_config_keys(
 @router.get("/audit/logs")
 async def api_get_audit_logs(
     user_and_role: Tuple[str, str] = Depends(get_user_id_and_role),
-    limit: int = 10
+    limit: int = Query(10, ge=1, le=settings.AUDIT_PAGE_MAX_ROWS),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Get audit log entries. Superadmin only.
-    """
-    user_id, role = user_and_role
-    if role != "superadmin":
-        raise HTTPException(status_code=403, detail="Unauthorized: superadmin role required")
-    from ai_gateway.supabase_client import supabase
-    result = supabase.table("audit_log").select("timestamp, user_id, username, action, ip, user_agent").order("timestamp", desc=True).limit(limit).execute()
-    logs = result.data if hasattr(result, "data") else []
-    await log_action(user_id, "get_audit_log", {"limit": limit, "timestamp": datetime.utcnow().isoformat()})
-    return {"logs": logs}
+    Get audit log entries, newest first. Superadmin only.
+    Same cursor pagination and filters as the dashboard's /audit/logs (see ai_gateway.audit).
+    """
+    actor_id, role = user_and_role
+    policy.require("get_audit_log", role)
+    page = await audit_log_page(
+        limit=limit,
+        cursor=cursor,
+        user_id=user_id,
+        action_prefix=action,
+        ip=ip,
+        since=since,
+        until=until,
+        columns=parse_columns(fields),
+    )
+    await log_action(actor_id, "get_audit_log", {"limit": limit, "timestamp": datetime.utcnow().isoformat()})
+    return page
@@ -0,0 +1,50 @@
+-- Versioned bot_config changes for the config bus (ai_gateway/config_bus.py).
+--
+-- Every insert or update of bot_config takes the next value of a global sequence as the
+-- row's version and announces {key, version, origin, at} on the bot_config_changes channel
+-- (CONFIG_BUS_CHANNEL), so writes made outside the gateway (dashboard, SQL editor) reach
+-- every replica too. Processes skip versions they have already applied.
+
+CREATE SEQUENCE IF NOT EXISTS bot_config_version_seq;
+
+ALTER TABLE bot_config
+    ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT nextval('bot_config_version_seq'),
+    ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS bot_config_version_idx ON bot_config (version DESC);
+
+CREATE OR REPLACE FUNCTION bot_config_bump_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := nextval('bot_config_version_seq');
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bot_config_notify_change() RETURNS trigger AS $$
+DECLARE
+    row_key text := COALESCE(NEW.key, OLD.key);
+    row_version bigint := CASE WHEN TG_OP = 'DELETE' THEN nextval('bot_config_version_seq') ELSE NEW.version END;
+BEGIN
+    PERFORM pg_notify(
+        'bot_config_changes',
+        json_build_object(
+            'key', row_key,
+            'version', row_version,
+            'origin', 'db',
+            'at', extract(epoch FROM clock_timestamp())
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bot_config_bump_version ON bot_config;
+CREATE TRIGGER bot_config_bump_version
+    BEFORE INSERT OR UPDATE ON bot_config
+    FOR EACH ROW EXECUTE FUNCTION bot_config_bump_version();
+
+DROP TRIGGER IF EXISTS bot_config_notify_change ON bot_config;
+CREATE TRIGGER bot_config_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON bot_config
+    FOR EACH ROW EXECUTE FUNCTION bot_config_notify_change();
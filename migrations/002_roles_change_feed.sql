@@ -0,0 +1,23 @@
+-- Announce role changes on the config bus channel so every process drops its cached role
+-- (ai_gateway/supabase_roles.py RoleCache), including for edits made outside the gateway.
+-- Role events are unversioned: they never advance the config version.
+
+CREATE OR REPLACE FUNCTION roles_notify_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'bot_config_changes',
+        json_build_object(
+            'key', 'role:' || COALESCE(NEW.user_id, OLD.user_id),
+            'version', 0,
+            'origin', 'db',
+            'at', extract(epoch FROM clock_timestamp())
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS roles_notify_change ON roles;
+CREATE TRIGGER roles_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON roles
+    FOR EACH ROW EXECUTE FUNCTION roles_notify_change();
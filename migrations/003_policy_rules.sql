@@ -0,0 +1,32 @@
+-- Per-action role overrides for the authorization policy (ai_gateway/policy.py).
+--
+-- A row replaces the built-in roles of one action (the names in DEFAULT_RULES and
+-- /mcp/actions); an empty roles array disables the action for everyone. Deleting the row
+-- restores the default. Every change is announced as an unversioned "policy:<action>" event
+-- on the config bus channel, so all processes recompile their policy within moments.
+
+CREATE TABLE IF NOT EXISTS policy_rules (
+    action text PRIMARY KEY,
+    roles text[] NOT NULL DEFAULT '{}',
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION policy_rules_notify_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'bot_config_changes',
+        json_build_object(
+            'key', 'policy:' || COALESCE(NEW.action, OLD.action),
+            'version', 0,
+            'origin', 'db',
+            'at', extract(epoch FROM clock_timestamp())
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS policy_rules_notify_change ON policy_rules;
+CREATE TRIGGER policy_rules_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON policy_rules
+    FOR EACH ROW EXECUTE FUNCTION policy_rules_notify_change();
@@ -0,0 +1,11 @@
+-- Idempotent audit_log and bot_logs writes for the local spool (ai_gateway/spool.py).
+--
+-- Every row the gateway writes carries a unique event_id. Rows spooled during a Supabase
+-- outage are replayed as upserts on event_id that ignore duplicates, so a row whose original
+-- insert did reach the database is not stored twice. Older rows keep a NULL event_id.
+
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS event_id text;
+CREATE UNIQUE INDEX IF NOT EXISTS audit_log_event_id_key ON audit_log (event_id);
+
+ALTER TABLE bot_logs ADD COLUMN IF NOT EXISTS event_id text;
+CREATE UNIQUE INDEX IF NOT EXISTS bot_logs_event_id_key ON bot_logs (event_id);
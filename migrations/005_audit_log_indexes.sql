@@ -0,0 +1,24 @@
+-- Indexes for keyset-paginated audit log queries (ai_gateway/audit.py).
+--
+-- Pages are read newest first, ordered by ("timestamp", id) and continued strictly after the
+-- previous page's last key, optionally filtered by user_id, ip or an action prefix. Each
+-- index below serves one of those shapes without sorting or skipping rows, however deep
+-- the page.
+--
+-- On a large, busy audit_log, run each statement on its own as CREATE INDEX CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes.
+
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS id bigint GENERATED BY DEFAULT AS IDENTITY;
+
+CREATE INDEX IF NOT EXISTS audit_log_timestamp_id_idx
+    ON audit_log ("timestamp" DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS audit_log_user_timestamp_id_idx
+    ON audit_log (user_id, "timestamp" DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS audit_log_ip_timestamp_id_idx
+    ON audit_log (ip, "timestamp" DESC, id DESC);
+
+-- text_pattern_ops lets `action LIKE 'prefix%'` use the index under any collation.
+CREATE INDEX IF NOT EXISTS audit_log_action_prefix_idx
+    ON audit_log (action text_pattern_ops, "timestamp" DESC);
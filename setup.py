@@ -16,6 +16,8 @@ setup(
         "pytest-asyncio",
         "ruff",
         "openai",
+        "aiohttp",
+        "asyncpg",
         "python-multipart"
     ],
     python_requires=">=3.11",
@@ -11,3 +11,23 @@ export async function fetchAuditLogs() {
   });
   return resp.data.logs || resp.data || [];
 }
+
+// One page of audit log entries, newest first, filtered on the server.
+// filters: { userId, action (prefix), ip, since, until }; pass the returned
+// nextCursor back as `cursor` for the following page (null on the last page).
+export async function fetchAuditLogPage({ filters = {}, cursor = null, limit = 25 } = {}) {
+  const headers = await getDiscordHeaders();
+  const params = { limit };
+  if (cursor) params.cursor = cursor;
+  if (filters.userId) params.user_id = filters.userId;
+  if (filters.action) params.action = filters.action;
+  if (filters.ip) params.ip = filters.ip;
+  if (filters.since) params.since = filters.since;
+  if (filters.until) params.until = filters.until;
+  const resp = await axios.get(`${config.apiBaseUrl}/audit/logs`, {
+    withCredentials: true,
+    headers,
+    params,
+  });
+  return { logs: resp.data.logs || [], nextCursor: resp.data.next_cursor || null };
+}
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { fetchAuditLogs } from "../api/audit";
+import { fetchAuditLogPage } from "../api/audit";
 import Loading from "../components/Loading";
 import ErrorMessage from "../components/ErrorMessage";
 import Table from "../components/Table";
@@ -23,45 +23,59 @@ export default function AuditLog() {
   const [error, setError] = useState(null);
   const [filter, setFilter] = useState({ user: "", action: "" });
   const [page, setPage] = useState(1);
+  // cursors[i] fetches page i + 1; the server pages by (timestamp, id), so deep pages stay fast.
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [modalLog, setModalLog] = useState(null); // <-- Add this line
   const pageSize = 25;
 
+  // Filtering (user ID, action prefix, IP, date range) happens on the server.
+  function serverFilters(filter) {
+    const until = filter.endDate
+      // Add 1 day to include the end date
+      ? new Date(new Date(filter.endDate).getTime() + 24*60*60*1000).toISOString().slice(0, 10)
+      : undefined;
+    return {
+      userId: filter.user.trim(),
+      action: filter.action.trim(),
+      ip: (filter.ip || "").trim(),
+      since: filter.startDate || undefined,
+      until,
+    };
+  }
+
+  function updateFilter(changes) {
+    setFilter(f => ({ ...f, ...changes }));
+    setPage(1);
+    setCursors([null]);
+  }
+
   useEffect(() => {
-    setLoading(true);
-    fetchAuditLogs()
-      .then(setLogs)
-      .catch(setError)
-      .finally(() => setLoading(false));
-  }, []);
+    // Wait for typing to pause before querying.
+    const timer = setTimeout(() => {
+      setLoading(true);
+      fetchAuditLogPage({ filters: serverFilters(filter), cursor: cursors[page - 1], limit: pageSize })
+        .then(result => {
+          setLogs(result.logs);
+          setNextCursor(result.nextCursor);
+          setError(null);
+        })
+        .catch(setError)
+        .finally(() => setLoading(false));
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [filter, page, cursors]);
 
-  // Advanced filtering: user, action, IP, date range
-  function advancedFilter(logs, filter) {
-    return logs.filter(log => {
-      // User
-      if (filter.user && !((log.username || log.user_id || "").toLowerCase().includes(filter.user.toLowerCase()))) return false;
-      // Action
-      if (filter.action && !(log.action || "").toLowerCase().includes(filter.action.toLowerCase())) return false;
-      // IP
-      if (filter.ip && !(log.ip || "").includes(filter.ip)) return false;
-      // Date range
-      if (filter.startDate) {
-        const logDate = new Date(log.time || log.timestamp);
-        if (logDate < new Date(filter.startDate)) return false;
-      }
-      if (filter.endDate) {
-        const logDate = new Date(log.time || log.timestamp);
-        // Add 1 day to include the end date
-        if (logDate > new Date(new Date(filter.endDate).getTime() + 24*60*60*1000)) return false;
-      }
-      return true;
-    });
+  function handleNextPage() {
+    if (!nextCursor) return;
+    setCursors(c => [...c.slice(0, page), nextCursor]);
+    setPage(p => p + 1);
   }
-  const filtered = advancedFilter(logs, filter);
-  const totalPages = Math.max(1, Math.ceil(filtered.length / pageSize));
-  const pageLogs = filtered.slice((page-1)*pageSize, page*pageSize);
+
+  const pageLogs = logs;
 
   function handleExportCSV() {
-    const csv = toCSV(filtered);
+    const csv = toCSV(pageLogs);
     const blob = new Blob([csv], { type: "text/csv" });
     const url = URL.createObjectURL(blob);
     const a = document.createElement("a");
@@ -79,23 +93,23 @@ export default function AuditLog() {
       <div style={{ marginBottom: 16, display: "flex", gap: 12, alignItems: "center", flexWrap: "wrap" }}>
         <input
           type="text"
-          placeholder="Filter by user..."
+          placeholder="Filter by user ID..."
           value={filter.user}
-          onChange={e => { setFilter(f => ({ ...f, user: e.target.value })); setPage(1); }}
+          onChange={e => updateFilter({ user: e.target.value })}
           style={{ padding: 6, fontSize: 15, width: 160 }}
         />
         <input
           type="text"
-          placeholder="Filter by action..."
+          placeholder="Action starts with..."
           value={filter.action}
-          onChange={e => { setFilter(f => ({ ...f, action: e.target.value })); setPage(1); }}
+          onChange={e => updateFilter({ action: e.target.value })}
           style={{ padding: 6, fontSize: 15, width: 140 }}
         />
         <input
           type="text"
           placeholder="Filter by IP..."
           value={filter.ip || ""}
-          onChange={e => { setFilter(f => ({ ...f, ip: e.target.value })); setPage(1); }}
+          onChange={e => updateFilter({ ip: e.target.value })}
           style={{ padding: 6, fontSize: 15, width: 120 }}
         />
         <label style={{ fontSize: 15 }}>
@@ -103,7 +117,7 @@ export default function AuditLog() {
           <input
             type="date"
             value={filter.startDate || ""}
-            onChange={e => { setFilter(f => ({ ...f, startDate: e.target.value })); setPage(1); }}
+            onChange={e => updateFilter({ startDate: e.target.value })}
             style={{ marginLeft: 4, marginRight: 8 }}
           />
         </label>
@@ -112,7 +126,7 @@ export default function AuditLog() {
           <input
             type="date"
             value={filter.endDate || ""}
-            onChange={e => { setFilter(f => ({ ...f, endDate: e.target.value })); setPage(1); }}
+            onChange={e => updateFilter({ endDate: e.target.value })}
             style={{ marginLeft: 4 }}
           />
         </label>
@@ -209,11 +223,11 @@ export default function AuditLog() {
 
       <div style={{ display: "flex", alignItems: "center", gap: 8 }}>
         <button disabled={page <= 1} onClick={() => setPage(p => Math.max(1, p - 1))}>Prev</button>
-        <span>Page {page} of {totalPages}</span>
-        <button disabled={page >= totalPages} onClick={() => setPage(p => Math.min(totalPages, p + 1))}>Next</button>
+        <span>Page {page}</span>
+        <button disabled={!nextCursor} onClick={handleNextPage}>Next</button>
       </div>
       <div style={{ marginTop: 18, color: "#888", fontSize: 14 }}>
-        Showing {pageLogs.length} of {filtered.length} filtered entries ({logs.length} total log entries loaded)
+        Showing {pageLogs.length} entries on this page{nextCursor ? "" : " (last page)"}
       </div>
     </div>
   );